@@ -0,0 +1,255 @@
+# admission.py
+"""Admission control for LLM calls.
+
+Calls are admitted against two token buckets, requests per minute and tokens
+per minute, so bursts queue up here instead of failing at the provider. Waiting
+calls are served in priority order: in-progress interviews go before
+speculative work, which goes before background jobs such as pre-generation.
+
+The buckets can live in a shared state file guarded by an exclusive file lock,
+so every worker process on a host draws from the same budget. A process also
+holds back lower priority calls while another process has higher priority
+calls waiting.
+"""
+import os
+import json
+import heapq
+import time
+import itertools
+import threading
+from collections import deque
+from metrics import REGISTRY, StatsCollector
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SPECULATIVE = 5
+PRIORITY_BACKGROUND = 10
+
+DEFAULT_STATE_PATH = os.path.join("data", "llm_admission.json")
+# Waiting entries of other processes older than this are ignored
+STALE_WAITER_SECONDS = 30.0
+# Longest sleep between checks of the shared buckets
+MAX_POLL_INTERVAL = 0.25
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a call cannot be admitted before its timeout."""
+
+
+class AdmissionController:
+    """Token-bucket admission with a priority queue of waiting calls."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, state_path=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.state_path = state_path if fcntl is not None else None
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        # Process-local bucket state, used when there is no shared state file
+        self._state = self._full_state()
+        self.admitted = 0
+        self.timeouts = 0
+        self._waits = deque(maxlen=1000)
+
+        if self.state_path:
+            directory = os.path.dirname(self.state_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+    def acquire(self, tokens, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Block until a call using `tokens` tokens is admitted.
+
+        Returns the seconds spent waiting. Raises AdmissionTimeout if the call
+        cannot be admitted within timeout seconds.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        if self.tokens_per_minute:
+            # A call larger than the whole bucket would never be admitted
+            tokens = min(tokens, self.tokens_per_minute)
+        entry = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if self._queue[0] == entry:
+                        delay = self._try_take(tokens, priority)
+                        if delay == 0:
+                            waited = time.monotonic() - start
+                            self.admitted += 1
+                            self._waits.append(waited)
+                            return waited
+                    else:
+                        delay = MAX_POLL_INTERVAL
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            if len(self._queue) == 1:
+                                self._clear_waiting()
+                            raise AdmissionTimeout(f"not admitted within {timeout:.2f}s")
+                        delay = min(delay, remaining)
+                    self._cond.wait(min(delay, MAX_POLL_INTERVAL))
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def adjust(self, reserved_tokens, used_tokens):
+        """Correct the token bucket once the actual usage of a call is known."""
+        if not self.tokens_per_minute or used_tokens is None:
+            return
+        with self._cond:
+            with self._locked_state() as state:
+                state["tokens"] = min(self.tokens_per_minute, state["tokens"] + reserved_tokens - used_tokens)
+
+    def stats(self):
+        """Return queue depth and wait time metrics."""
+        with self._cond:
+            waits = sorted(self._waits)
+            depth = {}
+            for priority, _ in self._queue:
+                depth[priority] = depth.get(priority, 0) + 1
+            return {
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": depth,
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": sum(waits) / len(waits) if waits else 0.0,
+                "wait_seconds_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "wait_seconds_max": waits[-1] if waits else 0.0
+            }
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def _full_state(self):
+        return {
+            "requests": float(self.requests_per_minute or 0),
+            "tokens": float(self.tokens_per_minute or 0),
+            "updated": time.time(),
+            "waiting": {}
+        }
+
+    def _try_take(self, tokens, priority):
+        """Take from the buckets if possible; otherwise return seconds to wait."""
+        with self._locked_state() as state:
+            now = time.time()
+            pid = str(os.getpid())
+            state["waiting"] = {
+                p: w for p, w in state["waiting"].items()
+                if p != pid and now - w[1] < STALE_WAITER_SECONDS
+            }
+
+            # Let other processes serve their higher priority calls first
+            if any(w[0] < priority for w in state["waiting"].values()):
+                state["waiting"][pid] = [priority, now]
+                return MAX_POLL_INTERVAL
+
+            delay = 0.0
+            if self.requests_per_minute and state["requests"] < 1:
+                delay = max(delay, (1 - state["requests"]) * 60 / self.requests_per_minute)
+            if self.tokens_per_minute and state["tokens"] < tokens:
+                delay = max(delay, (tokens - state["tokens"]) * 60 / self.tokens_per_minute)
+            if delay > 0:
+                state["waiting"][pid] = [priority, now]
+                return delay
+
+            if self.requests_per_minute:
+                state["requests"] -= 1
+            if self.tokens_per_minute:
+                state["tokens"] -= tokens
+            # Keep advertising our remaining waiters to other processes
+            if len(self._queue) > 1:
+                state["waiting"][pid] = [sorted(self._queue)[1][0], now]
+            return 0.0
+
+    def _clear_waiting(self):
+        """Stop advertising waiters of this process to the others."""
+        if self.state_path:
+            with self._locked_state() as state:
+                state["waiting"].pop(str(os.getpid()), None)
+
+    def _locked_state(self):
+        return _SharedState(self)
+
+
+class _SharedState:
+    """Context manager that loads, refills and saves the bucket state."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.file = None
+
+    def __enter__(self):
+        controller = self.controller
+        if controller.state_path:
+            self.file = open(controller.state_path, "a+")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            self.file.seek(0)
+            try:
+                self.state = json.loads(self.file.read() or "null") or controller._full_state()
+            except ValueError:
+                self.state = controller._full_state()
+        else:
+            self.state = controller._state
+
+        # Refill both buckets for the time since the last update
+        now = time.time()
+        elapsed = max(0.0, now - self.state["updated"])
+        if controller.requests_per_minute:
+            self.state["requests"] = min(controller.requests_per_minute,
+                                         self.state["requests"] + elapsed * controller.requests_per_minute / 60)
+        if controller.tokens_per_minute:
+            self.state["tokens"] = min(controller.tokens_per_minute,
+                                       self.state["tokens"] + elapsed * controller.tokens_per_minute / 60)
+        self.state["updated"] = now
+        return self.state
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.file is not None:
+            try:
+                self.file.seek(0)
+                self.file.truncate()
+                self.file.write(json.dumps(self.state))
+                self.file.flush()
+            finally:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+                self.file.close()
+        return False
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+REGISTRY.register(StatsCollector(
+    "talentscout_llm_admission", "LLM admission control: queue depth, admissions and wait times.",
+    lambda: _admission.stats() if _admission is not None else None, label="priority"))
+
+
+def get_admission_controller():
+    """Return the host-wide admission controller, or None unless a limit is configured.
+
+    Limits come from LLM_RPM_LIMIT and LLM_TPM_LIMIT; processes coordinate
+    through LLM_ADMISSION_STATE (set it to an empty string for per-process buckets).
+    """
+    global _admission
+    requests_per_minute = float(os.getenv("LLM_RPM_LIMIT", 0)) or None
+    tokens_per_minute = float(os.getenv("LLM_TPM_LIMIT", 0)) or None
+    if requests_per_minute is None and tokens_per_minute is None:
+        return None
+    with _admission_lock:
+        if _admission is None:
+            _admission = AdmissionController(
+                requests_per_minute,
+                tokens_per_minute,
+                state_path=os.getenv("LLM_ADMISSION_STATE", DEFAULT_STATE_PATH) or None
+            )
+        return _admission
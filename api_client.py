@@ -0,0 +1,159 @@
+# api_client.py
+"""Client for the session API in api_server.py.
+
+RemoteChatbot offers the parts of TalentScoutChatbot that app.py uses, so the
+Streamlit app can run as a thin client of a shared API server. Set
+TALENTSCOUT_API_URL (e.g. http://127.0.0.1:8000) to switch app.py over.
+"""
+import json
+import http.client
+from urllib.parse import urlsplit
+
+DEFAULT_API_TIMEOUT = 60.0
+
+
+class APIError(Exception):
+    """Raised when the API server answers with an error."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TalentScoutAPIClient:
+    """Minimal HTTP client; one keep-alive connection per client."""
+
+    def __init__(self, base_url, timeout=DEFAULT_API_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._conn = None
+
+    def start_session(self):
+        return self._request("POST", "/sessions")["session_id"]
+
+    def get_session(self, session_id):
+        return self._request("GET", f"/sessions/{session_id}")
+
+    def end_session(self, session_id):
+        return self._request("DELETE", f"/sessions/{session_id}")
+
+    def send(self, session_id, message, hidden=False):
+        """Send a turn and return the result with the full response."""
+        return self._request("POST", f"/sessions/{session_id}/turns", {"message": message, "hidden": hidden})
+
+    def stream(self, session_id, message, hidden=False):
+        """Send a turn and yield response chunks; returns the final event."""
+        response = self._open("POST", f"/sessions/{session_id}/turns",
+                              {"message": message, "hidden": hidden, "stream": True})
+        if response.status != 200:
+            self._raise(response)
+        result = {}
+        try:
+            for line in response:
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                if "delta" in event:
+                    yield event["delta"]
+                else:
+                    result = event
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise APIError(f"Stream from API server failed: {e}")
+        if result.get("error"):
+            raise APIError(result["error"])
+        return result
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _open(self, method, path, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        # Retry once on a keep-alive connection the server has closed
+        for attempt in range(2):
+            if self._conn is None:
+                cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self._conn = cls(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, self.prefix + path, body=payload, headers=headers)
+                return self._conn.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt:
+                    raise APIError(f"Could not reach API server: {e}")
+
+    def _request(self, method, path, body=None):
+        response = self._open(method, path, body)
+        if response.status >= 400:
+            self._raise(response)
+        return json.loads(response.read())
+
+    def _raise(self, response):
+        try:
+            message = json.loads(response.read()).get("error")
+        except ValueError:
+            message = None
+        raise APIError(message or f"HTTP {response.status}", status=response.status)
+
+
+class RemoteChatbot:
+    """A TalentScoutChatbot look-alike backed by the API server."""
+
+    def __init__(self, base_url, session_id=None):
+        """Start a new session, or resume session_id; raises APIError if it is gone."""
+        self.client = TalentScoutAPIClient(base_url)
+        self.turn_count = 0
+        self._state = None
+        self._saved_to = None
+        if session_id is None:
+            self.session_id = self.client.start_session()
+        else:
+            self.session_id = session_id
+            self._refresh()
+
+    def generate_response(self, user_input, stream=False, hidden=False):
+        chunks = self._stream(user_input, hidden)
+        if stream:
+            return chunks
+        return "".join(chunks)
+
+    def get_state(self):
+        if self._state is None:
+            self._refresh()
+        return self._state
+
+    def get_candidate_info(self):
+        return self._refresh()["candidate_info"]
+
+    def get_messages(self):
+        return self._refresh()["messages"]
+
+    @property
+    def saved_to(self):
+        """Candidate store ID the server saved the candidate data as, once concluded."""
+        return self._saved_to
+
+    def close(self):
+        self.client.end_session(self.session_id)
+        self.client.close()
+
+    def _stream(self, user_input, hidden):
+        result = yield from self.client.stream(self.session_id, user_input, hidden)
+        self.turn_count = result.get("turn", self.turn_count + 1)
+        self._state = result.get("state")
+        self._saved_to = result.get("saved_to")
+
+    def _refresh(self):
+        session = self.client.get_session(self.session_id)
+        self.turn_count = session["turn"]
+        self._state = session["state"]
+        self._saved_to = session["saved_to"]
+        return session
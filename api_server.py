@@ -0,0 +1,503 @@
+# api_server.py
+"""Headless HTTP API for interview sessions.
+
+An asyncio server that hosts many TalentScoutChatbot sessions in one process.
+The event loop holds every connection and idle session; a turn runs the
+chatbot's blocking LLM calls on a bounded worker pool and streams its chunks
+back to the loop, so only turns that are waiting on the LLM occupy a thread.
+
+Endpoints (JSON bodies):
+    POST   /sessions                  start a session -> {"session_id"}
+    POST   /sessions/<id>/turns       {"message", "stream", "hidden"} -> {"response", "state", ...}
+                                      or, with "stream": true, server-sent events
+    GET    /sessions/<id>             state, candidate info and visible messages
+    DELETE /sessions/<id>             end a session
+    GET    /health                    registry statistics
+
+Sessions idle for API_SESSION_IDLE_TIMEOUT seconds are evicted, and the least
+recently used idle sessions are evicted while the estimated session memory is
+above API_MAX_SESSION_MEMORY_MB.
+
+With CHECKPOINT_STORE set (see checkpoint.py) every turn is checkpointed, and
+a session this process doesn't hold, or holds an older version of, is
+rehydrated from the store on its next request. Eviction then only frees
+memory, and any number of API processes can serve the same sessions without
+sticky routing.
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from chatbot import TalentScoutChatbot
+from checkpoint import get_checkpointer
+from utils import save_candidate_data
+from matching import index_saved_candidate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_PORT = 8000
+DEFAULT_IDLE_TIMEOUT = 1800.0
+DEFAULT_MAX_SESSION_MEMORY_MB = 256
+DEFAULT_API_WORKERS = 32
+# Retained size of a session before its transcript, from bench_session_memory.py
+SESSION_BASE_BYTES = 2500
+MAX_BODY_BYTES = 64 * 1024
+
+SESSION_PATH = re.compile(r"^/sessions/([0-9a-f]{32})(/turns)?$")
+
+_DONE = object()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionEntry:
+    """A hosted chatbot and its bookkeeping."""
+
+    __slots__ = ("chatbot", "last_used", "lock", "size", "saved_to")
+
+    def __init__(self, chatbot):
+        self.chatbot = chatbot
+        self.last_used = time.monotonic()
+        # Turns of one session run one at a time
+        self.lock = asyncio.Lock()
+        self.size = SESSION_BASE_BYTES
+        self.saved_to = None
+
+    def measure(self):
+        """Re-estimate the memory the session holds."""
+        contents = self.chatbot.conversation_history.transcript.contents
+        self.size = SESSION_BASE_BYTES + sum(len(content) + 50 for content in contents)
+        return self.size
+
+
+class SessionRegistry:
+    """Live sessions in least recently used order, with idle and memory limits."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_memory=DEFAULT_MAX_SESSION_MEMORY_MB * 2 ** 20,
+                 chatbot_factory=TalentScoutChatbot, checkpointer=None):
+        self.idle_timeout = idle_timeout
+        self.max_memory = max_memory
+        self.chatbot_factory = chatbot_factory
+        self.checkpointer = checkpointer
+        self._sessions = OrderedDict()
+        self.memory = 0
+        self.created = 0
+        self.restored = 0
+        self.evicted_idle = 0
+        self.evicted_memory = 0
+
+    def create(self):
+        entry = self._add(self.chatbot_factory())
+        self.created += 1
+        return entry
+
+    def adopt(self, chatbot):
+        """Host a chatbot rehydrated from a checkpoint, replacing any older copy."""
+        old = self._sessions.pop(chatbot.session_id, None)
+        if old is not None:
+            self.memory -= old.size
+            old.chatbot.close()
+        entry = self._add(chatbot)
+        entry.measure()
+        self.memory += entry.size - SESSION_BASE_BYTES
+        self.restored += 1
+        return entry
+
+    def find(self, session_id):
+        """Return the live entry for session_id, or None."""
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return entry
+
+    def get(self, session_id):
+        entry = self.find(session_id)
+        if entry is None:
+            raise HTTPError(404, "Unknown or expired session")
+        return entry
+
+    def _add(self, chatbot):
+        self._enforce_memory(SESSION_BASE_BYTES)
+        if self.memory + SESSION_BASE_BYTES > self.max_memory:
+            raise HTTPError(503, "Session memory limit reached, try again later")
+        entry = SessionEntry(chatbot)
+        self._sessions[chatbot.session_id] = entry
+        self.memory += entry.size
+        return entry
+
+    def remeasure(self, entry):
+        """Update the memory estimate after a turn and evict if over the cap."""
+        old = entry.size
+        self.memory += entry.measure() - old
+        self._enforce_memory(0)
+
+    def remove(self, session_id):
+        """Drop a session from memory; its checkpoint, if any, is kept."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self.memory -= entry.size
+            entry.chatbot.close()
+        return entry
+
+    def evict_idle(self):
+        """Evict sessions idle for longer than the timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [sid for sid, entry in self._sessions.items()
+                   if entry.last_used < cutoff and not entry.lock.locked()]
+        for session_id in expired:
+            self.remove(session_id)
+        self.evicted_idle += len(expired)
+        return len(expired)
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "memory_bytes": self.memory,
+            "max_memory_bytes": self.max_memory,
+            "created": self.created,
+            "restored": self.restored,
+            "evicted_idle": self.evicted_idle,
+            "evicted_memory": self.evicted_memory,
+            "checkpoints": self.checkpointer.stats() if self.checkpointer is not None else None
+        }
+
+    def _enforce_memory(self, incoming):
+        """Evict least recently used sessions without a running turn until incoming fits."""
+        for session_id in list(self._sessions):
+            if self.memory + incoming <= self.max_memory:
+                break
+            if not self._sessions[session_id].lock.locked():
+                self.remove(session_id)
+                self.evicted_memory += 1
+
+
+class APIServer:
+    """Serves the session API on an asyncio event loop."""
+
+    def __init__(self, registry=None, workers=DEFAULT_API_WORKERS):
+        self.registry = registry or SessionRegistry()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-turn")
+        self._server = None
+        self._sweeper = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_API_PORT):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self._sweeper = asyncio.create_task(self._sweep())
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._sweeper.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def _sweep(self):
+        interval = max(1.0, min(60.0, self.registry.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            evicted = self.registry.evict_idle()
+            if evicted:
+                logger.info("Evicted %d idle sessions", evicted)
+
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # The body is not read, so the connection cannot be reused
+                    await self._send_json(writer, e.status, {"error": str(e)})
+                    break
+                if request is None:
+                    break
+                method, path, body = request
+                try:
+                    await self._dispatch(method, path, body, writer)
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)})
+                except ConnectionError:
+                    raise
+                except Exception:
+                    logger.exception("Error handling %s %s", method, path)
+                    await self._send_json(writer, 500, {"error": "Internal server error"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length header")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body is larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?")[0], body
+
+    async def _dispatch(self, method, path, body, writer):
+        if path == "/health" and method == "GET":
+            return await self._send_json(writer, 200, self.registry.stats())
+        if path == "/sessions" and method == "POST":
+            entry = self.registry.create()
+            if self.registry.checkpointer is not None:
+                # Checkpoint right away so that any worker can serve the first turn
+                await self._in_worker(self.registry.checkpointer.save, entry.chatbot)
+            return await self._send_json(writer, 201, {"session_id": entry.chatbot.session_id})
+
+        match = SESSION_PATH.match(path)
+        if not match:
+            raise HTTPError(404, f"No route for {method} {path}")
+        session_id, turns = match.groups()
+        if turns:
+            if method != "POST":
+                raise HTTPError(405, "Use POST to send a turn")
+            return await self._post_turn(session_id, _parse_json(body), writer)
+        if method == "GET":
+            return await self._send_json(writer, 200, _session_view(await self._session(session_id)))
+        if method == "DELETE":
+            removed = self.registry.remove(session_id) is not None
+            checkpointer = self.registry.checkpointer
+            if checkpointer is not None:
+                removed = await self._in_worker(checkpointer.version, session_id) is not None or removed
+                await self._in_worker(checkpointer.delete, session_id)
+            if not removed:
+                raise HTTPError(404, "Unknown or expired session")
+            return await self._send_json(writer, 200, {"session_id": session_id, "closed": True})
+        raise HTTPError(405, f"Method {method} not allowed")
+
+    async def _session(self, session_id):
+        """Return the session's entry, rehydrating it from the checkpoint store if needed."""
+        entry = self.registry.find(session_id)
+        checkpointer = self.registry.checkpointer
+        if checkpointer is None:
+            if entry is None:
+                raise HTTPError(404, "Unknown or expired session")
+            return entry
+        if entry is not None:
+            version = await self._in_worker(checkpointer.version, session_id)
+            if version is None:
+                # Ended or expired on another worker
+                self.registry.remove(session_id)
+                raise HTTPError(404, "Unknown or expired session")
+            # Another worker may have taken turns since this copy was current
+            if version <= entry.chatbot.turn_count:
+                return entry
+        chatbot = await self._in_worker(checkpointer.restore, session_id, self.registry.chatbot_factory)
+        if chatbot is None:
+            raise HTTPError(404, "Unknown or expired session")
+        # A concurrent request may have rehydrated it, or started a turn on the
+        # old copy, while this one waited
+        current = self.registry.find(session_id)
+        if current is not None and (current.chatbot.turn_count >= chatbot.turn_count or current.lock.locked()):
+            return current
+        return self.registry.adopt(chatbot)
+
+    async def _in_worker(self, fn, *args):
+        """Run blocking store I/O on the worker pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _post_turn(self, session_id, request, writer):
+        message = request.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "A non-empty 'message' is required")
+        stream = bool(request.get("stream"))
+        entry = await self._session(session_id)
+        async with entry.lock:
+            previous_state = entry.chatbot.get_state()
+            producer, chunks = self._run_turn(entry, message, bool(request.get("hidden")))
+            finished = False
+            try:
+                if stream:
+                    await self._start_events(writer)
+                    try:
+                        async for chunk in chunks:
+                            await self._send_event(writer, {"delta": chunk})
+                        finished = True
+                        result = await self._finish_turn(entry, previous_state)
+                    except ConnectionError:
+                        raise
+                    except Exception:
+                        # The status line is already sent, so report the failure as an event
+                        logger.exception("Error in turn of session %s", entry.chatbot.session_id)
+                        result = {"done": True, "error": "Internal server error"}
+                    await self._send_event(writer, result)
+                    await self._end_events(writer)
+                else:
+                    response = "".join([chunk async for chunk in chunks])
+                    finished = True
+                    result = dict(await self._finish_turn(entry, previous_state), response=response)
+                    await self._send_json(writer, 200, result)
+            finally:
+                # A client hanging up does not stop the turn: keep the session locked until
+                # it has run, and finish it so that a concluding turn is still saved
+                await chunks.aclose()
+                await producer
+                if not finished:
+                    try:
+                        await self._finish_turn(entry, previous_state)
+                    except Exception:
+                        logger.exception("Error finishing turn of session %s", entry.chatbot.session_id)
+
+    def _run_turn(self, entry, message, hidden):
+        """Run a turn on the worker pool.
+
+        Returns the future of the worker and an async iterator of the turn's
+        chunks on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for chunk in entry.chatbot.generate_response(message, stream=True, hidden=hidden):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        async def chunks():
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+
+        return loop.run_in_executor(self._executor, produce), chunks()
+
+    async def _finish_turn(self, entry, previous_state):
+        """Bookkeeping after a turn; returns the turn's metadata."""
+        entry.last_used = time.monotonic()
+        chatbot = entry.chatbot
+        state = chatbot.get_state()
+        info = chatbot.get_candidate_info()
+        # Save once, on the turn that reaches the conclusion, like app.py does;
+        # a session rehydrated later must not save again
+        if state == "conclude" and previous_state != "conclude" and info["name"] and info["email"]:
+            entry.saved_to = await self._in_worker(self._save_candidate, info, chatbot.session_id)
+        self.registry.remeasure(entry)
+        return {"done": True, "state": state, "turn": chatbot.turn_count, "saved_to": entry.saved_to}
+
+    def _save_candidate(self, info, session_id):
+        candidate_id = save_candidate_data(info, session_id=session_id)
+        index_saved_candidate(dict(info), candidate_id)
+        return candidate_id
+
+    async def _send_json(self, writer, status, data):
+        payload = json.dumps(data).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_reason(status)}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+
+    async def _start_events(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        await writer.drain()
+
+    async def _send_event(self, writer, data):
+        event = f"data: {json.dumps(data)}\n\n".encode("utf-8")
+        writer.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+        await writer.drain()
+
+    async def _end_events(self, writer):
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _parse_json(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return data
+
+
+def _session_view(entry):
+    chatbot = entry.chatbot
+    return {
+        "session_id": chatbot.session_id,
+        "state": chatbot.get_state(),
+        "turn": chatbot.turn_count,
+        "candidate_info": dict(chatbot.get_candidate_info()),
+        "messages": chatbot.get_messages(),
+        "saved_to": entry.saved_to
+    }
+
+
+def _reason(status):
+    return {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Content Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}.get(status, "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TalentScout interview sessions over HTTP.")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", DEFAULT_API_PORT)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", DEFAULT_API_WORKERS)),
+                        help="turns that can wait on the LLM at once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    registry = SessionRegistry(
+        idle_timeout=float(os.getenv("API_SESSION_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT)),
+        max_memory=float(os.getenv("API_MAX_SESSION_MEMORY_MB", DEFAULT_MAX_SESSION_MEMORY_MB)) * 2 ** 20,
+        checkpointer=get_checkpointer()
+    )
+
+    async def serve():
+        server = APIServer(registry, workers=args.workers)
+        await server.start(args.host, args.port)
+        print(f"TalentScout API listening on http://{args.host}:{server.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 import streamlit as st
 from chatbot import TalentScoutChatbot
-import time
+from api_client import RemoteChatbot, APIError
+from checkpoint import get_checkpointer
 import os
 import json
-from datetime import datetime
 from utils import save_candidate_data
+from candidate_store import get_candidate_store
+from skill_taxonomy import get_skill_taxonomy
+from matching import get_matching_index, index_saved_candidate, Opening
+import metrics
+import tracing
 
 # Set page config
 st.set_page_config(
@@ -13,6 +18,11 @@ st.set_page_config(
     layout="centered"
 )
 
+# Serve Prometheus metrics when METRICS_PORT is set (once per process)
+metrics.start_metrics_server()
+# Sample stacks for flamegraphs when PROFILE_PATH is set
+tracing.start_profiler()
+
 # Custom CSS for styling
 st.markdown(
     """
@@ -61,14 +71,35 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Initialize chatbot in session state if not already initialized
-if 'chatbot' not in st.session_state:
-    st.session_state.chatbot = TalentScoutChatbot()
+# With TALENTSCOUT_API_URL set, sessions live on the API server (api_server.py)
+# and this app is a thin client
+API_URL = os.getenv("TALENTSCOUT_API_URL")
 
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
-    bot_message = st.session_state.chatbot.generate_response("Hi")
-    st.session_state.messages.append({"role": "bot", "content": bot_message})
+def resume_session(session_id):
+    """Rehydrate a session from its checkpoint, or return None."""
+    if not session_id:
+        return None
+    if API_URL:
+        try:
+            return RemoteChatbot(API_URL, session_id=session_id)
+        except APIError:
+            return None
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return None
+    return checkpointer.restore(session_id, TalentScoutChatbot)
+
+# Initialize chatbot in session state if not already initialized.
+# The chatbot's transcript is the only copy of the conversation. The session
+# ID is kept in the URL, so that with checkpointing (CHECKPOINT_STORE) a
+# reload after a restart, or on another worker, resumes the interview.
+if 'chatbot' not in st.session_state:
+    chatbot = resume_session(st.query_params.get("session"))
+    if chatbot is None:
+        chatbot = RemoteChatbot(API_URL) if API_URL else TalentScoutChatbot()
+        chatbot.generate_response("Hi", hidden=True)
+    st.session_state.chatbot = chatbot
+    st.query_params["session"] = chatbot.session_id
 
 # Track if data has been saved
 if 'data_saved' not in st.session_state:
@@ -76,27 +107,25 @@ if 'data_saved' not in st.session_state:
 
 # Function to save candidate data
 def save_data():
+    if not st.session_state.data_saved and API_URL:
+        # The API server saves the data itself when the interview concludes
+        saved_to = st.session_state.chatbot.saved_to
+        if saved_to:
+            st.session_state.data_saved = True
+            st.session_state.saved_candidate_id = saved_to
+            return True
+        return False
     if not st.session_state.data_saved:
         candidate_info = st.session_state.chatbot.get_candidate_info()
         
         # Check if we have enough data to save
         if candidate_info['name'] and candidate_info['email']:
             try:
-                # Create data directory if it doesn't exist
-                if not os.path.exists('data'):
-                    os.makedirs('data')
-                
-                # Generate a unique filename
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                name = candidate_info.get("name", "unknown").lower().replace(" ", "_")
-                filename = f"data/candidate_{name}_{timestamp}.json"
-                
-                # Save to file
-                with open(filename, 'w') as f:
-                    json.dump(candidate_info, f, indent=4)
+                candidate_id = save_candidate_data(candidate_info, session_id=st.session_state.chatbot.session_id)
+                index_saved_candidate(dict(candidate_info), candidate_id)
                 
                 st.session_state.data_saved = True
-                st.session_state.saved_filename = filename
+                st.session_state.saved_candidate_id = candidate_id
                 return True
             except Exception as e:
                 st.error(f"Error saving data: {e}")
@@ -107,23 +136,30 @@ def save_data():
 st.title("TalentScout Hiring Assistant")
 st.subheader("AI-powered candidate screening")
 
+# Function to render a single chat message, optionally into a placeholder
+def render_message(role, content, target=None):
+    target = target or st
+    if role == "user":
+        target.markdown(f"""
+        <div class="chat-message user">
+            <div class="avatar">👤</div>  <!-- User icon -->
+            <div class="message">{content}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        target.markdown(f"""
+        <div class="chat-message bot">
+            <div class="avatar">🤖</div>  <!-- Robot icon -->
+            <div class="message">{content}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
 # Display chat messages
-for message in st.session_state.messages:
-    with st.container():
-        if message["role"] == "user":
-            st.markdown(f"""
-            <div class="chat-message user">
-                <div class="avatar">👤</div>  <!-- User icon -->
-                <div class="message">{message["content"]}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="chat-message bot">
-                <div class="avatar">🤖</div>  <!-- Robot icon -->
-                <div class="message">{message["content"]}</div>
-            </div>
-            """, unsafe_allow_html=True)
+messages = st.session_state.chatbot.get_messages()
+with tracing.span("render_history", session_id=st.session_state.chatbot.session_id, messages=len(messages)):
+    for message in messages:
+        with st.container():
+            render_message(message["role"], message["content"])
 
 # Chat input with form
 with st.form(key="message_form", clear_on_submit=True):
@@ -135,38 +171,46 @@ with st.form(key="message_form", clear_on_submit=True):
     submit_button = st.form_submit_button("Send")
     
     if submit_button and user_input.strip():
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        render_message("user", user_input)
         
-        with st.spinner("Thinking..."):
-            bot_response = st.session_state.chatbot.generate_response(user_input)
-            time.sleep(0.5)  # Simulate typing delay
-            st.session_state.messages.append({"role": "bot", "content": bot_response})
-            
-            # Check if conversation is concluding and save data
-            current_state = st.session_state.chatbot.get_state()
-            if current_state == "conclude":
-                save_data()
+        # Stream the response as it is generated instead of waiting for all of it
+        chunks = st.session_state.chatbot.generate_response(user_input, stream=True)
+        placeholder = st.empty()
+        with tracing.span("render_response", session_id=st.session_state.chatbot.session_id,
+                          turn_id=st.session_state.chatbot.turn_count + 1):
+            with st.spinner("Thinking..."):
+                bot_response = next(chunks, "")
+            render_message("bot", bot_response, placeholder)
+            for chunk in chunks:
+                bot_response += chunk
+                render_message("bot", bot_response, placeholder)
+        
+        # Check if conversation is concluding and save data
+        current_state = st.session_state.chatbot.get_state()
+        if current_state == "conclude":
+            save_data()
 
 # Display saved data notification
 if st.session_state.get('data_saved', False):
-    st.success(f"Candidate data has been saved to {st.session_state.saved_filename}")
+    candidate_id = st.session_state.saved_candidate_id
+    st.success(f"Candidate data has been saved as candidate #{candidate_id}")
     
     # Show download button for the saved data
-    if os.path.exists(st.session_state.saved_filename):
-        with open(st.session_state.saved_filename, 'r') as f:
-            st.download_button(
-                label="Download Candidate Data",
-                data=f.read(),
-                file_name=os.path.basename(st.session_state.saved_filename),
-                mime="application/json"
-            )
+    saved_record = get_candidate_store().get(candidate_id)
+    if saved_record is not None:
+        st.download_button(
+            label="Download Candidate Data",
+            data=json.dumps(saved_record, indent=4),
+            file_name=f"candidate_{candidate_id}.json",
+            mime="application/json"
+        )
 
 # Display debug info (optional)
 current_state = st.session_state.chatbot.get_state()
 if st.checkbox("Show debug info"):
     st.write(f"Current state: {current_state}")
     st.write("Candidate info:")
-    st.write(st.session_state.chatbot.get_candidate_info())
+    st.write(dict(st.session_state.chatbot.get_candidate_info()))
 
     # Add a manual save button in debug mode
     if st.button("Save Data Now"):
@@ -181,26 +225,79 @@ with st.expander("Admin Access"):
     if password == "admin123":  # Very simple password, should be more secure in production
         st.success("Admin access granted")
         
-        # List all saved candidate files
-        if os.path.exists('data'):
-            files = [f for f in os.listdir('data') if f.endswith('.json')]
-            if files:
-                selected_file = st.selectbox("Select candidate data file", files)
+        # LLM usage summary from the metrics registry
+        st.subheader("LLM Metrics")
+        llm_summary = metrics.summary()
+        if llm_summary["calls"]:
+            st.dataframe(llm_summary["calls"])
+            total_cost = sum(row["cost_usd"] for row in llm_summary["calls"])
+            st.write(f"Estimated spend: ${total_cost:.4f}")
+        else:
+            st.info("No LLM calls recorded yet.")
+        if llm_summary["fallbacks"]:
+            st.write("Fallbacks:", llm_summary["fallbacks"])
+        if llm_summary["cache"]:
+            st.write("Question cache lookups:", llm_summary["cache"])
+        for component, stats in llm_summary["components"].items():
+            st.write(f"{component.replace('_', ' ').capitalize()}:", stats)
+        
+        # Look up saved candidates
+        st.subheader("Candidates")
+        store = get_candidate_store()
+        col1, col2, col3, col4 = st.columns(4)
+        filter_email = col1.text_input("Email")
+        filter_position = col2.text_input("Position")
+        filter_location = col3.text_input("Location")
+        filter_skill = col4.text_input("Skill")
+        candidates = store.find(
+            email=filter_email, position=filter_position, location=filter_location,
+            tags=get_skill_taxonomy().normalize(filter_skill) if filter_skill else ()
+        )
+        if candidates:
+            selected = st.selectbox(
+                "Select candidate", candidates,
+                format_func=lambda c: f"#{c['id']} {c['name']} <{c['email']}> {c['created_at']}"
+            )
+            
+            if selected:
+                candidate_data = store.get(selected["id"])
+                st.json(candidate_data)
                 
-                if selected_file:
-                    file_path = os.path.join('data', selected_file)
-                    with open(file_path, 'r') as f:
-                        candidate_data = json.load(f)
-                        st.json(candidate_data)
-                        
-                        st.download_button(
-                            label="Download Selected Data",
-                            data=json.dumps(candidate_data, indent=4),
-                            file_name=selected_file,
-                            mime="application/json"
-                        )
-            else:
-                st.info("No candidate data files found.")
+                st.download_button(
+                    label="Download Selected Data",
+                    data=json.dumps(candidate_data, indent=4),
+                    file_name=f"candidate_{selected['id']}.json",
+                    mime="application/json"
+                )
+        else:
+            st.info("No candidates found.")
+        
+        # Rank saved candidates against an opening
+        st.subheader("Candidate Matching")
+        matching_index = get_matching_index()
+        if matching_index is None:
+            st.info("Candidate matching needs NumPy.")
+        else:
+            # Pick up candidates saved by other processes, e.g. the API server
+            matching_index.load_store(store)
+            opening_skills = st.text_input("Required skills", placeholder="python, django, postgresql")
+            col1, col2, col3 = st.columns(3)
+            min_experience = col1.number_input("Minimum years", min_value=0, value=0)
+            opening_location = col2.text_input("Location (optional)")
+            top_k = col3.number_input("Top candidates", min_value=1, max_value=100, value=10)
+            if opening_skills:
+                opening = Opening("Opening", opening_skills, min_experience=min_experience,
+                                  locations=[opening_location] if opening_location else ())
+                matches = matching_index.top_k(opening, k=int(top_k))
+                if matches:
+                    st.dataframe([
+                        {"score": score, "name": record.get("name"), "email": record.get("email"),
+                         "experience": record.get("experience"), "location": record.get("location"),
+                         "tech_stack": record.get("tech_stack")}
+                        for score, record in matches
+                    ])
+                else:
+                    st.info(f"No matching candidates among {len(matching_index)}.")
     elif password and password != "":
         st.error("Incorrect password")
 
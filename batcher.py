@@ -0,0 +1,189 @@
+# batcher.py
+"""Micro-batched question generation.
+
+Requests from many sessions are collected for a short window (or until a
+batch is full) and sent to the LLM as one structured prompt. The answer is
+split back to the waiting callers. Each caller waits at most the window plus
+the LLM timeout and gets None on failure, so it can fall back to a request of
+its own. Callers that have given up by the time their batch is dispatched are
+left out of it, and a batch nobody waits for any more is not sent.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from prompts import SYSTEM_PROMPT, BATCH_TECH_QUESTION_GENERATION_PROMPT
+from llm_client import LLMError, get_backend
+from routing import get_router
+from utils import clean_question_line
+from metrics import REGISTRY, StatsCollector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_MAX_SIZE = 8
+
+
+def parse_batch_response(text):
+    """Parse {"id": [questions]} from a batch completion, tolerating code fences."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    result = {}
+    for key, questions in data.items():
+        if isinstance(questions, list):
+            cleaned = [clean_question_line(q) for q in questions if isinstance(q, str)]
+            result[str(key)] = [q for q in cleaned if q]
+    return result
+
+
+class _BatchRequest:
+    def __init__(self, tech_stack, position, deadline):
+        self.tech_stack = tech_stack
+        self.position = position
+        # When the caller stops waiting, on the monotonic clock
+        self.deadline = deadline
+        self.result = None
+        self.done = threading.Event()
+
+
+class QuestionBatcher:
+    """Collects question generation requests and sends them in batches."""
+
+    def __init__(self, window=0.1, max_batch=DEFAULT_BATCH_MAX_SIZE, timeout=None, workers=4):
+        # Seconds to wait for more requests after the first one arrives
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pending = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-batch")
+        self._thread = None
+        self.batches = 0
+        self.requests = 0
+        self.failures = 0
+        # Requests whose caller gave up before their batch was sent
+        self.abandoned = 0
+        self.skipped_batches = 0
+
+    def submit(self, tech_stack, position):
+        """Queue a request and wait for its questions; returns None on failure."""
+        wait = self.window + (self.timeout or get_backend().timeout)
+        request = _BatchRequest(tech_stack, position, time.monotonic() + wait)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name="question-batcher", daemon=True)
+                self._thread.start()
+            self._pending.append(request)
+            self._cond.notify()
+        request.done.wait(wait)
+        return request.result
+
+    def stats(self):
+        """Return batch counters."""
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "failures": self.failures,
+                "abandoned": self.abandoned,
+                "skipped_batches": self.skipped_batches,
+                "average_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "pending": len(self._pending)
+            }
+
+    def _collect(self):
+        """Form batches from pending requests forever."""
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # The window starts with the first request of a batch
+                flush_at = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = flush_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self.batches += 1
+                self.requests += len(batch)
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch):
+        """Send one batch and hand the results back to its callers."""
+        # A busy executor can start a batch after its callers stopped waiting
+        now = time.monotonic()
+        live = [r for r in batch if r.deadline > now]
+        if len(live) < len(batch):
+            with self._cond:
+                self.abandoned += len(batch) - len(live)
+                self.skipped_batches += not live
+        if not live:
+            logger.debug("Skipping a batch of %d requests whose callers gave up", len(batch))
+            return
+        batch = live
+        candidates = [
+            {"id": str(i), "tech_stack": r.tech_stack, "position": r.position}
+            for i, r in enumerate(batch, 1)
+        ]
+        prompt = BATCH_TECH_QUESTION_GENERATION_PROMPT.format(candidates=json.dumps(candidates, indent=2))
+        results = {}
+        try:
+            router = get_router()
+            completion = router.complete(
+                "question_batch",
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                # The task's token budget is per candidate
+                max_tokens=router.tasks["question_batch"]["max_tokens"] * len(batch),
+                timeout=self.timeout
+            )
+            results = parse_batch_response(completion.text)
+        except LLMError as e:
+            logger.warning("Error generating batched questions: %s", e)
+        except Exception:
+            # Nothing would report it from the executor; the callers fall back
+            logger.exception("Unexpected error generating batched questions")
+        finally:
+            missing = 0
+            for candidate, request in zip(candidates, batch):
+                request.result = results.get(candidate["id"]) or None
+                missing += request.result is None
+                request.done.set()
+            with self._cond:
+                self.failures += missing
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+REGISTRY.register(StatsCollector(
+    "talentscout_question_batcher", "Micro-batched question generation: batches, requests and failures.",
+    lambda: _batcher.stats() if _batcher is not None else None))
+
+
+def get_question_batcher():
+    """Return the process-wide batcher, or None unless QUESTION_BATCH_WINDOW_MS is set."""
+    global _batcher
+    window_ms = float(os.getenv("QUESTION_BATCH_WINDOW_MS", 0))
+    if window_ms <= 0:
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = QuestionBatcher(
+                window=window_ms / 1000,
+                max_batch=int(os.getenv("QUESTION_BATCH_MAX_SIZE", DEFAULT_BATCH_MAX_SIZE))
+            )
+        return _batcher
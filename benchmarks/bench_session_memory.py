@@ -0,0 +1,75 @@
+# benchmarks/bench_session_memory.py
+"""Memory held per live interview session.
+
+Builds N sessions the way app.py keeps them in st.session_state, walks each
+through a complete interview without LLM calls (question generation returns
+a fixed list) and reports the traced bytes retained per session.
+
+    python benchmarks/bench_session_memory.py [--sessions 1000 10000]
+"""
+import os
+import sys
+import gc
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the whole transcript verbatim so no summarization call is made
+os.environ["HISTORY_TOKEN_BUDGET"] = str(10 ** 9)
+os.environ.pop("FOLLOW_UP_MAX", None)
+os.environ.pop("TRACE_PATH", None)
+
+from chatbot import TalentScoutChatbot
+
+QUESTIONS = [f"Technical question {i} about the candidate's stack?" for i in range(1, 6)]
+
+
+class OfflineChatbot(TalentScoutChatbot):
+    """The chatbot with question generation replaced by a fixed list."""
+
+    def _generate_technical_questions(self):
+        self.candidate_info["technical_questions"] = list(QUESTIONS)
+        return "Thank you for sharing your tech stack.\n\nFirst question: " + QUESTIONS[0]
+
+
+def interview_turns(i):
+    """Distinct answers for session i, like real candidates give."""
+    return [
+        "Hi", f"Candidate {i}", f"candidate{i}@example.com", f"+1 555 {i:07d}", f"{i % 15} years",
+        "Backend developer", f"City {i % 100}", "python, django, postgresql, docker, aws"
+    ] + [f"Answer {n} from candidate {i}, with a few sentences of detail about the topic." for n in range(5)]
+
+
+def build_session(i):
+    """Create and run one session; returns what the app keeps in session_state."""
+    bot = OfflineChatbot()
+    for text in interview_turns(i):
+        bot.generate_response(text)
+    return {"chatbot": bot, "data_saved": False}
+
+
+def measure(count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build_session(i) for i in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(sessions) == count
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    # Warm module-level caches so they are not charged to the first sessions
+    build_session(-1)
+    for count in args.sessions:
+        print(f"{count:>7} sessions: {measure(count):10.0f} bytes per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/bench_state_machine.py
+"""Per-turn overhead of the table-driven flow against the old if/elif chain.
+
+Runs complete interviews without any LLM calls: question generation returns
+a fixed list, so the numbers measure dispatch, capture and history handling.
+The question turns run the same action code on both sides, so the prompt
+column times the turns that only capture a field and reply with a prompt,
+where the state machine itself is most of the work.
+
+    python benchmarks/bench_state_machine.py [--interviews 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import TalentScoutChatbot
+from skill_taxonomy import get_skill_taxonomy
+from prompts import INITIAL_GREETING, INFORMATION_COLLECTION_PROMPTS, FALLBACK_RESPONSES
+
+QUESTIONS = [f"Technical question {i}?" for i in range(1, 6)]
+
+# Every turn reaches the next state: no input may contain an exit keyword such as "end"
+TURNS = ["Hi", "Ann Smith", "ann@example.com", "+1 555 123 4567", "5 years", "Software engineer",
+         "Berlin", "python, django, postgresql"] + ["My answer"] * (len(QUESTIONS) + 1) + ["thanks"]
+
+
+class FlowChatbot(TalentScoutChatbot):
+    """The current chatbot with question generation replaced by a fixed list."""
+
+    def _generate_technical_questions(self):
+        self.candidate_info["technical_questions"] = list(QUESTIONS)
+        return "Here are some questions."
+
+
+class LegacyChatbot(FlowChatbot):
+    """The previous string-state implementation, kept for comparison."""
+
+    current_state = None
+    states = None
+
+    def __init__(self):
+        super().__init__()
+        self.current_state = "greeting"
+        self.states = [
+            "greeting", "get_name", "get_email", "get_phone",
+            "get_experience", "get_position", "get_location",
+            "get_tech_stack", "generate_questions", "ask_questions",
+            "conclude"
+        ]
+
+    def _validate_input(self, user_input):
+        return None
+
+    def _update_candidate_info(self, user_input):
+        if self.current_state == "get_name":
+            self.candidate_info["name"] = user_input
+        elif self.current_state == "get_email":
+            self.candidate_info["email"] = user_input
+        elif self.current_state == "get_phone":
+            self.candidate_info["phone"] = user_input
+        elif self.current_state == "get_experience":
+            self.candidate_info["experience"] = user_input
+        elif self.current_state == "get_position":
+            self.candidate_info["position"] = user_input
+        elif self.current_state == "get_location":
+            self.candidate_info["location"] = user_input
+        elif self.current_state == "get_tech_stack":
+            self.candidate_info["tech_stack"] = user_input
+            # Added since; kept so both sides capture the same fields
+            self.candidate_info["tech_stack_normalized"] = get_skill_taxonomy().normalize(user_input)
+
+    def _get_next_state(self):
+        current_index = self.states.index(self.current_state)
+        next_index = min(current_index + 1, len(self.states) - 1)
+        return self.states[next_index]
+
+    def _get_next_response(self):
+        next_state = self._get_next_state()  # noqa: F841 (computed and discarded, as before)
+        if self.current_state == "greeting":
+            self.current_state = "get_name"
+            return INITIAL_GREETING
+        elif self.current_state == "get_name":
+            self.current_state = "get_email"
+            return INFORMATION_COLLECTION_PROMPTS["email"].format(name=self.candidate_info["name"])
+        elif self.current_state == "get_email":
+            self.current_state = "get_phone"
+            return INFORMATION_COLLECTION_PROMPTS["phone"]
+        elif self.current_state == "get_phone":
+            self.current_state = "get_experience"
+            return INFORMATION_COLLECTION_PROMPTS["experience"]
+        elif self.current_state == "get_experience":
+            self.current_state = "get_position"
+            return INFORMATION_COLLECTION_PROMPTS["position"]
+        elif self.current_state == "get_position":
+            self.current_state = "get_location"
+            return INFORMATION_COLLECTION_PROMPTS["location"]
+        elif self.current_state == "get_location":
+            self.current_state = "get_tech_stack"
+            return INFORMATION_COLLECTION_PROMPTS["tech_stack"]
+        elif self.current_state == "get_tech_stack":
+            self.current_state = "generate_questions"
+            return self._generate_technical_questions()
+        elif self.current_state == "generate_questions":
+            self.current_state = "ask_questions"
+            return self._ask_next_question()
+        elif self.current_state == "ask_questions":
+            self._insert_follow_up(self.conversation_history[-1]["content"])
+            self.candidate_info["question_index"] += 1
+            if self.candidate_info["question_index"] >= len(self.candidate_info["technical_questions"]):
+                self.current_state = "conclude"
+                return self._generate_conclusion()
+            return self._ask_next_question()
+        elif self.current_state == "conclude":
+            self.close()
+            return self._generate_exit_message()
+        return random.choice(FALLBACK_RESPONSES)
+
+
+def run_turns(cls, interviews):
+    """Return seconds per turn for full generate_response calls."""
+    elapsed = 0.0
+    for _ in range(interviews):
+        bot = cls()
+        start = time.perf_counter()
+        for text in TURNS:
+            bot.generate_response(text)
+        elapsed += time.perf_counter() - start
+        assert bot.current_state == "conclude", bot.current_state
+    return elapsed / (interviews * len(TURNS))
+
+
+def run_dispatch(cls, interviews, turns=TURNS):
+    """Return seconds per turn for capture and dispatch alone."""
+    elapsed = 0.0
+    for _ in range(interviews):
+        bot = cls()
+        start = time.perf_counter()
+        for text in turns:
+            bot._update_candidate_info(text)
+            bot._get_next_response()
+        elapsed += time.perf_counter() - start
+    return elapsed / (interviews * len(turns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--interviews", type=int, default=2000)
+    args = parser.parse_args()
+    # Spans and follow-up speculation would dominate the measurement
+    for name in ("TRACE_PATH", "FOLLOW_UP_MAX"):
+        os.environ.pop(name, None)
+
+    print(f"{'':10} {'turn (us)':>10} {'dispatch (us)':>14} {'prompt (us)':>12}")
+    for label, cls in (("legacy", LegacyChatbot), ("flow", FlowChatbot)):
+        run_dispatch(cls, 50)
+        turn = run_turns(cls, args.interviews)
+        dispatch = run_dispatch(cls, args.interviews)
+        # Greeting to location: the states before the tech stack
+        prompt = run_dispatch(cls, args.interviews, TURNS[:7])
+        print(f"{label:10} {turn * 1e6:10.2f} {dispatch * 1e6:14.2f} {prompt * 1e6:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
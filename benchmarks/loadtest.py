@@ -0,0 +1,370 @@
+# benchmarks/loadtest.py
+"""End-to-end load test with simulated candidates.
+
+Runs N concurrent candidates through complete interviews, greeting to
+conclusion, with the real chatbot and a local mock LLM server, and reports
+per-turn latency percentiles, throughput, memory per session and error
+rates. Candidates follow personas (tech stacks, answer lengths, think times),
+built in or loaded from JSON:
+
+    [{"name": "backend", "weight": 2, "positions": ["Software engineer"],
+      "tech_stacks": ["python, django, postgresql"], "answer_words": [30, 80],
+      "think_time": 20}]
+
+    python benchmarks/loadtest.py --concurrency 50 --candidates 200 \\
+        --latency 0.8 --jitter 0.5 --distribution lognormal --output results.json
+    python benchmarks/loadtest.py ... --compare results.json
+
+Think times are multiplied by --think-scale (0 by default, i.e. candidates
+answer immediately). Memory is measured with tracemalloc, which slows
+CPU-bound work; pass --no-trace-memory for latency-only runs.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the run self-contained: no persistent question cache or checkpoints
+os.environ.setdefault("QUESTION_CACHE_PATH", "")
+os.environ.pop("CHECKPOINT_STORE", None)
+os.environ.pop("TRACE_PATH", None)
+
+import metrics
+import llm_client
+from chatbot import TalentScoutChatbot
+from mock_llm_server import MockConfig, LATENCY_DISTRIBUTIONS, start_mock_server
+
+PERSONAS = [
+    {"name": "backend", "weight": 3, "positions": ["Software engineer", "Python developer"],
+     "tech_stacks": ["python, django, postgresql, docker", "python, flask, redis, aws", "go, postgresql, kubernetes"],
+     "answer_words": [30, 80], "think_time": 20.0},
+    {"name": "web", "weight": 3, "positions": ["Web developer", "UI engineer"],
+     "tech_stacks": ["javascript, react, typescript, css", "vue, javascript, node.js", "angular, typescript, java"],
+     "answer_words": [15, 40], "think_time": 12.0},
+    {"name": "data", "weight": 2, "positions": ["Data engineer", "Machine learning engineer"],
+     "tech_stacks": ["python, pandas, spark, sql, aws", "python, tensorflow, pytorch, scikit-learn"],
+     "answer_words": [50, 150], "think_time": 30.0},
+    {"name": "terse", "weight": 1, "positions": ["Developer"],
+     "tech_stacks": ["java", "c#, sql", "php, mysql"],
+     "answer_words": [3, 10], "think_time": 5.0},
+    # Wide stacks take the fan-out path of question generation
+    {"name": "polyglot", "weight": 1, "positions": ["Full stack developer"],
+     "tech_stacks": ["python, java, go, rust, react, vue, django, flask, docker, aws, mysql, redis"],
+     "answer_words": [20, 60], "think_time": 15.0}
+]
+
+# Answer vocabulary; words that read as exit requests ("end", "stop", ...) are left out
+WORDS = (
+    "i would first measure the problem with a profiler and then look at the data model because most "
+    "slow paths come from queries or allocations in a loop we used caching for hot reads and kept "
+    "writes simple the team added tests around each change so we could ship with confidence later "
+    "on we split the service and moved heavy work to a queue which made latency predictable under load"
+).split()
+
+MAX_TURNS = 60
+
+
+def load_personas(path):
+    with open(path, "r") as f:
+        personas = json.load(f)
+    for persona in personas:
+        for key in ("name", "positions", "tech_stacks", "answer_words"):
+            if key not in persona:
+                raise ValueError(f"Persona {persona.get('name', '?')!r} is missing {key!r}")
+        persona.setdefault("weight", 1)
+        persona.setdefault("think_time", 0.0)
+    return personas
+
+
+def candidate_profile(index, persona, rng):
+    """The answers to the information questions, in flow order."""
+    return [
+        f"Candidate {index}",
+        f"candidate{index}@example.com",
+        f"+1 555 {index % 10 ** 7:07d}",
+        f"{rng.randint(0, 20)} years",
+        rng.choice(persona["positions"]),
+        rng.choice(["Berlin", "Toronto", "Bangalore", "Austin", "Remote"]),
+        rng.choice(persona["tech_stacks"])
+    ]
+
+
+def answer(persona, rng):
+    low, high = persona["answer_words"]
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of values, q in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4) if values else None,
+        "p50": _round(percentile(values, 50)),
+        "p95": _round(percentile(values, 95)),
+        "p99": _round(percentile(values, 99)),
+        "max": _round(max(values) if values else None)
+    }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+class LoadResults:
+    """Turn and candidate outcomes collected from all workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = []
+        self.first_chunks = []
+        self.by_state = {}
+        self.errors = Counter()
+        self.completed = 0
+        self.failed = 0
+        self.question_sources = Counter()
+        self.personas = Counter()
+
+    def turn(self, state, seconds, first_chunk):
+        with self._lock:
+            self.turns.append(seconds)
+            self.first_chunks.append(first_chunk)
+            self.by_state.setdefault(state, []).append(seconds)
+
+    def candidate(self, persona, bot, error=None):
+        with self._lock:
+            self.personas[persona["name"]] += 1
+            if error is not None:
+                self.failed += 1
+                self.errors[type(error).__name__] += 1
+                return
+            self.completed += 1
+            self.question_sources[bot.candidate_info["question_source"] or "none"] += 1
+
+
+def run_turn(bot, text, results, hidden=False):
+    state = bot.current_state
+    start = time.perf_counter()
+    first_chunk = None
+    for _ in bot.generate_response(text, stream=True, hidden=hidden):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    seconds = time.perf_counter() - start
+    results.turn(state, seconds, first_chunk if first_chunk is not None else seconds)
+
+
+def run_candidate(index, persona, think_scale, results, seed):
+    """Take one candidate through a complete interview; returns the chatbot."""
+    rng = random.Random(seed * 1000003 + index)
+
+    def think():
+        if think_scale and persona["think_time"]:
+            time.sleep(rng.expovariate(1 / (persona["think_time"] * think_scale)))
+
+    bot = TalentScoutChatbot()
+    try:
+        # The app opens every session with a hidden greeting
+        run_turn(bot, "Hi", results, hidden=True)
+        for text in candidate_profile(index, persona, rng):
+            think()
+            run_turn(bot, text, results)
+        while bot.current_state != "conclude" and bot.turn_count < MAX_TURNS:
+            think()
+            run_turn(bot, answer(persona, rng), results)
+        if bot.current_state != "conclude":
+            raise RuntimeError(f"Interview did not conclude within {MAX_TURNS} turns")
+        think()
+        run_turn(bot, "No, that is all from my side.", results)
+    except Exception as e:
+        results.candidate(persona, bot, e)
+        bot.close()
+        return None
+    results.candidate(persona, bot)
+    return bot
+
+
+def run_load(personas, concurrency, candidates, think_scale, seed, trace_memory):
+    """Run the load; returns LoadResults, wall seconds and retained bytes per session."""
+    rng = random.Random(seed)
+    weights = [persona["weight"] for persona in personas]
+    assigned = [rng.choices(personas, weights)[0] for _ in range(candidates)]
+
+    # Warm module-level state (router, pools, caches) outside the measurement
+    run_candidate(-1, personas[0], 0, LoadResults(), seed)
+    metrics.REGISTRY.reset()
+
+    results = LoadResults()
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="candidate") as executor:
+        futures = [executor.submit(run_candidate, i, persona, think_scale, results, seed)
+                   for i, persona in enumerate(assigned)]
+        # Finished sessions stay referenced, like idle sessions in a server
+        sessions = [future.result() for future in futures]
+    wall = time.perf_counter() - start
+    bytes_per_session = None
+    if trace_memory:
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        live = sum(1 for bot in sessions if bot is not None)
+        bytes_per_session = round(retained / live) if live else None
+    for bot in sessions:
+        if bot is not None:
+            bot.close()
+    return results, wall, bytes_per_session
+
+
+def git_commit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_report(args, results, wall, bytes_per_session):
+    turns = len(results.turns)
+    candidates = results.completed + results.failed
+    llm = metrics.summary()
+    llm_calls = sum(row["calls"] for row in llm["calls"])
+    llm_errors = sum(row["errors"] for row in llm["calls"])
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "candidates": args.candidates,
+            "think_scale": args.think_scale,
+            "seed": args.seed,
+            "personas": args.personas or "builtin",
+            "llm": {"latency": args.latency, "jitter": args.jitter, "distribution": args.distribution,
+                    "token_delay": args.token_delay, "error_rate": args.error_rate}
+        },
+        "environment": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "summary": {
+            "wall_seconds": round(wall, 3),
+            "turns": turns,
+            "turns_per_second": round(turns / wall, 2) if wall else None,
+            "interviews_per_minute": round(results.completed / wall * 60, 2) if wall else None,
+            "completed": results.completed,
+            "failed": results.failed,
+            "candidate_error_rate": round(results.failed / candidates, 4) if candidates else None,
+            "llm_calls": llm_calls,
+            "llm_error_rate": round(llm_errors / llm_calls, 4) if llm_calls else None,
+            "bytes_per_session": bytes_per_session
+        },
+        "turn_latency": latency_summary(results.turns),
+        "first_chunk_latency": latency_summary(results.first_chunks),
+        "turn_latency_by_state": {state: latency_summary(values) for state, values in sorted(results.by_state.items())},
+        "errors": dict(sorted(results.errors.items())),
+        "question_sources": dict(sorted(results.question_sources.items())),
+        "personas": dict(sorted(results.personas.items())),
+        "fallbacks": llm["fallbacks"]
+    }
+
+
+def print_report(report):
+    summary = report["summary"]
+    print(f"{summary['completed']} interviews ({summary['failed']} failed), {summary['turns']} turns "
+          f"in {summary['wall_seconds']:.1f}s")
+    print(f"  throughput: {summary['turns_per_second']} turns/s, {summary['interviews_per_minute']} interviews/min")
+    print(f"  errors: candidates {summary['candidate_error_rate']}, LLM calls {summary['llm_error_rate']} "
+          f"{report['errors'] or ''}")
+    if summary["bytes_per_session"] is not None:
+        print(f"  memory: {summary['bytes_per_session']} bytes per session")
+    print(f"  {'':22}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = [("turn", report["turn_latency"]), ("first chunk", report["first_chunk_latency"])]
+    rows += sorted(report["turn_latency_by_state"].items())
+    for name, stats in rows:
+        print(f"  {name:22}{stats['count']:>7}" + "".join(
+            f"{stats[q]:>9.3f}" if stats[q] is not None else f"{'-':>9}" for q in ("p50", "p95", "p99")))
+    print(f"  question sources: {report['question_sources']}")
+
+
+def compare(report, baseline):
+    """Print the change of the headline numbers against an earlier run."""
+    rows = [
+        ("turn p50", report["turn_latency"]["p50"], baseline["turn_latency"]["p50"]),
+        ("turn p95", report["turn_latency"]["p95"], baseline["turn_latency"]["p95"]),
+        ("turn p99", report["turn_latency"]["p99"], baseline["turn_latency"]["p99"]),
+        ("turns/s", report["summary"]["turns_per_second"], baseline["summary"]["turns_per_second"]),
+        ("bytes/session", report["summary"]["bytes_per_session"], baseline["summary"]["bytes_per_session"]),
+        ("candidate errors", report["summary"]["candidate_error_rate"], baseline["summary"]["candidate_error_rate"])
+    ]
+    print(f"Against {baseline['environment'].get('commit') or 'baseline'}:")
+    for name, new, old in rows:
+        if new is None or old is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"  {name:18}{old:>12}  ->{new:>12}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--concurrency", type=int, default=20, help="candidates in an interview at once")
+    parser.add_argument("--candidates", type=int, default=100, help="interviews to run in total")
+    parser.add_argument("--personas", help="JSON file of personas instead of the built-in ones")
+    parser.add_argument("--think-scale", type=float, default=0.0, help="multiplier for persona think times")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="spread of the mock LLM latency")
+    parser.add_argument("--distribution", choices=sorted(LATENCY_DISTRIBUTIONS), default="uniform")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--trace-memory", action=argparse.BooleanOptionalAction, default=True,
+                        help="measure memory per session with tracemalloc")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    # Injected errors would otherwise log every retry
+    logging.basicConfig(level=logging.ERROR)
+
+    personas = load_personas(args.personas) if args.personas else PERSONAS
+    config = MockConfig(args.latency, args.jitter, args.token_delay, args.error_rate,
+                        distribution=args.distribution)
+    server = start_mock_server(config=config)
+    llm_client.set_backend(llm_client.HTTPBackend(server.base_url, pool_size=max(10, args.concurrency)))
+
+    results, wall, bytes_per_session = run_load(personas, args.concurrency, args.candidates, args.think_scale,
+                                                args.seed, args.trace_memory)
+    report = build_report(args, results, wall, bytes_per_session)
+    print_report(report)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(report, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# benchmarks/run.py
+"""Micro-benchmarks for the chatbot and utils hot paths, with a regression gate.
+
+Each benchmark is timed over many rounds and summarized by its median time
+per call. Results are compared with a stored baseline, and the run fails when
+a median is more than --threshold slower than its baseline.
+
+    python benchmarks/run.py                     # compare with benchmarks/baseline.json
+    python benchmarks/run.py --save-baseline     # record a new baseline
+    python benchmarks/run.py -k extract --threshold 0.1 --output results.json
+
+Baselines are only comparable on the machine they were recorded on, so none
+is committed (baseline.json is ignored by git): record one on the machine
+that runs the gate, e.g. from the base branch before testing a change.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every question generation goes to the stub LLM: no question bank or cache
+os.environ["QUESTION_BANK_PATH"] = ""
+os.environ["QUESTION_CACHE_PATH"] = ""
+os.environ["QUESTION_CACHE_SIZE"] = "0"
+os.environ.pop("CHECKPOINT_STORE", None)
+os.environ.pop("TRACE_PATH", None)
+
+import llm_client
+from llm_client import LLMBackend, Completion
+from mock_llm_server import mock_completion_text
+from chatbot import TalentScoutChatbot
+from utils import extract_technologies, validate_email, validate_phone, save_candidate_data
+from skill_taxonomy import get_skill_taxonomy
+from matching import MatchingIndex, Opening
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_ROUNDS = 30
+# Calls are batched until a round of a setup-free benchmark takes this long
+MIN_ROUND_SECONDS = 0.005
+
+BENCHMARKS = []
+
+
+class StubBackend(LLMBackend):
+    """Answers instantly with the mock server's canned completions."""
+
+    def complete(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+                 priority=None, task="other"):
+        return Completion(mock_completion_text(messages), model)
+
+    def stream(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+               priority=None, task="other", cancel=None):
+        text = mock_completion_text(messages)
+        for i in range(0, len(text), 16):
+            yield text[i:i + 16]
+        return None
+
+
+class Benchmark:
+    """A timed function; setup, if given, builds fresh arguments for every call."""
+
+    def __init__(self, name, fn, setup=None, rounds=DEFAULT_ROUNDS):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.rounds = rounds
+
+    def run(self):
+        """Return seconds per call for each round, with the garbage collector paused like timeit."""
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._run()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _run(self):
+        if self.setup is not None:
+            times = []
+            for _ in range(self.rounds):
+                args = self.setup()
+                gc.collect()
+                start = time.perf_counter()
+                self.fn(*args)
+                times.append(time.perf_counter() - start)
+            return times
+        number = self._calibrate()
+        times = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            for _ in range(number):
+                self.fn()
+            times.append((time.perf_counter() - start) / number)
+        return times
+
+    def _calibrate(self):
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                self.fn()
+            if time.perf_counter() - start >= MIN_ROUND_SECONDS or number >= 1 << 20:
+                return number
+            number *= 2
+
+
+def benchmark(name, setup=None, rounds=DEFAULT_ROUNDS):
+    """Register the decorated function as a benchmark."""
+    def register(fn):
+        BENCHMARKS.append(Benchmark(name, fn, setup, rounds))
+        return fn
+    return register
+
+
+# utils.extract_technologies
+
+TYPICAL_STACK = "Python, Django, PostgreSQL, Docker, AWS, React and some Kubernetes"
+
+for label, text in [
+    ("short", "python"),
+    ("typical", TYPICAL_STACK),
+    ("long", (TYPICAL_STACK + ", ") * 1000),
+    # One 100k-character word: nothing matches, but every keyword is searched for
+    ("no_separators", "x" * 100000),
+    # Keywords embedded in longer words pass the substring check and fail at the word boundary
+    ("near_misses", "javascripts pythonic reactive gooey nodes sqlish " * 2000),
+    ("symbol_runs", "c++c#c++c#.net/ci/cd" * 5000)
+]:
+    benchmark(f"extract_technologies[{label}]")(lambda text=text: extract_technologies(text))
+
+
+# SkillTaxonomy.normalize, exact aliases and the fuzzy fallback
+
+benchmark("normalize[typical]")(lambda: get_skill_taxonomy().normalize(TYPICAL_STACK))
+benchmark("normalize[aliases]")(lambda: get_skill_taxonomy().normalize("JS, k8s, Postgres, ReactJS, node.js, golang"))
+# Misspellings that are new to the fuzzy cache every call
+_misspelled = iter(range(1 << 62))
+benchmark("normalize[fuzzy]")(
+    lambda: get_skill_taxonomy().normalize(f"kubernets, postgress, tensorflw{next(_misspelled)}"))
+_batch = [f"Python, Djngo, AWS, tool{i}" for i in range(1000)]
+benchmark("normalize_batch[1000]", rounds=10)(lambda: get_skill_taxonomy().normalize_batch(_batch))
+# Every text brings an unknown token the fuzzy cache hasn't seen
+benchmark("normalize_batch[1000 new tokens]", rounds=10,
+          setup=lambda: ([f"Python, Djngo, AWS, tool{next(_misspelled)}" for _ in range(1000)],))(
+    lambda texts: get_skill_taxonomy().normalize_batch(texts))
+
+
+# utils.validate_email and validate_phone
+
+benchmark("validate_email[valid]")(lambda: validate_email("ann.smith+jobs@example.co.uk"))
+benchmark("validate_email[invalid]")(lambda: validate_email("ann.smith at example dot com"))
+benchmark("validate_email[long]")(lambda: validate_email("a" * 5000 + "@" + "b" * 5000))
+benchmark("validate_phone[valid]")(lambda: validate_phone("+1 (555) 123-4567"))
+benchmark("validate_phone[invalid]")(lambda: validate_phone("call me maybe"))
+benchmark("validate_phone[long]")(lambda: validate_phone("1-" * 5000))
+
+
+# TalentScoutChatbot.generate_response per state, with the stub LLM
+
+STATE_INPUTS = {
+    "greeting": "Hi",
+    "get_name": "Ann Smith",
+    "get_email": "ann@example.com",
+    "get_phone": "+1 555 123 4567",
+    "get_experience": "5 years",
+    "get_position": "Software engineer",
+    "get_location": "Berlin",
+    "get_tech_stack": "python, django, postgresql",
+    "generate_questions": "I would profile the slow path first and fix the queries it points to.",
+    "ask_questions": "I would add an index and cache the hot reads, then measure again.",
+    "conclude": "No, that is all from my side."
+}
+
+
+def chatbot_in_state(state):
+    """Return a fresh chatbot advanced to state and the input to send there."""
+    def setup():
+        bot = TalentScoutChatbot()
+        while bot.current_state != state:
+            bot.generate_response(STATE_INPUTS[bot.current_state])
+        return bot, STATE_INPUTS[state]
+    return setup
+
+
+for state in STATE_INPUTS:
+    benchmark(f"generate_response[{state}]", setup=chatbot_in_state(state), rounds=100)(
+        lambda bot, text: bot.generate_response(text))
+
+
+# _generate_conclusion rendering and candidate JSON persistence
+
+def concluded_chatbot():
+    bot = TalentScoutChatbot()
+    while bot.current_state != "conclude":
+        bot.generate_response(STATE_INPUTS[bot.current_state])
+    return bot
+
+
+_concluded = None
+
+
+def get_concluded_chatbot():
+    global _concluded
+    if _concluded is None:
+        _concluded = concluded_chatbot()
+    return _concluded
+
+
+benchmark("generate_conclusion")(lambda: get_concluded_chatbot()._generate_conclusion())
+benchmark("save_candidate_data")(lambda: save_candidate_data(get_concluded_chatbot().candidate_info))
+
+
+# MatchingIndex queries and incremental adds over 100k candidates
+
+MATCH_STACKS = [
+    "python, django, postgresql, docker", "javascript, react, next.js, node.js", "java, spring, kafka, kubernetes",
+    "go, kubernetes, terraform, aws", "python, pytorch, tensorflow, pandas", "c#, .net, azure, sql"
+]
+MATCH_LOCATIONS = ["Berlin, Germany", "Munich, Germany", "London, UK", "Paris, France", "Remote"]
+
+_match_index = None
+
+
+def get_match_index(size=100000):
+    global _match_index
+    if _match_index is None:
+        taxonomy = get_skill_taxonomy()
+        normalized = [taxonomy.normalize(stack) for stack in MATCH_STACKS]
+        _match_index = MatchingIndex(taxonomy)
+        _match_index.add_many([
+            {"tech_stack": MATCH_STACKS[i % 6], "tech_stack_normalized": normalized[i % 6],
+             "experience": f"{i % 16} years", "location": MATCH_LOCATIONS[i % 5]}
+            for i in range(size)
+        ])
+    return _match_index
+
+
+MATCH_OPENING = Opening("Backend engineer", ["python", "django", "postgresql", "aws"], min_experience=5,
+                        locations=["Germany"])
+benchmark("match_top_k[100k]")(lambda: get_match_index().top_k(MATCH_OPENING, k=10))
+benchmark("match_add")(lambda: get_match_index().add(
+    {"tech_stack_normalized": ["python", "django"], "experience": "3 years", "location": "Berlin"}, key="bench"))
+
+
+def summarize(times):
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "rounds": len(times)
+    }
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def run(selected, baseline, threshold):
+    """Run the benchmarks; returns their results and the names that regressed."""
+    results = {}
+    regressions = []
+    print(f"{'benchmark':40}{'median':>11}{'min':>11}{'baseline':>11}{'change':>9}")
+    for bench in selected:
+        stats = summarize(bench.run())
+        old = baseline.get(bench.name)
+        if old and stats["median"] > old["median"] * (1 + threshold):
+            # Confirm with a second run before reporting, to ride out noisy neighbours
+            stats = min(stats, summarize(bench.run()), key=lambda s: s["median"])
+        results[bench.name] = stats
+        change = ""
+        flag = ""
+        if old:
+            ratio = stats["median"] / old["median"] - 1
+            change = f"{ratio * 100:+.1f}%"
+            if ratio > threshold:
+                regressions.append(bench.name)
+                flag = "  REGRESSION"
+        print(f"{bench.name:40}{format_seconds(stats['median']):>11}{format_seconds(stats['min']):>11}"
+              f"{format_seconds(old['median']) if old else '-':>11}{change:>9}{flag}")
+    return results, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-k", dest="filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of a median, as a fraction")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    selected = [b for b in BENCHMARKS if not args.filter or args.filter in b.name]
+    baseline = {}
+    if not args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)["benchmarks"]
+        else:
+            print(f"No baseline at {args.baseline}; record one with --save-baseline to gate on regressions")
+
+    llm_client.set_backend(StubBackend())
+    # save_candidate_data writes under ./data; keep that out of the working tree
+    workdir = tempfile.mkdtemp(prefix="talentscout-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results, regressions = run(selected, baseline, args.threshold)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "benchmarks": results
+    }
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # Keep benchmarks that were filtered out of this run
+            with open(args.baseline, "r") as f:
+                report["benchmarks"] = dict(json.load(f)["benchmarks"], **results)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
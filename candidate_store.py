@@ -0,0 +1,255 @@
+# candidate_store.py
+"""Saved candidate records in one indexed SQLite database.
+
+Each record is stored whole as a JSON blob, next to indexed columns for the
+fields the admin view and the matching index look records up by: email,
+position, location, creation time and the candidate's normalized skills
+(one row per skill in candidate_tags). Records get an integer ID, so
+candidates saved in the same second never collide.
+
+The candidate_*.json files earlier versions wrote to data/ are imported once
+by migrate_json_directory, or from the command line:
+
+    python candidate_store.py migrate [--data-dir data] [--delete]
+"""
+import os
+import re
+import json
+import logging
+import argparse
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join("data", "candidates.db")
+DEFAULT_DATA_DIR = "data"
+DEFAULT_FIND_LIMIT = 100
+# candidate_{name}_{YYYYmmddHHMMSS}.json, as written before the store existed
+LEGACY_FILENAME = re.compile(r"^candidate_.*_(\d{14})\.json$")
+# Sorts after every character, so [prefix, prefix + PREFIX_END) holds the values starting with prefix
+PREFIX_END = "\U0010ffff"
+
+
+def _normalize(value):
+    """Lowercased, whitespace-collapsed form of a field used for lookups."""
+    return " ".join(str(value or "").lower().split())
+
+
+class CandidateStore:
+    """Repository of saved candidate records."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a power loss may lose the latest saves but cannot corrupt the database
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS candidates ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "name TEXT, "
+            "email TEXT, "
+            "position TEXT, "
+            "location TEXT, "
+            "created_at TEXT NOT NULL, "
+            "record BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS candidate_tags ("
+            "candidate_id INTEGER NOT NULL REFERENCES candidates (id) ON DELETE CASCADE, "
+            "tag TEXT NOT NULL, "
+            "PRIMARY KEY (tag, candidate_id))"
+        )
+        # Legacy JSON files already imported, so a migration can be re-run safely
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS migrated_files ("
+            "path TEXT PRIMARY KEY, "
+            "candidate_id INTEGER NOT NULL)"
+        )
+        for column in ("email", "position", "location", "created_at"):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS candidates_{column} ON candidates ({column})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS candidate_tags_candidate ON candidate_tags (candidate_id)")
+        self._db.commit()
+
+    def save(self, record, created_at=None):
+        """Store a candidate record and return its ID."""
+        with self._lock:
+            candidate_id = self._insert(record, created_at)
+            self._db.commit()
+        return candidate_id
+
+    def get(self, candidate_id):
+        """Return the full record with candidate_id, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT record FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, candidate_id):
+        with self._lock:
+            self._db.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+            self._db.commit()
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def find(self, email=None, position=None, location=None, tags=(), since=None, until=None,
+             limit=DEFAULT_FIND_LIMIT):
+        """Summaries of matching candidates, newest first.
+
+        email matches exactly after lowercasing; position and location match
+        by prefix, so "Berlin" finds "Berlin, Germany". A candidate must have
+        all of tags. since and until bound created_at
+        (ISO 8601 strings or datetimes). Each summary is a dict of id, name,
+        email, position, location and created_at; use get() for the record.
+        """
+        query = "SELECT id, name, email, position, location, created_at FROM candidates"
+        conditions = []
+        params = []
+        if email:
+            conditions.append("email = ?")
+            params.append(_normalize(email))
+        for column, value in (("position", position), ("location", location)):
+            if value:
+                # A range rather than LIKE, so the column's index is used
+                prefix = _normalize(value)
+                conditions.append(f"{column} >= ? AND {column} < ?")
+                params.extend((prefix, prefix + PREFIX_END))
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+        for tag in tags:
+            conditions.append("id IN (SELECT candidate_id FROM candidate_tags WHERE tag = ?)")
+            params.append(tag)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        columns = ("id", "name", "email", "position", "location", "created_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def iter_records(self, after_id=0, batch_size=1000):
+        """Yield (id, record) for every candidate with an ID above after_id, in ID order."""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, record FROM candidates WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch_size)
+                ).fetchall()
+            for candidate_id, record in rows:
+                yield candidate_id, json.loads(record)
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][0]
+
+    def migrate_json_directory(self, path=DEFAULT_DATA_DIR, delete=False, normalize=None):
+        """Import the candidate_*.json files in path that were not imported yet.
+
+        normalize, if given, maps a list of tech stacks to skill ID lists and
+        fills in tech_stack_normalized for records saved before it existed.
+        Imported files are removed when delete is set. Returns the number of
+        records imported.
+        """
+        if not os.path.isdir(path):
+            return 0
+        with self._lock:
+            # Files are recorded by real path, so ./data and data are the same directory;
+            # paths recorded as given before that resolve against the working directory
+            done = {os.path.realpath(row[0]) for row in self._db.execute("SELECT path FROM migrated_files")}
+        pending = []
+        for filename in sorted(os.listdir(path)):
+            file_path = os.path.join(path, filename)
+            if not LEGACY_FILENAME.match(filename) or os.path.realpath(file_path) in done:
+                continue
+            try:
+                with open(file_path, "r") as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping candidate file %s: %s", file_path, e)
+                continue
+            if not isinstance(record, dict):
+                logger.warning("Skipping candidate file %s: expected a JSON object, got %s",
+                               file_path, type(record).__name__)
+                continue
+            pending.append((file_path, record))
+
+        if normalize is not None:
+            missing = [record for _, record in pending if record.get("tech_stack_normalized") is None]
+            for record, skill_ids in zip(missing, normalize([record.get("tech_stack") or "" for record in missing])):
+                record["tech_stack_normalized"] = skill_ids
+
+        with self._lock:
+            for file_path, record in pending:
+                timestamp = LEGACY_FILENAME.match(os.path.basename(file_path)).group(1)
+                created_at = datetime.strptime(timestamp, "%Y%m%d%H%M%S")
+                candidate_id = self._insert(record, created_at)
+                self._db.execute("INSERT INTO migrated_files (path, candidate_id) VALUES (?, ?)",
+                                 (os.path.realpath(file_path), candidate_id))
+            # One transaction: an interrupted migration imports nothing and can be re-run
+            self._db.commit()
+        if delete:
+            for file_path, _ in pending:
+                os.remove(file_path)
+        return len(pending)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _insert(self, record, created_at):
+        created_at = (created_at or datetime.now()).isoformat(timespec="seconds")
+        cursor = self._db.execute(
+            "INSERT INTO candidates (name, email, position, location, created_at, record) VALUES (?, ?, ?, ?, ?, ?)",
+            (record.get("name"), _normalize(record.get("email")), _normalize(record.get("position")),
+             _normalize(record.get("location")), created_at, json.dumps(record).encode("utf-8"))
+        )
+        candidate_id = cursor.lastrowid
+        tags = dict.fromkeys(record.get("tech_stack_normalized") or ())
+        self._db.executemany("INSERT INTO candidate_tags (candidate_id, tag) VALUES (?, ?)",
+                             [(candidate_id, tag) for tag in tags])
+        return candidate_id
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_candidate_store():
+    """Return the process-wide store at CANDIDATE_STORE_PATH."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandidateStore(os.getenv("CANDIDATE_STORE_PATH", DEFAULT_STORE_PATH))
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the candidate store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="import candidate_*.json files into the store")
+    migrate.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    migrate.add_argument("--delete", action="store_true", help="remove the files once imported")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        # skill_taxonomy imports utils, which imports this module
+        from skill_taxonomy import get_skill_taxonomy
+        store = get_candidate_store()
+        imported = store.migrate_json_directory(args.data_dir, delete=args.delete,
+                                                normalize=get_skill_taxonomy().normalize_batch)
+        print(f"Imported {imported} candidate file(s) into {store.path}; {store.count()} candidates stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,185 @@
 # chatbot.py
-import os
-import openai
+import uuid
+import json
+import logging
+import sqlite3
 from dotenv import load_dotenv
-import random
 from prompts import (
     SYSTEM_PROMPT, 
-    INITIAL_GREETING, 
-    INFORMATION_COLLECTION_PROMPTS,
     TECH_QUESTION_GENERATION_PROMPT,
-    CONVERSATION_END_PROMPT,
-    FALLBACK_RESPONSES
+    CONVERSATION_END_PROMPT
 )
+from question_cache import get_question_cache, make_cache_key
+from question_bank import QUESTION_PLAN, get_question_bank, local_questions
+from skill_taxonomy import get_skill_taxonomy
+from question_parser import IncrementalQuestionParser, parse_questions
+from llm_client import LLMError, get_backend
+from routing import get_router
+from singleflight import get_single_flight
+from batcher import get_question_batcher
+from fanout import get_fanout_generator
+from hedging import get_slo_controller
+from speculation import get_follow_up_speculator
+from history import make_conversation_history
+from metrics import CACHE_LOOKUPS, LLM_FALLBACKS
+from flows import get_flow
+from session import CandidateInfo, Transcript
+from checkpoint import get_checkpointer, CheckpointError
+import tracing
 
 # Load environment variables
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+logger = logging.getLogger(__name__)
 
 class TalentScoutChatbot:
-    def __init__(self):
-        self.conversation_history = []
-        self.candidate_info = {
-            "name": None,
-            "email": None,
-            "phone": None,
-            "experience": None,
-            "position": None,
-            "location": None,
-            "tech_stack": None,
-            "technical_questions": [],
-            "question_index": 0
-        }
-        self.current_state = "greeting"
-        self.states = [
-            "greeting", "get_name", "get_email", "get_phone", 
-            "get_experience", "get_position", "get_location", 
-            "get_tech_stack", "generate_questions", "ask_questions", 
-            "conclude"
-        ]
-        
-        # Initialize with system prompt
-        self.add_to_history({"role": "system", "content": SYSTEM_PROMPT})
+    # Flow actions and the methods that implement them
+    ACTION_METHODS = {
+        "generate_questions": "_generate_technical_questions",
+        "ask_question": "_ask_next_question",
+        "answer_question": "_answer_question",
+        "exit_message": "_conclude_exit"
+    }
     
-    def add_to_history(self, message):
+    # One instance lives per session, so keep it compact
+    __slots__ = ("conversation_history", "candidate_info", "_speculation", "follow_ups_asked",
+                 "session_id", "turn_count", "flow", "state_id", "_dispatch", "_checkpoint")
+    
+    def __init__(self, flow=None):
+        # Holds the session's only transcript; pins the system prompt and
+        # folds old turns into a summary
+        self.conversation_history = make_conversation_history(SYSTEM_PROMPT)
+        self.candidate_info = CandidateInfo()
+        # Follow-up question being prepared while the candidate answers
+        self._speculation = None
+        self.follow_ups_asked = 0
+        # Identify the session and its turns in traces
+        self.session_id = uuid.uuid4().hex
+        self.turn_count = 0
+        # Compiled interview flow; states are integer IDs into its table
+        self.flow = flow or get_flow()
+        self.state_id = self.flow.initial
+        # The flow's handlers and transitions, resolved once per chatbot class
+        self._dispatch = self.flow.dispatch_table(type(self), self.ACTION_METHODS)
+        # What the checkpoint store already holds: field values and turn count
+        self._checkpoint = {"fields": {}, "turns": 0}
+    
+    def add_to_history(self, message, hidden=False):
         """Add a message to the conversation history."""
-        self.conversation_history.append(message)
+        self.conversation_history.append(message, hidden)
     
-    def generate_response(self, user_input):
-        """Generate a response based on the current state and user input."""
-        # Check for exit keywords
-        if self._is_exit_request(user_input):
-            return self._generate_exit_message()
+    def get_messages(self):
+        """Get the visible conversation for display, derived from the transcript."""
+        return self.conversation_history.transcript.display()
+    
+    def get_llm_messages(self):
+        """Get the history as messages for an LLM call, within its token budget."""
+        return self.conversation_history.messages(self.candidate_info)
+    
+    def generate_response(self, user_input, stream=False, hidden=False):
+        """Generate a response based on the current state and user input.
         
+        With stream=True an iterator of text chunks is returned instead of a
+        string. The conversation only advances once the iterator is exhausted.
+        hidden=True keeps user_input out of get_messages(), e.g. for the
+        automatic opening message.
+        """
+        chunks = self._generate_response_chunks(user_input, hidden)
+        if stream:
+            return chunks
+        return "".join(chunks)
+    
+    def _generate_response_chunks(self, user_input, hidden=False):
+        """Yield the response for user_input chunk by chunk, traced as one turn."""
+        self.turn_count += 1
+        with tracing.span("generate_response", session_id=self.session_id, turn_id=self.turn_count,
+                          state=self.current_state) as turn:
+            yield from self._respond(user_input, hidden)
+            turn.set(next_state=self.current_state)
+        self.checkpoint()
+    
+    def checkpoint(self):
+        """Write what changed this turn to the checkpoint store, if one is configured."""
+        checkpointer = get_checkpointer()
+        if checkpointer is None:
+            return
+        with tracing.span("checkpoint", session_id=self.session_id, turn_id=self.turn_count):
+            try:
+                checkpointer.save(self)
+            except (CheckpointError, sqlite3.Error) as e:
+                # The delta stays pending and goes out with the next checkpoint
+                logger.warning("Error checkpointing session %s: %s", self.session_id, e)
+    
+    def checkpoint_fields(self):
+        """Return the session's state outside the transcript as JSON strings by field."""
+        summary, start, fold_start = self.conversation_history.fold_state()
+        fields = {
+            "state": json.dumps(self.current_state),
+            "turn_count": json.dumps(self.turn_count),
+            "follow_ups_asked": json.dumps(self.follow_ups_asked),
+            "history.summary": json.dumps(summary),
+            "history.window": json.dumps([start, fold_start])
+        }
+        for key, value in self.candidate_info.items():
+            fields["info." + key] = json.dumps(value)
+        return fields
+    
+    def restore_checkpoint(self, session_id, fields, turns):
+        """Take over the session state written by checkpoint_fields() and its turns."""
+        values = {name: json.loads(value) for name, value in fields.items()}
+        self.session_id = session_id
+        self.current_state = values["state"]
+        self.turn_count = values["turn_count"]
+        self.follow_ups_asked = values["follow_ups_asked"]
+        for name, value in values.items():
+            if name.startswith("info."):
+                self.candidate_info[name[len("info."):]] = value
+        # A follow-up being speculated on when the checkpoint was taken is lost;
+        # the next answer just goes without one
+        self.conversation_history = make_conversation_history(SYSTEM_PROMPT, Transcript.from_turns(turns))
+        self.conversation_history.restore_fold_state(values["history.summary"], *values["history.window"])
+    
+    def _respond(self, user_input, hidden=False):
         # Process user input based on current state
-        self.add_to_history({"role": "user", "content": user_input})
+        self.add_to_history({"role": "user", "content": user_input}, hidden)
+        
+        # Check for exit keywords
+        with tracing.span("is_exit_request"):
+            exiting = self._is_exit_request(user_input)
+        if exiting:
+            self.close()
+            response = self._generate_exit_message()
+            yield response
+            self.add_to_history({"role": "assistant", "content": response})
+            return
+        
+        # Ask again when the input is not valid for the current state
+        error = self._validate_input(user_input)
+        if error:
+            yield error
+            self.add_to_history({"role": "assistant", "content": error})
+            return
         
         # Update candidate info based on current state
-        self._update_candidate_info(user_input)
+        with tracing.span("update_candidate_info"):
+            self._update_candidate_info(user_input)
         
         # Determine next state and generate appropriate response
-        response = self._get_next_response()
+        with tracing.span("get_next_response") as next_response:
+            response = self._get_next_response()
+            
+            # Streaming states hand back an iterator rather than a string
+            if not isinstance(response, str):
+                parts = []
+                for chunk in response:
+                    parts.append(chunk)
+                    yield chunk
+                response = "".join(parts)
+                next_response.set(streamed=True)
+            else:
+                yield response
         
         self.add_to_history({"role": "assistant", "content": response})
-        return response
     
     def _is_exit_request(self, text):
         """Check if the user wants to exit the conversation."""
@@ -74,120 +192,266 @@ class TalentScoutChatbot:
         email = self.candidate_info["email"] or "your provided contact information"
         return CONVERSATION_END_PROMPT.format(name=name, email=email)
     
+    @property
+    def current_state(self):
+        """Name of the current state."""
+        return self.flow.states[self.state_id].name
+    
+    @current_state.setter
+    def current_state(self, name):
+        self.state_id = self.flow.state_id(name)
+    
+    @property
+    def states(self):
+        """Names of the flow's states, in table order."""
+        return [state.name for state in self.flow.states]
+    
+    def _validate_input(self, user_input):
+        """Return a message asking again if the input fails the state's validator."""
+        return self.flow.states[self.state_id].validate(user_input)
+    
     def _update_candidate_info(self, user_input):
-        """Update candidate information based on current state and user input."""
-        if self.current_state == "get_name":
-            self.candidate_info["name"] = user_input
-        elif self.current_state == "get_email":
-            self.candidate_info["email"] = user_input
-        elif self.current_state == "get_phone":
-            self.candidate_info["phone"] = user_input
-        elif self.current_state == "get_experience":
-            self.candidate_info["experience"] = user_input
-        elif self.current_state == "get_position":
-            self.candidate_info["position"] = user_input
-        elif self.current_state == "get_location":
-            self.candidate_info["location"] = user_input
-        elif self.current_state == "get_tech_stack":
-            self.candidate_info["tech_stack"] = user_input
-    
-    def _get_next_state(self):
-        """Determine the next state in the conversation flow."""
-        current_index = self.states.index(self.current_state)
-        next_index = min(current_index + 1, len(self.states) - 1)
-        return self.states[next_index]
+        """Store the input in the field the current state captures."""
+        field = self.flow.states[self.state_id].capture
+        if field:
+            self.candidate_info[field] = user_input
+            if field == "tech_stack":
+                self.candidate_info["tech_stack_normalized"] = get_skill_taxonomy().normalize(user_input)
+    
+    def _technologies(self):
+        """Categorized technologies of the tech stack, including those only the taxonomy recognises."""
+        return get_skill_taxonomy().technologies(
+            self.candidate_info["tech_stack"] or "", self.candidate_info["tech_stack_normalized"]
+        )
     
     def _get_next_response(self):
-        """Generate the next response based on the current state."""
-        # Move to the next state
-        next_state = self._get_next_state()
-        
-        if self.current_state == "greeting":
-            self.current_state = "get_name"
-            return INITIAL_GREETING
-        
-        elif self.current_state == "get_name":
-            self.current_state = "get_email"
-            return INFORMATION_COLLECTION_PROMPTS["email"].format(name=self.candidate_info["name"])
-        
-        elif self.current_state == "get_email":
-            self.current_state = "get_phone"
-            return INFORMATION_COLLECTION_PROMPTS["phone"]
-        
-        elif self.current_state == "get_phone":
-            self.current_state = "get_experience"
-            return INFORMATION_COLLECTION_PROMPTS["experience"]
-        
-        elif self.current_state == "get_experience":
-            self.current_state = "get_position"
-            return INFORMATION_COLLECTION_PROMPTS["position"]
-        
-        elif self.current_state == "get_position":
-            self.current_state = "get_location"
-            return INFORMATION_COLLECTION_PROMPTS["location"]
-        
-        elif self.current_state == "get_location":
-            self.current_state = "get_tech_stack"
-            return INFORMATION_COLLECTION_PROMPTS["tech_stack"]
-        
-        elif self.current_state == "get_tech_stack":
-            self.current_state = "generate_questions"
-            # Generate technical questions
-            return self._generate_technical_questions()
-        
-        elif self.current_state == "generate_questions":
-            self.current_state = "ask_questions"
-            # Start asking the first question
-            return self._ask_next_question()
-        
-        elif self.current_state == "ask_questions":
-            self.candidate_info["question_index"] += 1
-            # Check if we've asked all questions
-            if self.candidate_info["question_index"] >= len(self.candidate_info["technical_questions"]):
-                self.current_state = "conclude"
-                return self._generate_conclusion()
-            else:
-                return self._ask_next_question()
+        """Reply for the current state and move to the next one."""
+        handler, next_id, condition, else_id = self._dispatch[self.state_id]
+        response = handler(self)
+        if condition is not None and not condition(self.candidate_info):
+            next_id = else_id
+        self.state_id = next_id
+        return response
+    
+    def _answer_question(self):
+        """Record an answer and ask the next question, or conclude after the last."""
+        self._insert_follow_up(self.conversation_history[-1]["content"])
+        self.candidate_info["question_index"] += 1
+        if self.candidate_info["question_index"] >= len(self.candidate_info["technical_questions"]):
+            return self._generate_conclusion()
+        return self._ask_next_question()
+    
+    def _conclude_exit(self):
+        self.close()
+        return self._generate_exit_message()
+    
+    def _generate_technical_questions(self):
+        """Generate technical questions based on the candidate's tech stack.
         
-        elif self.current_state == "conclude":
-            return self._generate_exit_message()
+        Yields the response as it arrives: the first question is shown as soon
+        as its text is streamed, the remaining ones are collected silently.
+        Stacks covered by the precomputed question bank are served from it;
+        otherwise question lists are cached per technology set and position.
+        """
+        bank = get_question_bank()
+        if bank is not None:
+            questions = bank.assemble(
+                self._technologies(),
+                self.candidate_info["position"]
+            )
+            if questions:
+                self.candidate_info["technical_questions"] = questions
+                self.candidate_info["question_source"] = "bank"
+                CACHE_LOOKUPS.inc(cache="bank", result="hit")
+                yield from self._stream_first_question(questions[0], 0)
+                return
+            CACHE_LOOKUPS.inc(cache="bank", result="miss")
+        
+        cache = get_question_cache()
+        cache_key = make_cache_key(self.candidate_info["tech_stack"], self.candidate_info["position"],
+                                   self.candidate_info["tech_stack_normalized"])
+        cached = cache.get(cache_key)
+        CACHE_LOOKUPS.inc(cache="memory", result="hit" if cached else "miss")
+        if cached:
+            self.candidate_info["technical_questions"] = cached
+            self.candidate_info["question_source"] = "cache"
+            yield from self._stream_first_question(cached[0], 0)
+            return
         
+        # Identical requests already in flight share one upstream call
+        flights = get_single_flight()
+        flight, leader = flights.begin(cache_key)
+        if not leader:
+            questions = flight.wait(timeout=get_backend().timeout)
+            CACHE_LOOKUPS.inc(cache="singleflight", result="hit" if questions else "miss")
+            if questions:
+                self.candidate_info["technical_questions"] = list(questions)
+                self.candidate_info["question_source"] = "coalesced"
+                yield from self._stream_first_question(questions[0], 0)
+                return
+            # The leader failed, try on our own
+            questions, completed_stream = yield from self._generate_llm_questions()
         else:
-            # Fallback
-            return random.choice(FALLBACK_RESPONSES)
+            questions, completed_stream = [], False
+            try:
+                questions, completed_stream = yield from self._generate_llm_questions()
+            finally:
+                flights.finish(cache_key, flight, questions if completed_stream else None)
+        
+        if not questions:
+            # Nothing usable from the LLM, fall back to locally sourced questions
+            questions = local_questions(
+                self._technologies(),
+                self.candidate_info["position"]
+            )
+            self.candidate_info["question_source"] = "local"
+            LLM_FALLBACKS.inc(task="question_generation", fallback="local")
+            yield from self._stream_first_question(questions[0], 0)
+        
+        self.candidate_info["technical_questions"] = questions
+        # Partial lists from an interrupted stream are not worth reusing
+        if completed_stream:
+            cache.put(cache_key, questions)
     
-    def _generate_technical_questions(self):
-        """Generate technical questions based on the candidate's tech stack."""
+    def _generate_llm_questions(self):
+        """Generate questions with the LLM.
+        
+        Large stacks are fanned out per technology group. Other stacks run
+        under the latency SLO (hedged calls) or through the micro-batcher when
+        either is enabled, and otherwise as a single streaming call.
+        Returns the questions and whether generation completed.
+        """
+        fanout = get_fanout_generator()
+        technologies = self._technologies()
+        if fanout.applies_to(technologies):
+            questions = fanout.generate(technologies, self.candidate_info["position"])
+            if questions:
+                self.candidate_info["question_source"] = "fanout"
+                yield from self._stream_first_question(questions[0], 0)
+                return questions, True
+            LLM_FALLBACKS.inc(task="question_group", fallback="single_call")
+        
+        slo = get_slo_controller()
+        if slo is not None:
+            questions, path = slo.run(lambda cancel: self._collect_llm_questions(cancel, slo.hard_deadline))
+            if path == "hedge":
+                LLM_FALLBACKS.inc(task="question_generation", fallback="hedge")
+            if questions:
+                self.candidate_info["question_source"] = path
+                yield from self._stream_first_question(questions[0], 0)
+                return questions, True
+            # Past the hard deadline, don't spend more time on the LLM
+            return [], False
+        
+        batcher = get_question_batcher()
+        if batcher is not None:
+            questions = batcher.submit(self.candidate_info["tech_stack"], self.candidate_info["position"])
+            if questions:
+                self.candidate_info["question_source"] = "batch"
+                yield from self._stream_first_question(questions[0], 0)
+                return questions, True
+            LLM_FALLBACKS.inc(task="question_batch", fallback="stream")
+        
+        self.candidate_info["question_source"] = "stream"
+        return (yield from self._stream_llm_questions())
+    
+    def _question_messages(self):
+        """Build the messages for a question generation call."""
         prompt = TECH_QUESTION_GENERATION_PROMPT.format(
             tech_stack=self.candidate_info["tech_stack"],
             position=self.candidate_info["position"]
         )
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _collect_llm_questions(self, cancel, latency_budget=None):
+        """Collect a full question list from the LLM, stopping early once cancel is set."""
+        response = get_router().stream(
+            "question_generation",
+            self._question_messages(),
+            latency_budget=latency_budget,
+            cancel=cancel
+        )
+        text = ""
+        try:
+            for chunk in response:
+                if cancel.is_set():
+                    return None
+                text += chunk
+        finally:
+            # Closing the stream drops the connection of a cancelled call
+            response.close()
+        return parse_questions(text)
+    
+    def _stream_llm_questions(self):
+        """Stream question generation from the LLM.
+        
+        Yields the first question as it arrives and returns the list of all
+        questions together with whether the stream completed.
+        """
+        parser = IncrementalQuestionParser()
+        # Characters of the first question already yielded to the caller
+        streamed = 0
+        completed_stream = False
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",  # Or another appropriate model
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            questions = response.choices[0].message.content.strip().split('\n')
-            # Filter out empty lines and numbering
-            questions = [q.strip() for q in questions if q.strip()]
-            # Remove numbering if present (e.g., "1. ", "- ", etc.)
-            questions = [q.split('. ', 1)[-1] if '. ' in q[:4] else q for q in questions]
-            questions = [q[2:] if q.startswith('- ') else q for q in questions]
+            response = get_router().stream("question_generation", self._question_messages())
             
-            self.candidate_info["technical_questions"] = questions
+            for text in response:
+                first = not parser.questions
+                completed = parser.feed(text)
+                if first and completed:
+                    yield from self._stream_first_question(completed[0], streamed)
+                
+                # Stream the first question while its JSON string is still being written
+                if not parser.questions:
+                    partial = parser.partial()
+                    if partial:
+                        yield from self._stream_first_question(partial, streamed)
+                        streamed = len(partial)
             
-            return f"Thank you for sharing your tech stack. I'd like to ask you a few technical questions to better understand your expertise.\n\nFirst question: {questions[0]}"
+            completed_stream = True
         
-        except Exception as e:
-            print(f"Error generating questions: {e}")
-            return "I'd like to ask you some technical questions about your skills. Let's start with: What are some challenging projects you've worked on using your primary technical skills?"
+        except LLMError as e:
+            logger.warning("Error generating questions: %s", e)
+        
+        if completed_stream:
+            # A complete answer may still be truncated JSON, repair its last item
+            first = not parser.questions
+            for question in parser.close():
+                if first:
+                    yield from self._stream_first_question(question, streamed)
+                    first = False
+        if parser.dropped:
+            logger.info("Dropped %d malformed generated questions", parser.dropped)
+        if completed_stream or (not parser.questions and not streamed):
+            # Nothing was shown for an empty list, the caller falls back on its own
+            return parser.questions, completed_stream
+        
+        # The stream died: keep the items that were closed and top up with local questions
+        questions = list(parser.questions)
+        for question in local_questions(self._technologies(), self.candidate_info["position"]):
+            if len(questions) >= len(QUESTION_PLAN):
+                break
+            if question not in questions:
+                questions.append(question)
+        if not parser.questions:
+            # Part of a question was shown, replace it rather than leave it cut off
+            self.candidate_info["question_source"] = "local"
+            LLM_FALLBACKS.inc(task="question_generation", fallback="local")
+            yield "\n\nSorry, let me ask that differently: " + questions[0]
+        else:
+            LLM_FALLBACKS.inc(task="question_generation", fallback="local_top_up")
+        return questions, completed_stream
+    
+    def _stream_first_question(self, text, streamed):
+        """Yield the not yet streamed part of the first question."""
+        if streamed == 0:
+            yield "Thank you for sharing your tech stack. I'd like to ask you a few technical questions to better understand your expertise.\n\nFirst question: "
+        if len(text) > streamed:
+            yield text[streamed:]
     
     def _ask_next_question(self):
         """Ask the next technical question."""
@@ -195,11 +459,41 @@ class TalentScoutChatbot:
         questions = self.candidate_info["technical_questions"]
         
         if index < len(questions):
+            self._speculate_follow_up(questions[index])
             return f"Question {index + 1}: {questions[index]}"
         else:
-            self.current_state = "conclude"
+            # The flow's transition moves on to the conclusion
             return self._generate_conclusion()
     
+    def _speculate_follow_up(self, question):
+        """Start preparing a follow-up to question while the candidate answers."""
+        speculator = get_follow_up_speculator()
+        if speculator is None or self.follow_ups_asked >= speculator.max_follow_ups:
+            return
+        # Follow-ups are not followed up themselves
+        if question in self.candidate_info["follow_up_questions"]:
+            return
+        self._speculation = speculator.speculate(question, self.get_llm_messages())
+    
+    def _insert_follow_up(self, answer):
+        """Queue the prepared follow-up as the next question, if it is ready."""
+        speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return
+        follow_up = get_follow_up_speculator().take(speculation, answer)
+        if follow_up:
+            index = self.candidate_info["question_index"]
+            self.candidate_info["technical_questions"].insert(index + 1, follow_up)
+            self.candidate_info["follow_up_questions"].append(follow_up)
+            self.follow_ups_asked += 1
+    
+    def close(self):
+        """Cancel any background work for this conversation."""
+        speculator = get_follow_up_speculator()
+        if speculator is not None:
+            speculator.cancel(self._speculation)
+        self._speculation = None
+    
     def _generate_conclusion(self):
         """Generate a conclusion for the conversation."""
         name = self.candidate_info["name"] or "there"
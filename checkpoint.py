@@ -0,0 +1,343 @@
+# checkpoint.py
+"""Session checkpoints in an external store.
+
+After every turn the chatbot writes what changed since its last checkpoint:
+scalar fields whose value changed and the transcript turns appended since.
+A process that doesn't have a session in memory (after a restart, or another
+worker behind a load balancer) rebuilds it from the store on first use.
+
+CHECKPOINT_STORE selects the store:
+    sqlite:///data/sessions.db    local SQLite file (WAL mode)
+    redis://127.0.0.1:6379/0      any server speaking the Redis protocol
+Without it, nothing is checkpointed.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import threading
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_TTL = 7 * 24 * 3600
+# Field holding the number of turns taken, used as the session's version
+VERSION_FIELD = "turn_count"
+
+
+class CheckpointError(Exception):
+    """Raised when the checkpoint store cannot be used."""
+
+
+class CheckpointStore:
+    """Interface implemented by every checkpoint store.
+
+    Fields are JSON strings keyed by name; turns are (index, role code,
+    content) tuples appended in order.
+    """
+
+    def save(self, session_id, fields, turns):
+        raise NotImplementedError
+
+    def load(self, session_id):
+        """Return (fields, turns) for session_id, or None if it is unknown."""
+        raise NotImplementedError
+
+    def version(self, session_id):
+        """Return the stored turn count of session_id, or None."""
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Checkpoints in a local SQLite database."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_fields ("
+            "session_id TEXT NOT NULL, "
+            "field TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, field))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_turns ("
+            "session_id TEXT NOT NULL, "
+            "idx INTEGER NOT NULL, "
+            "role INTEGER NOT NULL, "
+            "content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, idx))"
+        )
+        self._db.commit()
+
+    def save(self, session_id, fields, turns):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO session_fields (session_id, field, value) VALUES (?, ?, ?)",
+                [(session_id, name, value) for name, value in fields.items()]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO session_turns (session_id, idx, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, idx, role, content) for idx, role, content in turns]
+            )
+            self._db.commit()
+
+    def load(self, session_id):
+        with self._lock:
+            fields = dict(self._db.execute(
+                "SELECT field, value FROM session_fields WHERE session_id = ?", (session_id,)
+            ).fetchall())
+            if not fields:
+                return None
+            turns = self._db.execute(
+                "SELECT idx, role, content FROM session_turns WHERE session_id = ? ORDER BY idx", (session_id,)
+            ).fetchall()
+        return fields, turns
+
+    def version(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM session_fields WHERE session_id = ? AND field = ?", (session_id, VERSION_FIELD)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+class RedisCheckpointStore(CheckpointStore):
+    """Checkpoints on a server speaking the Redis protocol (RESP).
+
+    Each session is a hash of fields and a list of turns, both expiring
+    after ttl seconds without a checkpoint. Every save is one pipelined
+    round trip.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, ttl=DEFAULT_CHECKPOINT_TTL,
+                 timeout=5.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def save(self, session_id, fields, turns):
+        commands = []
+        if fields:
+            args = [item for pair in fields.items() for item in pair]
+            commands.append(["HSET", _fields_key(session_id)] + args)
+        if turns:
+            encoded = [json.dumps([idx, role, content]) for idx, role, content in turns]
+            commands.append(["RPUSH", _turns_key(session_id)] + encoded)
+        if self.ttl:
+            commands.append(["EXPIRE", _fields_key(session_id), self.ttl])
+            commands.append(["EXPIRE", _turns_key(session_id), self.ttl])
+        self._pipeline(commands)
+
+    def load(self, session_id):
+        values, encoded = self._pipeline([
+            ["HGETALL", _fields_key(session_id)],
+            ["LRANGE", _turns_key(session_id), 0, -1]
+        ])
+        if not values:
+            return None
+        fields = {values[i].decode("utf-8"): values[i + 1].decode("utf-8") for i in range(0, len(values), 2)}
+        # A save retried after its reply was lost can push turns twice
+        turns = {}
+        for item in encoded:
+            idx, role, content = json.loads(item)
+            turns[idx] = (idx, role, content)
+        return fields, [turns[idx] for idx in sorted(turns)]
+
+    def version(self, session_id):
+        value, = self._pipeline([["HGET", _fields_key(session_id), VERSION_FIELD]])
+        return json.loads(value) if value is not None else None
+
+    def delete(self, session_id):
+        self._pipeline([["DEL", _fields_key(session_id), _turns_key(session_id)]])
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def _pipeline(self, commands):
+        """Send commands in one write and return their replies."""
+        payload = b"".join(_encode_command(command) for command in commands)
+        with self._lock:
+            # Retry once on a connection the server has closed
+            for attempt in range(2):
+                try:
+                    self._connect()
+                    self._sock.sendall(payload)
+                    replies = [self._read_reply() for _ in commands]
+                    break
+                except OSError as e:
+                    self._disconnect()
+                    if attempt:
+                        raise CheckpointError(f"Checkpoint store unreachable: {e}")
+        for reply in replies:
+            if isinstance(reply, CheckpointError):
+                raise reply
+        return replies
+
+    def _connect(self):
+        if self._sock is not None:
+            return
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(["AUTH", self.password])
+        if self.db:
+            setup.append(["SELECT", self.db])
+        if setup:
+            self._sock.sendall(b"".join(_encode_command(command) for command in setup))
+            for _ in setup:
+                reply = self._read_reply()
+                if isinstance(reply, CheckpointError):
+                    raise reply
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+        self._sock = None
+        self._file = None
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connection closed by checkpoint store")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return CheckpointError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise CheckpointError(f"Unexpected reply from checkpoint store: {line!r}")
+
+
+def _fields_key(session_id):
+    return f"talentscout:session:{session_id}:fields"
+
+
+def _turns_key(session_id):
+    return f"talentscout:session:{session_id}:turns"
+
+
+def _encode_command(args):
+    parts = [f"*{len(args)}\r\n".encode("ascii")]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(f"${len(data)}\r\n".encode("ascii") + data + b"\r\n")
+    return b"".join(parts)
+
+
+class Checkpointer:
+    """Writes chatbot checkpoints as deltas and rebuilds chatbots from them."""
+
+    def __init__(self, store):
+        self.store = store
+        self.saves = 0
+        self.restores = 0
+        self.bytes_written = 0
+
+    def save(self, chatbot):
+        """Write the fields and turns that changed since the last checkpoint."""
+        start = time.perf_counter()
+        fields = chatbot.checkpoint_fields()
+        marker = chatbot._checkpoint
+        changed = {name: value for name, value in fields.items() if marker["fields"].get(name) != value}
+        transcript = chatbot.conversation_history.transcript
+        turns = [(idx, transcript.roles[idx], transcript.contents[idx])
+                 for idx in range(marker["turns"], len(transcript))]
+        if not changed and not turns:
+            return
+        self.store.save(chatbot.session_id, changed, turns)
+        marker["fields"].update(changed)
+        marker["turns"] = len(transcript)
+        self.saves += 1
+        self.bytes_written += sum(len(v) for v in changed.values()) + sum(len(t[2]) for t in turns)
+        logger.debug("Checkpointed %s: %d fields, %d turns in %.1fms", chatbot.session_id,
+                     len(changed), len(turns), (time.perf_counter() - start) * 1000)
+
+    def restore(self, session_id, chatbot_factory):
+        """Rebuild the session from the store, or return None if it is unknown."""
+        loaded = self.store.load(session_id)
+        if loaded is None:
+            return None
+        fields, turns = loaded
+        chatbot = chatbot_factory()
+        chatbot.restore_checkpoint(session_id, fields, turns)
+        # Everything just loaded is already in the store
+        chatbot._checkpoint = {"fields": dict(fields), "turns": len(turns)}
+        self.restores += 1
+        return chatbot
+
+    def version(self, session_id):
+        return self.store.version(session_id)
+
+    def delete(self, session_id):
+        self.store.delete(session_id)
+
+    def stats(self):
+        return {"saves": self.saves, "restores": self.restores, "bytes_written": self.bytes_written}
+
+
+def make_checkpoint_store(url):
+    """Create a store from a sqlite:/// or redis:// URL."""
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite":
+        # sqlite:///relative/path or sqlite:////absolute/path
+        return SQLiteCheckpointStore(parts.path[1:] if parts.path.startswith("/") else parts.path)
+    if parts.scheme == "redis":
+        db = int(parts.path.strip("/") or 0)
+        return RedisCheckpointStore(parts.hostname or "127.0.0.1", parts.port or 6379, db, parts.password,
+                                    ttl=int(os.getenv("CHECKPOINT_TTL", DEFAULT_CHECKPOINT_TTL)))
+    raise CheckpointError(f"Unsupported checkpoint store {url!r}")
+
+
+_checkpointer = None
+_checkpointer_url = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Return the process-wide checkpointer, or None unless CHECKPOINT_STORE is set."""
+    global _checkpointer, _checkpointer_url
+    url = os.getenv("CHECKPOINT_STORE")
+    if not url:
+        return None
+    with _checkpointer_lock:
+        if _checkpointer is None or _checkpointer_url != url:
+            _checkpointer = Checkpointer(make_checkpoint_store(url))
+            _checkpointer_url = url
+        return _checkpointer
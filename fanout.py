@@ -0,0 +1,132 @@
+# fanout.py
+"""Parallel per-category question generation for large tech stacks.
+
+A long stack is split into groups along the categories returned by
+extract_technologies. Each group gets its own small completion, all groups run
+concurrently, and the results are merged so that wall-clock latency tracks the
+slowest small call rather than one long completion.
+"""
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from prompts import SYSTEM_PROMPT, GROUP_TECH_QUESTION_GENERATION_PROMPT
+from llm_client import LLMError, get_backend
+from routing import get_router
+from utils import TECH_CATEGORIES
+from question_parser import parse_questions
+import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FANOUT_MIN_TECHNOLOGIES = 10
+DEFAULT_FANOUT_GROUP_SIZE = 4
+DEFAULT_FANOUT_QUESTIONS_PER_GROUP = 2
+DEFAULT_FANOUT_MAX_QUESTIONS = 10
+DEFAULT_FANOUT_WORKERS = 8
+
+
+def split_groups(technologies, group_size=DEFAULT_FANOUT_GROUP_SIZE):
+    """Split an extract_technologies result into (category, keywords) groups.
+
+    Categories keep the TECH_CATEGORIES order. Large categories are split into
+    chunks of group_size, and a keyword listed in several categories is only
+    asked about once.
+    """
+    seen = set()
+    groups = []
+    for category in TECH_CATEGORIES:
+        keywords = [kw for kw in technologies.get(category, []) if kw not in seen]
+        seen.update(keywords)
+        for start in range(0, len(keywords), group_size):
+            groups.append((category, keywords[start:start + group_size]))
+    return groups
+
+
+def _normalize_question(question):
+    return " ".join(re.findall(r"[a-z0-9+#]+", question.lower()))
+
+
+def merge_questions(group_results, max_questions=DEFAULT_FANOUT_MAX_QUESTIONS):
+    """Interleave per-group question lists, dropping duplicates.
+
+    Each group lists its questions from foundational to advanced, so taking
+    the n-th question of every group in turn keeps difficulty ramping up.
+    """
+    merged = []
+    seen = set()
+    longest = max((len(questions) for questions in group_results), default=0)
+    for position in range(longest):
+        for questions in group_results:
+            if position >= len(questions):
+                continue
+            key = _normalize_question(questions[position])
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(questions[position])
+    return merged[:max_questions]
+
+
+class FanoutGenerator:
+    """Generates questions for each technology group concurrently."""
+
+    def __init__(self, min_technologies=DEFAULT_FANOUT_MIN_TECHNOLOGIES,
+                 group_size=DEFAULT_FANOUT_GROUP_SIZE, per_group=DEFAULT_FANOUT_QUESTIONS_PER_GROUP,
+                 max_questions=DEFAULT_FANOUT_MAX_QUESTIONS, workers=DEFAULT_FANOUT_WORKERS):
+        self.min_technologies = min_technologies
+        self.group_size = group_size
+        self.per_group = per_group
+        self.max_questions = max_questions
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-fanout")
+
+    def applies_to(self, technologies):
+        """Whether a stack is large enough to be worth fanning out."""
+        return len({kw for kws in technologies.values() for kw in kws}) >= self.min_technologies
+
+    def generate(self, technologies, position):
+        """Return merged questions for all groups, or an empty list if every call failed."""
+        groups = split_groups(technologies, self.group_size)
+        futures = [self._executor.submit(tracing.propagate(self._generate_group), category, keywords, position)
+                   for category, keywords in groups]
+        # Bound the whole fan-out by a single call's deadline
+        done, _ = wait(futures, timeout=get_backend().timeout)
+        results = [f.result() if f in done else [] for f in futures]
+        return merge_questions(results, self.max_questions)
+
+    def _generate_group(self, category, keywords, position):
+        prompt = GROUP_TECH_QUESTION_GENERATION_PROMPT.format(
+            category=category.replace("_", " "),
+            technologies=", ".join(keywords),
+            count=self.per_group,
+            position=position
+        )
+        try:
+            completion = get_router().complete(
+                "question_group",
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+        except LLMError as e:
+            logger.warning("Error generating %s questions: %s", category, e)
+            return []
+        return parse_questions(completion.text)[:self.per_group]
+
+
+_fanout = None
+_fanout_lock = threading.Lock()
+
+
+def get_fanout_generator():
+    """Return the process-wide fan-out generator, configured from the environment."""
+    global _fanout
+    with _fanout_lock:
+        if _fanout is None:
+            _fanout = FanoutGenerator(
+                min_technologies=int(os.getenv("QUESTION_FANOUT_MIN_TECHNOLOGIES", DEFAULT_FANOUT_MIN_TECHNOLOGIES)),
+                group_size=int(os.getenv("QUESTION_FANOUT_GROUP_SIZE", DEFAULT_FANOUT_GROUP_SIZE)),
+                workers=int(os.getenv("QUESTION_FANOUT_WORKERS", DEFAULT_FANOUT_WORKERS))
+            )
+        return _fanout
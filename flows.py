@@ -0,0 +1,220 @@
+# flows.py
+"""Declarative interview flows.
+
+A flow is a table of states. Each state names what the candidate's answer is
+stored as (capture), how it is optionally checked (validator), what the bot replies
+(a prompt template or an action of the chatbot) and where to go next. A flow
+is compiled once into a list indexed by integer state IDs, so every turn is a
+constant-time lookup, and one process can run several flows side by side.
+
+Flows are plain dicts, loadable from JSON:
+    {
+        "name": "short_screen",
+        "initial": "greeting",
+        "states": [
+            {"name": "greeting", "prompt": "@initial_greeting", "next": "get_name"},
+            {"name": "get_name", "capture": "name", "prompt": "Thanks {name}! Which technologies do you use?", "next": "get_tech_stack"},
+            ...
+        ]
+    }
+Prompts starting with "@" refer to PROMPT_LIBRARY and are formatted with the
+candidate information. "next" is a state name or a condition:
+    {"when": "questions_remaining", "then": "ask_questions", "else": "conclude"}
+"""
+import os
+import re
+import json
+import random
+import threading
+from prompts import INITIAL_GREETING, INFORMATION_COLLECTION_PROMPTS, FALLBACK_RESPONSES
+from utils import validate_email, validate_phone
+
+PROMPT_LIBRARY = dict(INFORMATION_COLLECTION_PROMPTS, initial_greeting=INITIAL_GREETING)
+
+# name -> (check, message shown when the check fails), for flows that opt in;
+# the default flow accepts every answer, as the interview always has
+VALIDATORS = {
+    "nonempty": (lambda text: bool(text.strip()), "Could you please provide an answer?"),
+    "email": (lambda text: validate_email(text.strip()),
+              "That doesn't look like a valid email address. Could you please check it and send it again?"),
+    "phone": (lambda text: validate_phone(text.strip()),
+              "That doesn't look like a valid phone number. Could you please enter it with its area code?"),
+    "years": (lambda text: bool(re.search(r"\d", text)),
+              "Could you give your experience as a number of years?")
+}
+
+# name -> predicate over candidate_info, used by conditional transitions
+CONDITIONS = {
+    "questions_remaining": lambda info: info["question_index"] < len(info["technical_questions"])
+}
+
+# Actions a state may run instead of a prompt; implemented by the chatbot
+ACTIONS = {"generate_questions", "ask_question", "answer_question", "exit_message"}
+
+DEFAULT_FLOW = {
+    "name": "default",
+    "initial": "greeting",
+    "states": [
+        {"name": "greeting", "prompt": "@initial_greeting", "next": "get_name"},
+        {"name": "get_name", "capture": "name", "prompt": "@email", "next": "get_email"},
+        {"name": "get_email", "capture": "email", "prompt": "@phone", "next": "get_phone"},
+        {"name": "get_phone", "capture": "phone", "prompt": "@experience",
+         "next": "get_experience"},
+        {"name": "get_experience", "capture": "experience", "prompt": "@position",
+         "next": "get_position"},
+        {"name": "get_position", "capture": "position", "prompt": "@location",
+         "next": "get_location"},
+        {"name": "get_location", "capture": "location", "prompt": "@tech_stack",
+         "next": "get_tech_stack"},
+        {"name": "get_tech_stack", "capture": "tech_stack", "action": "generate_questions", "next": "generate_questions"},
+        {"name": "generate_questions", "action": "ask_question",
+         "next": {"when": "questions_remaining", "then": "ask_questions", "else": "conclude"}},
+        {"name": "ask_questions", "action": "answer_question",
+         "next": {"when": "questions_remaining", "then": "ask_questions", "else": "conclude"}},
+        {"name": "conclude", "action": "exit_message", "next": "conclude"}
+    ]
+}
+
+
+class FlowError(ValueError):
+    """Raised for an invalid flow definition."""
+
+
+class State:
+    """One compiled state of a flow."""
+
+    __slots__ = ("id", "name", "capture", "validator", "error", "prompt", "format_prompt",
+                 "action", "next_id", "condition", "else_id")
+
+    def __init__(self, state_id, name):
+        self.id = state_id
+        self.name = name
+        self.capture = None
+        self.validator = None
+        self.error = None
+        self.prompt = None
+        self.format_prompt = False
+        self.action = None
+        self.next_id = state_id
+        self.condition = None
+        self.else_id = state_id
+
+    def validate(self, text):
+        """Return None if text is acceptable, otherwise the message to show."""
+        if self.validator is None or self.validator(text):
+            return None
+        return self.error
+
+    def render(self, candidate_info):
+        if self.format_prompt:
+            return self.prompt.format_map(candidate_info)
+        return self.prompt
+
+    def next_state(self, candidate_info):
+        if self.condition is None or self.condition(candidate_info):
+            return self.next_id
+        return self.else_id
+
+
+class Flow:
+    """A compiled flow: states indexed by integer ID."""
+
+    def __init__(self, config):
+        self.name = config.get("name", "flow")
+        specs = config.get("states") or []
+        if not specs:
+            raise FlowError(f"Flow {self.name} has no states")
+        self.states = [State(i, spec["name"]) for i, spec in enumerate(specs)]
+        self.ids = {state.name: state.id for state in self.states}
+        if len(self.ids) != len(self.states):
+            raise FlowError(f"Flow {self.name} has duplicate state names")
+        for state, spec in zip(self.states, specs):
+            self._compile(state, spec)
+        self.initial = self._id(config.get("initial", specs[0]["name"]))
+        # Dispatch tables by chatbot class
+        self._tables = {}
+
+    def dispatch_table(self, cls, action_methods):
+        """Return (handler, next ID, condition, else ID) per state ID for chatbots of class cls.
+
+        A handler takes the chatbot and returns the state's reply. Actions and
+        prompts are resolved here once, so a turn only indexes the table.
+        """
+        table = self._tables.get(cls)
+        if table is None:
+            table = [(_handler(state, cls, action_methods), state.next_id, state.condition, state.else_id)
+                     for state in self.states]
+            self._tables[cls] = table
+        return table
+
+    def state_id(self, name):
+        return self._id(name)
+
+    def _id(self, name):
+        if name not in self.ids:
+            raise FlowError(f"Flow {self.name} has no state {name!r}")
+        return self.ids[name]
+
+    def _compile(self, state, spec):
+        state.capture = spec.get("capture")
+        if spec.get("validator"):
+            if spec["validator"] not in VALIDATORS:
+                raise FlowError(f"Unknown validator {spec['validator']!r} in state {state.name}")
+            state.validator, state.error = VALIDATORS[spec["validator"]]
+            state.error = spec.get("error", state.error)
+
+        if "action" in spec:
+            if spec["action"] not in ACTIONS:
+                raise FlowError(f"Unknown action {spec['action']!r} in state {state.name}")
+            state.action = spec["action"]
+        elif "prompt" in spec:
+            prompt = spec["prompt"]
+            if prompt.startswith("@"):
+                if prompt[1:] not in PROMPT_LIBRARY:
+                    raise FlowError(f"Unknown prompt {prompt!r} in state {state.name}")
+                prompt = PROMPT_LIBRARY[prompt[1:]]
+            state.prompt = prompt
+            state.format_prompt = "{" in prompt
+
+        target = spec.get("next", state.name)
+        if isinstance(target, dict):
+            if target.get("when") not in CONDITIONS:
+                raise FlowError(f"Unknown condition {target.get('when')!r} in state {state.name}")
+            state.condition = CONDITIONS[target["when"]]
+            state.next_id = self._id(target["then"])
+            state.else_id = self._id(target["else"])
+        else:
+            state.next_id = self._id(target)
+
+
+def _handler(state, cls, action_methods):
+    if state.action is not None:
+        return getattr(cls, action_methods[state.action])
+    prompt = state.prompt
+    if prompt is None:
+        return lambda chatbot: random.choice(FALLBACK_RESPONSES)
+    if state.format_prompt:
+        return lambda chatbot: prompt.format_map(chatbot.candidate_info)
+    return lambda chatbot: prompt
+
+
+def load_flow(path):
+    """Load and compile a flow from a JSON file."""
+    with open(path) as f:
+        return Flow(json.load(f))
+
+
+_flows = {}
+_flows_lock = threading.Lock()
+
+
+def get_flow(path=None):
+    """Return the compiled flow for path, INTERVIEW_FLOW_PATH or the default.
+
+    Flows are compiled once per process and shared by every session.
+    """
+    path = path or os.getenv("INTERVIEW_FLOW_PATH") or None
+    with _flows_lock:
+        if path not in _flows:
+            _flows[path] = load_flow(path) if path else Flow(DEFAULT_FLOW)
+        return _flows[path]
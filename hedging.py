@@ -0,0 +1,220 @@
+# hedging.py
+"""Latency SLO mode for question generation.
+
+The primary call gets until a percentile of recently observed latencies. If it
+has not answered by then a hedged duplicate is fired, and whichever answers
+first wins while the other is cancelled. Once the hard deadline passes, both
+are cancelled and the caller switches to locally sourced questions.
+
+Until the window holds QUESTION_SLO_MIN_SAMPLES latencies the percentile
+means little, so the primary call is only hedged if it fails. Cancelling a
+call drops its connection, so a call blocked waiting for the server stops
+at once instead of when its next chunk arrives.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from llm_client import LLMError
+from metrics import REGISTRY, StatsCollector
+import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLO_PERCENTILE = 95
+DEFAULT_SLO_HEDGE_MIN = 1.0
+DEFAULT_SLO_WINDOW = 200
+# Latencies to observe before the percentile is trusted for hedging
+DEFAULT_SLO_MIN_SAMPLES = 20
+DEFAULT_SLO_WORKERS = 16
+
+
+class Cancellation(threading.Event):
+    """A cancel event that also runs the callbacks registered by the call it cancels."""
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = {}
+        self._callbacks_lock = threading.Lock()
+
+    def on_cancel(self, key, callback):
+        """Run callback when the call is cancelled, or now if it already is."""
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks[key] = callback
+                return
+        callback()
+
+    def discard(self, key):
+        with self._callbacks_lock:
+            self._callbacks.pop(key, None)
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.debug("Cancel callback failed", exc_info=True)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies."""
+
+    def __init__(self, window=DEFAULT_SLO_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, percentile):
+        """Return the given percentile of the window, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class SLOController:
+    """Runs calls with a hedge deadline and a hard deadline."""
+
+    def __init__(self, hard_deadline, percentile=DEFAULT_SLO_PERCENTILE, hedge_min=DEFAULT_SLO_HEDGE_MIN,
+                 window=DEFAULT_SLO_WINDOW, workers=DEFAULT_SLO_WORKERS, min_samples=DEFAULT_SLO_MIN_SAMPLES):
+        self.hard_deadline = hard_deadline
+        self.percentile = percentile
+        self.hedge_min = hedge_min
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-slo")
+        self._lock = threading.Lock()
+        self.served_by = {"primary": 0, "hedge": 0, "local": 0}
+        self.hedges = 0
+
+    def hedge_delay(self):
+        """Seconds to give the primary call before hedging."""
+        if len(self.latencies) < self.min_samples:
+            # Too few samples: the primary gets until the hard deadline unless it fails
+            return self.hard_deadline
+        observed = self.latencies.percentile(self.percentile)
+        delay = max(self.hedge_min, observed or 0.0)
+        return min(delay, self.hard_deadline)
+
+    def run(self, fn):
+        """Run fn(cancel) under the SLO.
+
+        cancel is a Cancellation. fn should return a non-empty result, or stop
+        early and return None once cancel is set; it can register callbacks
+        that abort its I/O with cancel.on_cancel. Returns (result, path) where path is "primary",
+        "hedge" or "local"; the result is None for "local".
+        """
+        start = time.monotonic()
+        calls = {self._submit(fn, Cancellation()): "primary"}
+        hedged = False
+
+        while True:
+            remaining = self.hard_deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            timeout = remaining if hedged else min(remaining, self.hedge_delay() - (time.monotonic() - start))
+            done, _ = wait(list(calls), timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                path = calls.pop(future)
+                result = future.result()
+                if result:
+                    self._cancel(calls)
+                    self._record(path)
+                    return result, path
+
+            # Hedge once the primary is slow or has already failed, unless time is up
+            elapsed = time.monotonic() - start
+            if not hedged and elapsed < self.hard_deadline and (not calls or elapsed >= self.hedge_delay()):
+                hedged = True
+                with self._lock:
+                    self.hedges += 1
+                calls[self._submit(fn, Cancellation())] = "hedge"
+            elif not calls:
+                break
+
+        self._cancel(calls)
+        self._record("local")
+        return None, "local"
+
+    def stats(self):
+        """Return which path served each call and the current hedge delay."""
+        with self._lock:
+            return {
+                "served_by": dict(self.served_by),
+                "hedges": self.hedges,
+                "hedge_delay": self.hedge_delay(),
+                "hard_deadline": self.hard_deadline
+            }
+
+    def _submit(self, fn, cancel):
+        future = self._executor.submit(tracing.propagate(self._timed), fn, cancel)
+        future.cancel_event = cancel
+        return future
+
+    def _timed(self, fn, cancel):
+        start = time.monotonic()
+        try:
+            result = fn(cancel)
+        except LLMError as e:
+            # Cancelled calls fail when their connection is dropped
+            if not cancel.is_set():
+                logger.warning("Question generation call failed: %s", e)
+            return None
+        except Exception:
+            # Whatever went wrong, the other call or the local fallback still answers
+            logger.exception("Question generation call raised an unexpected error")
+            return None
+        if result and not cancel.is_set():
+            self.latencies.record(time.monotonic() - start)
+        return result
+
+    def _cancel(self, calls):
+        for future in calls:
+            future.cancel_event.set()
+            future.cancel()
+
+    def _record(self, path):
+        with self._lock:
+            self.served_by[path] += 1
+
+
+_slo = None
+_slo_lock = threading.Lock()
+
+REGISTRY.register(StatsCollector(
+    "talentscout_question_slo", "Question generation under the latency SLO: serving path, hedges and deadlines.",
+    lambda: _slo.stats() if _slo is not None else None, label="path"))
+
+
+def get_slo_controller():
+    """Return the process-wide SLO controller, or None unless QUESTION_SLO_HARD_DEADLINE is set."""
+    global _slo
+    hard_deadline = float(os.getenv("QUESTION_SLO_HARD_DEADLINE", 0))
+    if hard_deadline <= 0:
+        return None
+    with _slo_lock:
+        if _slo is None:
+            _slo = SLOController(
+                hard_deadline,
+                percentile=float(os.getenv("QUESTION_SLO_PERCENTILE", DEFAULT_SLO_PERCENTILE)),
+                hedge_min=float(os.getenv("QUESTION_SLO_HEDGE_MIN", DEFAULT_SLO_HEDGE_MIN)),
+                min_samples=int(os.getenv("QUESTION_SLO_MIN_SAMPLES", DEFAULT_SLO_MIN_SAMPLES))
+            )
+        return _slo
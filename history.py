@@ -0,0 +1,239 @@
+# history.py
+"""Token-budgeted conversation history.
+
+The system prompt and the structured candidate information are always sent.
+The last few turns are kept verbatim; once the history goes over its token
+budget, older turns are folded into a running summary by a background worker,
+so prompt length does not grow with the length of the interview. A summary
+is only requested when messages() is read: until it is ready, evicted turns
+are summarized extractively, and histories nobody reads cost no LLM calls.
+Token counts are kept per message and updated as messages come and go.
+"""
+import os
+import re
+import json
+import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from prompts import HISTORY_SUMMARY_PROMPT
+from llm_client import LLMError
+from routing import get_router
+from admission import PRIORITY_BACKGROUND
+from session import Transcript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_TOKEN_BUDGET = 1500
+DEFAULT_HISTORY_KEEP_TURNS = 6
+DEFAULT_HISTORY_SUMMARY_WORDS = 150
+# Tokens of role and framing that every chat message costs
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters kept per turn when a summary has to be built without the LLM
+EXTRACTIVE_TURN_CHARS = 200
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def count_tokens(text):
+    """Approximate the number of tokens in text.
+
+    Words and punctuation marks are counted separately, which tracks BPE
+    tokenizers closely enough for budgeting without loading one.
+    """
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _get_summary_executor():
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+        return _summary_executor
+
+
+def _extractive_summary(summary, turns):
+    """Fallback summary: the start of every turn appended to the old summary."""
+    lines = [summary] if summary else []
+    for turn in turns:
+        content = " ".join(turn["content"].split())
+        if len(content) > EXTRACTIVE_TURN_CHARS:
+            content = content[:EXTRACTIVE_TURN_CHARS] + "..."
+        lines.append(f"{turn['role']}: {content}")
+    return "\n".join(lines)
+
+
+class ConversationHistory:
+    """Conversation messages under a token budget.
+
+    Turns are stored once, in a Transcript that also backs the chat view; the
+    history only tracks where its verbatim window starts. Indexing, slicing
+    and iteration see the system prompt followed by the window, like the
+    plain list this replaces.
+    """
+
+    __slots__ = ("system", "transcript", "token_budget", "keep_turns", "summary_words", "summary",
+                 "tokens", "folded_turns", "_turn_tokens", "_start", "_fold_start", "_summarizing", "_lock")
+
+    def __init__(self, system_prompt, token_budget=DEFAULT_HISTORY_TOKEN_BUDGET,
+                 keep_turns=DEFAULT_HISTORY_KEEP_TURNS, summary_words=DEFAULT_HISTORY_SUMMARY_WORDS,
+                 transcript=None):
+        # The shared prompt constant, not a copy
+        self.system = system_prompt
+        self.transcript = transcript if transcript is not None else Transcript()
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_words = summary_words
+        self.summary = ""
+        # Token counts of the turns in the window
+        self._turn_tokens = array("I")
+        # Transcript index of the first verbatim turn, and of the first turn
+        # evicted but not yet summarized
+        self._start = len(self.transcript)
+        self._fold_start = self._start
+        self._lock = threading.Lock()
+        self._summarizing = False
+        self.tokens = count_tokens(self.system) + MESSAGE_OVERHEAD_TOKENS
+        self.folded_turns = 0
+
+    def append(self, message, hidden=False):
+        """Add a user or assistant turn, folding old turns if over budget."""
+        if message["role"] == "system":
+            # The pinned system prompt is replaced rather than repeated
+            with self._lock:
+                self.tokens += count_tokens(message["content"]) - count_tokens(self.system)
+                self.system = message["content"]
+            return
+        tokens = message_tokens(message)
+        with self._lock:
+            self.transcript.append(message["role"], message["content"], hidden)
+            self._turn_tokens.append(tokens)
+            self.tokens += tokens
+            if self.tokens > self.token_budget and len(self._turn_tokens) > self.keep_turns:
+                self._evict()
+
+    def messages(self, candidate_info=None):
+        """Return the messages to send to the LLM."""
+        with self._lock:
+            messages = [{"role": "system", "content": self.system}]
+            if candidate_info is not None:
+                info = {k: v for k, v in candidate_info.items() if v not in (None, [], "")}
+                messages.append({"role": "system", "content": "Candidate information: " + json.dumps(info)})
+            summary = self.summary
+            if self._fold_start < self._start:
+                summary = _extractive_summary(summary, self.transcript.messages(self._fold_start, self._start))
+            if summary:
+                messages.append({"role": "system", "content": "Conversation so far: " + summary})
+            messages.extend(self.transcript.messages(self._start))
+        # Evicted turns are folded into the LLM summary for the next read
+        self._schedule_summary()
+        return messages
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tokens": self.tokens,
+                "turns": len(self._turn_tokens),
+                "folded_turns": self.folded_turns,
+                "pending_fold": self._start - self._fold_start,
+                "summary_tokens": count_tokens(self.summary)
+            }
+
+    def fold_state(self):
+        """Return (summary, start, fold_start), the state not kept in the transcript."""
+        with self._lock:
+            return self.summary, self._start, self._fold_start
+
+    def restore_fold_state(self, summary, start, fold_start):
+        """Restore the state returned by fold_state() over an already filled transcript."""
+        with self._lock:
+            self.summary = summary
+            self._start = start
+            self._fold_start = fold_start
+            self._turn_tokens = array("I", (message_tokens(m) for m in self.transcript.messages(start)))
+            self.tokens = (count_tokens(self.system) + MESSAGE_OVERHEAD_TOKENS + count_tokens(summary)
+                           + sum(self._turn_tokens))
+
+    def _window(self):
+        return [{"role": "system", "content": self.system}] + self.transcript.messages(self._start)
+
+    def __len__(self):
+        with self._lock:
+            return 1 + len(self._turn_tokens)
+
+    def __getitem__(self, index):
+        with self._lock:
+            return self._window()[index]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(self._window())
+
+    def _evict(self):
+        """Move turns beyond the last keep_turns out of the window."""
+        count = len(self._turn_tokens) - self.keep_turns
+        self.tokens -= sum(self._turn_tokens[:count])
+        del self._turn_tokens[:count]
+        self._start += count
+
+    def _schedule_summary(self):
+        with self._lock:
+            if self._summarizing or self._fold_start == self._start:
+                return
+            self._summarizing = True
+            start, end = self._fold_start, self._start
+            summary = self.summary
+        _get_summary_executor().submit(self._summarize, summary, start, end)
+
+    def _summarize(self, summary, start, end):
+        """Fold transcript turns start to end into the summary; runs on the summary worker."""
+        try:
+            turns = self.transcript.messages(start, end)
+            new_summary = self._summary_text(summary, turns)
+            with self._lock:
+                old_tokens = count_tokens(self.summary)
+                self.summary = new_summary
+                self.tokens += count_tokens(new_summary) - old_tokens
+                self._fold_start = end
+                self.folded_turns += len(turns)
+        finally:
+            # Whatever went wrong, the next read may try again
+            with self._lock:
+                self._summarizing = False
+
+    def _summary_text(self, summary, turns):
+        """summary extended with turns, by the LLM or else extractively."""
+        transcript = "\n".join(f"{t['role']}: {t['content'].strip()}" for t in turns)
+        prompt = HISTORY_SUMMARY_PROMPT.format(
+            words=self.summary_words,
+            summary=summary or "(none)",
+            transcript=transcript
+        )
+        try:
+            completion = get_router().complete(
+                "summarization",
+                [{"role": "user", "content": prompt}],
+                priority=PRIORITY_BACKGROUND
+            )
+            new_summary = completion.text.strip()
+        except LLMError as e:
+            logger.warning("Error summarizing conversation history: %s", e)
+            new_summary = ""
+        return new_summary or _extractive_summary(summary, turns)
+
+
+def make_conversation_history(system_prompt, transcript=None):
+    """Create a history configured from the environment."""
+    return ConversationHistory(
+        system_prompt,
+        token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", DEFAULT_HISTORY_TOKEN_BUDGET)),
+        keep_turns=int(os.getenv("HISTORY_KEEP_TURNS", DEFAULT_HISTORY_KEEP_TURNS)),
+        transcript=transcript
+    )
@@ -0,0 +1,386 @@
+# llm_client.py
+"""Pluggable LLM client layer.
+
+Backends expose `complete` and `stream` for OpenAI-compatible chat
+completions. The default HTTPBackend keeps a pool of keep-alive connections,
+enforces a deadline on every call and retries transient failures with jittered
+exponential backoff, honouring Retry-After hints from the server.
+"""
+import os
+import json
+import time
+import queue
+import random
+import socket
+import logging
+import threading
+import http.client
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from admission import PRIORITY_INTERACTIVE, AdmissionTimeout, get_admission_controller
+from metrics import LLM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_POOL_SIZE = 8
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+
+# Status codes worth retrying
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status is None or self.status in RETRYABLE_STATUS
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when an LLM call exceeds its deadline."""
+
+    @property
+    def retryable(self):
+        return False
+
+
+class LLMCancelledError(LLMError):
+    """Raised when a call is aborted through its cancel argument."""
+
+    @property
+    def retryable(self):
+        return False
+
+
+class Completion:
+    """Result of a non-streaming completion."""
+
+    def __init__(self, text, model=None, usage=None):
+        self.text = text
+        self.model = model
+        self.usage = usage or {}
+
+
+class LLMBackend:
+    """Interface implemented by every LLM backend."""
+
+    def complete(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+                 priority=PRIORITY_INTERACTIVE, task="other"):
+        """Return a Completion for messages; task only labels metrics."""
+        raise NotImplementedError
+
+    def stream(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+               priority=PRIORITY_INTERACTIVE, task="other", cancel=None):
+        """Yield the completion text for messages chunk by chunk.
+
+        The generator returns the usage reported by the server, if any.
+        cancel, if given, is a hedging.Cancellation that aborts the call.
+        """
+        raise NotImplementedError
+
+
+class ConnectionPool:
+    """A small LIFO pool of keep-alive HTTP(S) connections to one host."""
+
+    def __init__(self, base_url, maxsize=DEFAULT_POOL_SIZE):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path.rstrip("/")
+        self._idle = queue.LifoQueue(maxsize)
+
+    def get(self, timeout):
+        """Return an idle connection, or open a new one."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            if self.scheme == "https":
+                conn = http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def put(self, conn):
+        """Return a connection whose response has been fully read to the pool."""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HTTPBackend(LLMBackend):
+    """Backend for OpenAI-compatible HTTP APIs."""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, api_key=None, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, pool_size=DEFAULT_POOL_SIZE,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX, admission=None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool = ConnectionPool(base_url, pool_size)
+        # Optional AdmissionController shared by all calls
+        self.admission = admission
+
+    def complete(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+                 priority=PRIORITY_INTERACTIVE, task="other"):
+        body = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        deadline = time.monotonic() + (timeout or self.timeout)
+        conn, response = self._request(body, deadline, priority, task)
+        try:
+            data = json.loads(self._read(conn, response, deadline))
+            text = data["choices"][0]["message"]["content"]
+        except LLMError:
+            # Nothing usable came back; charge the prompt only
+            self._settle(body, _prompt_tokens(body))
+            raise
+        except (ValueError, LookupError, TypeError) as e:
+            conn.close()
+            self._settle(body, _prompt_tokens(body))
+            raise LLMError(f"Invalid completion response: {e!r}")
+        self.pool.put(conn)
+        usage = data.get("usage") or {}
+        used = usage.get("total_tokens")
+        self._settle(body, used if used is not None else _prompt_tokens(body) + len(text or "") // 4)
+        return Completion(text, model=data.get("model", model), usage=usage or None)
+
+    def stream(self, messages, model, temperature=0.7, max_tokens=1000, timeout=None,
+               priority=PRIORITY_INTERACTIVE, task="other", cancel=None):
+        body = {"model": model, "messages": messages, "temperature": temperature,
+                "max_tokens": max_tokens, "stream": True, "stream_options": {"include_usage": True}}
+        deadline = time.monotonic() + (timeout or self.timeout)
+        conn, response = self._request(body, deadline, priority, task, cancel)
+        finished = False
+        usage = None
+        emitted_chars = 0
+        try:
+            while True:
+                self._settimeout(conn, deadline)
+                line = response.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    # Drain the terminating chunk so the connection can be reused
+                    response.read()
+                    finished = True
+                    break
+                event = json.loads(payload)
+                # With include_usage the last event has usage and no choices
+                usage = event.get("usage") or usage
+                for choice in event.get("choices") or []:
+                    content = choice.get("delta", {}).get("content")
+                    if content:
+                        emitted_chars += len(content)
+                        yield content
+        except socket.timeout:
+            raise LLMTimeoutError("LLM stream exceeded its deadline")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            if cancel is not None and cancel.is_set():
+                raise LLMCancelledError("LLM stream was cancelled")
+            raise LLMError(f"LLM stream failed: {e}")
+        finally:
+            if cancel is not None:
+                cancel.discard(conn)
+            if finished:
+                self.pool.put(conn)
+            else:
+                conn.close()
+            # Also on errors and early close: the reservation assumed the full max_tokens
+            used = (usage or {}).get("total_tokens")
+            self._settle(body, used if used is not None else _prompt_tokens(body) + emitted_chars // 4)
+        return usage
+
+    def _request(self, body, deadline, priority=PRIORITY_INTERACTIVE, task="other", cancel=None):
+        """Send body, retrying transient failures until the deadline.
+
+        Every attempt is admitted by the admission controller first, if any,
+        and a failed attempt gives its tokens back. Returns the connection and
+        a response with a 200 status.
+        """
+        payload = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        attempt = 0
+        while True:
+            self._admit(body, deadline, priority)
+            try:
+                return self._send(payload, headers, deadline, cancel)
+            except LLMError as e:
+                # The request slot is spent, but no tokens were
+                self._settle(body, 0)
+                if cancel is not None and cancel.is_set():
+                    raise LLMCancelledError("LLM call was cancelled")
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e.retry_after)
+                if time.monotonic() + delay >= deadline:
+                    raise LLMTimeoutError(f"LLM call exceeded its deadline after {attempt + 1} attempts: {e}")
+                logger.warning("LLM call failed (%s), retrying in %.2fs", e, delay)
+                LLM_RETRIES.inc(task=task, model=body["model"])
+                time.sleep(delay)
+                attempt += 1
+
+    def _settle(self, body, used_tokens):
+        """Give back the part of an admitted call's token reservation it did not use."""
+        if self.admission is not None:
+            self.admission.adjust(_estimate_tokens(body), used_tokens)
+
+    def _admit(self, body, deadline, priority):
+        """Wait for the admission controller to let a call through."""
+        if self.admission is None:
+            return
+        try:
+            self.admission.acquire(_estimate_tokens(body), priority, timeout=deadline - time.monotonic())
+        except AdmissionTimeout as e:
+            raise LLMTimeoutError(f"LLM call was not admitted before its deadline: {e}")
+
+    def _send(self, payload, headers, deadline, cancel=None):
+        """Send a single request."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        if cancel is not None and cancel.is_set():
+            raise LLMCancelledError("LLM call was cancelled")
+        conn = self.pool.get(remaining)
+        if cancel is not None:
+            # Unblocks a read waiting on the server; the reading thread then closes conn
+            cancel.on_cancel(conn, lambda: _abort(conn))
+        try:
+            conn.request("POST", self.pool.path + "/chat/completions", body=payload, headers=headers)
+            response = conn.getresponse()
+        except socket.timeout:
+            conn.close()
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        except (OSError, http.client.HTTPException) as e:
+            # Covers stale keep-alive connections closed by the server
+            conn.close()
+            raise LLMError(f"Connection error: {e}")
+
+        if response.status != 200:
+            retry_after = _parse_retry_after(response.getheader("Retry-After"))
+            try:
+                detail = self._read(conn, response, deadline).decode("utf-8", "replace")
+                if cancel is not None:
+                    cancel.discard(conn)
+                self.pool.put(conn)
+            except LLMError:
+                detail = ""
+            raise LLMError(f"HTTP {response.status}: {detail[:200]}", status=response.status, retry_after=retry_after)
+        return conn, response
+
+    def _read(self, conn, response, deadline):
+        """Read the full response body within the deadline."""
+        self._settimeout(conn, deadline)
+        try:
+            return response.read()
+        except socket.timeout:
+            conn.close()
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise LLMError(f"Connection error: {e}")
+
+    def _settimeout(self, conn, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        if conn.sock is not None:
+            conn.sock.settimeout(remaining)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than a Retry-After hint."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def _abort(conn):
+    """Shut down conn's socket from another thread, failing any read blocked on it."""
+    sock = conn.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def _prompt_tokens(body):
+    """Rough token estimate for the prompt of a request alone."""
+    return _estimate_tokens(dict(body, max_tokens=0))
+
+
+def _estimate_tokens(body):
+    """Rough token estimate for a request: prompt characters / 4 plus the completion budget."""
+    prompt_chars = sum(len(m.get("content", "")) for m in body["messages"])
+    return prompt_chars // 4 + body.get("max_tokens", 0)
+
+
+def _parse_retry_after(value):
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide LLM backend, configured from the environment."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = HTTPBackend(
+                base_url=os.getenv("LLM_BASE_URL", DEFAULT_BASE_URL),
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=float(os.getenv("LLM_TIMEOUT", DEFAULT_TIMEOUT)),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                pool_size=int(os.getenv("LLM_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                admission=get_admission_controller()
+            )
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide LLM backend, e.g. with a stand-in for tests."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
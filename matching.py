@@ -0,0 +1,293 @@
+# matching.py
+"""Vectorized matching of saved candidates against job openings.
+
+Candidates are rows of a sparse candidate x skill matrix over the skills of
+skill_taxonomy, stored by column: each skill keeps the rows and weights of
+the candidates that have it, in arrays that grow in place as records are
+added. Years of experience and location are dense per-candidate columns.
+A candidate's own skills weigh 1 and the parent skills they imply (React
+for Next.js) weigh PARENT_SKILL_WEIGHT.
+
+An opening is scored against every candidate at once: the columns of its
+skills are concatenated and summed per row with np.bincount, so the cost
+grows with the candidates that share a skill with the opening rather than
+with the whole matrix. Skill coverage is blended with the experience and
+location scores and the top k rows are picked with np.argpartition; a query
+over 100k candidates costs a few milliseconds.
+
+    index = get_matching_index()
+    index.top_k(Opening("Backend engineer", "python, django, postgres", min_experience=3,
+                        locations=["Berlin"]), k=10)
+"""
+import re
+import logging
+import threading
+from skill_taxonomy import get_skill_taxonomy
+from candidate_store import get_candidate_store
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - matching needs NumPy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+PARENT_SKILL_WEIGHT = 0.5
+# How skill coverage, experience and location are blended into one score
+DEFAULT_WEIGHTS = {"skills": 0.7, "experience": 0.2, "location": 0.1}
+INITIAL_CAPACITY = 1024
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20
+}
+YEARS_PATTERN = re.compile(r"\b(\d+(?:\.\d+)?|" + "|".join(NUMBER_WORDS) + r")\b\s*\+?\s*(months?|mos?)?",
+                           re.IGNORECASE)
+
+
+def parse_years(text):
+    """Years of experience in a free-text answer ("5+ years", "six months"), or NaN."""
+    match = YEARS_PATTERN.search(text or "")
+    if match is None:
+        return float("nan")
+    value = match.group(1).lower()
+    years = float(NUMBER_WORDS.get(value, value))
+    if match.group(2):
+        years /= 12
+    return years
+
+
+def location_keys(text):
+    """Normalized city and country parts of a location ("Berlin, Germany")."""
+    parts = [" ".join(part.split()) for part in (text or "").lower().split(",")]
+    parts = [part for part in parts if part]
+    if not parts:
+        return "", ""
+    return parts[0], parts[-1]
+
+
+class Opening:
+    """A job opening: required skills, minimum experience and accepted locations.
+
+    skills is a free-text tech stack or a list of skill IDs. An opening
+    without any known skill matches no candidate. An empty locations list
+    accepts every location.
+    """
+
+    def __init__(self, title, skills, min_experience=0, locations=()):
+        self.title = title
+        if isinstance(skills, str):
+            skills = get_skill_taxonomy().normalize(skills)
+        self.skills = list(skills)
+        self.min_experience = min_experience
+        self.locations = [location_keys(location)[0] for location in locations]
+
+
+class _Growable:
+    """A 1-d array with amortized O(1) appends."""
+
+    def __init__(self, dtype, capacity=INITIAL_CAPACITY):
+        self.array = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.array):
+            grown = np.empty(max(end, 2 * len(self.array)), dtype=self.array.dtype)
+            grown[:self.size] = self.array[:self.size]
+            self.array = grown
+        self.array[self.size:end] = values
+        self.size = end
+
+    def view(self):
+        return self.array[:self.size]
+
+
+class MatchingIndex:
+    """Candidates as a growing sparse skill matrix, scored against openings."""
+
+    def __init__(self, taxonomy=None, weights=None):
+        self.taxonomy = taxonomy or get_skill_taxonomy()
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.columns = {skill_id: i for i, skill_id in enumerate(self.taxonomy.skills)}
+        # Sparse skill matrix by column: skill column -> (rows, weights)
+        self._postings = [(_Growable(np.int32, 64), _Growable(np.float32, 64)) for _ in self.columns]
+        # Per-candidate columns
+        self._years = _Growable(np.float32)
+        self._city = _Growable(np.int32)
+        self._country = _Growable(np.int32)
+        self._active = _Growable(np.bool_)
+        self._locations = {"": 0}
+        self.records = []
+        self._keys = {}
+        # Highest candidate store ID seen by load_store
+        self._loaded_id = 0
+        self._lock = threading.Lock()
+        # Held for a whole load_store, so concurrent loads don't index the same rows twice;
+        # separate from _lock so scoring goes on while a load reads the store
+        self._load_lock = threading.Lock()
+
+    def __len__(self):
+        return int(self._active.view().sum())
+
+    def add(self, record, key=None):
+        """Index a saved candidate record; a record with the same key replaces the earlier one."""
+        skill_ids = record.get("tech_stack_normalized")
+        if skill_ids is None:
+            skill_ids = self.taxonomy.normalize(record.get("tech_stack") or "")
+        self._add(record, skill_ids, key)
+
+    def add_many(self, records, keys=None):
+        """add() for many records, normalizing the tech stacks that need it in one batch."""
+        keys = keys or [None] * len(records)
+        pending = [i for i, record in enumerate(records) if record.get("tech_stack_normalized") is None]
+        normalized = self.taxonomy.normalize_batch([records[i].get("tech_stack") or "" for i in pending])
+        skill_lists = [record.get("tech_stack_normalized") for record in records]
+        for i, skill_ids in zip(pending, normalized):
+            skill_lists[i] = skill_ids
+        for record, skill_ids, key in zip(records, skill_lists, keys):
+            self._add(record, skill_ids, key)
+
+    def load_store(self, store):
+        """Index the candidates in store saved since the last load; returns how many were added."""
+        with self._load_lock:
+            records = []
+            keys = []
+            loaded_id = self._loaded_id
+            for candidate_id, record in store.iter_records(after_id=loaded_id):
+                loaded_id = candidate_id
+                # Candidates saved by this process were added as they were saved
+                if candidate_id not in self._keys:
+                    records.append(record)
+                    keys.append(candidate_id)
+            self.add_many(records, keys)
+            self._loaded_id = loaded_id
+            return len(records)
+
+    def remove(self, key):
+        with self._lock:
+            row = self._keys.pop(key, None)
+            if row is not None:
+                self._active.array[row] = False
+
+    def top_k(self, opening, k=DEFAULT_TOP_K):
+        """Return the k best candidates for opening as (score, record) pairs, best first."""
+        return self.top_k_many([opening], k)[0]
+
+    def top_k_many(self, openings, k=DEFAULT_TOP_K):
+        """top_k() for several openings, sharing one snapshot of the index."""
+        with self._lock:
+            n = len(self.records)
+            postings = [(rows.view(), weights.view()) for rows, weights in self._postings]
+            years = self._years.view()
+            city = self._city.view()
+            country = self._country.view()
+            active = self._active.view().copy()
+            records = self.records[:n]
+            location_ids = dict(self._locations)
+        results = []
+        for opening in openings:
+            scores = self._score(opening, n, postings, years, city, country, location_ids)
+            scores[~active] = -np.inf
+            count = min(k, n)
+            if count == 0:
+                results.append([])
+                continue
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            results.append([(round(float(scores[i]), 4), records[i]) for i in best.tolist() if scores[i] > 0])
+        return results
+
+    def _score(self, opening, n, postings, years, city, country, location_ids):
+        """Scores of all n candidates for opening, in [0, 1]."""
+        columns = {self.columns[skill_id] for skill_id in opening.skills if skill_id in self.columns}
+        if not columns:
+            # Nothing to match on; experience and location alone don't make a match
+            return np.zeros(n)
+        rows = np.concatenate([postings[column][0] for column in columns])
+        weights = np.concatenate([postings[column][1] for column in columns])
+        skills = np.bincount(rows, weights=weights, minlength=n) / len(columns)
+
+        if opening.min_experience:
+            # Unknown experience counts as none
+            experience = np.nan_to_num(np.minimum(years / opening.min_experience, 1.0), nan=0.0)
+        else:
+            experience = np.ones(n)
+
+        if opening.locations:
+            accepted = np.zeros(len(location_ids), dtype=np.bool_)
+            accepted[[location_ids[loc] for loc in opening.locations if loc in location_ids]] = True
+            location = (accepted[city] | accepted[country]).astype(np.float64)
+        else:
+            location = np.ones(n)
+
+        scores = (self.weights["skills"] * skills + self.weights["experience"] * experience
+                  + self.weights["location"] * location)
+        # Candidates without any of the opening's skills are not matches
+        scores[skills == 0] = 0.0
+        return scores
+
+    def _row_entries(self, skill_ids):
+        """Columns and weights of one candidate's skill row."""
+        entries = {}
+        for skill_id in skill_ids:
+            column = self.columns.get(skill_id)
+            if column is None:
+                continue
+            entries[column] = 1.0
+            skill = self.taxonomy.skills[skill_id]
+            while skill.parent is not None:
+                skill = self.taxonomy.skills[skill.parent]
+                parent = self.columns[skill.id]
+                entries[parent] = max(entries.get(parent, 0.0), PARENT_SKILL_WEIGHT)
+        return entries
+
+    def _location_id(self, key):
+        location_id = self._locations.get(key)
+        if location_id is None:
+            location_id = self._locations[key] = len(self._locations)
+        return location_id
+
+    def _add(self, record, skill_ids, key):
+        entries = self._row_entries(skill_ids)
+        city, country = location_keys(record.get("location"))
+        with self._lock:
+            row = len(self.records)
+            if key is not None:
+                previous = self._keys.get(key)
+                if previous is not None:
+                    self._active.array[previous] = False
+                self._keys[key] = row
+            for column, weight in entries.items():
+                rows, weights = self._postings[column]
+                rows.extend([row])
+                weights.extend([weight])
+            self._years.extend([parse_years(record.get("experience"))])
+            self._city.extend([self._location_id(city)])
+            self._country.extend([self._location_id(country)])
+            self._active.extend([True])
+            self.records.append(record)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_matching_index():
+    """Return the process-wide index, loaded from the candidate store on first use; None without NumPy."""
+    global _index
+    if np is None:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = MatchingIndex()
+            added = _index.load_store(get_candidate_store())
+            logger.info("Matching index loaded with %d candidates", added)
+        return _index
+
+
+def index_saved_candidate(record, candidate_id):
+    """Add a freshly saved record to the index, if it has been loaded."""
+    if _index is not None:
+        _index.add(record, candidate_id)
@@ -0,0 +1,340 @@
+# metrics.py
+"""LLM cost, token and latency metrics.
+
+A small in-process registry of labelled counters and histograms, rendered in
+the Prometheus text exposition format. Set METRICS_PORT to serve /metrics
+over HTTP; the admin panel in app.py reads the same registry through
+summary().
+
+Prices are US dollars per 1K tokens and can be overridden with a JSON file
+named by LLM_PRICES_PATH: {"gpt-4": {"prompt": 0.03, "completion": 0.06}}.
+"""
+import os
+import json
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DEFAULT_PRICES = {
+    "gpt-4": {"prompt": 0.03, "completion": 0.06},
+    "gpt-4o-mini": {"prompt": 0.00015, "completion": 0.0006},
+    "gpt-3.5-turbo": {"prompt": 0.0005, "completion": 0.0015}
+}
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def values(self):
+        with self._lock:
+            return {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile by interpolating within buckets, like histogram_quantile."""
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        state = self.values().get(key)
+        if state is None or state[2] == 0:
+            return None
+        counts, _, count = state
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets, counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = upper
+        # Above the largest bucket all that is known is the lower bound
+        return self.buckets[-1]
+
+    def render(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if upper == float("inf") else repr(upper)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class StatsCollector:
+    """Gauges read from a component's stats() whenever they are rendered.
+
+    stats returns a dict, or None while the component is not in use. Each
+    number in it becomes the gauge {prefix}_{key}, and each dict of numbers
+    one gauge labelled by its keys. label names that label, or maps stats
+    keys to label names when they differ.
+    """
+
+    # Renders its own HELP and TYPE lines, one family per key
+    kind = None
+
+    def __init__(self, prefix, documentation, stats, label="key"):
+        self.name = prefix
+        self.documentation = documentation
+        self.label = label
+        self._stats = stats
+
+    def values(self):
+        try:
+            return self._stats() or {}
+        except Exception:
+            logger.exception("Could not collect %s", self.name)
+            return {}
+
+    def reset(self):
+        """Components own their counters; nothing to clear here."""
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self.values().items()):
+            if isinstance(value, dict):
+                label = self.label.get(key, "key") if isinstance(self.label, dict) else self.label
+                samples = [(_format_labels((label,), (k,)), v) for k, v in sorted(value.items(), key=str)
+                           if _is_number(v)]
+            else:
+                samples = [("", value)] if _is_number(value) else []
+            if not samples:
+                continue
+            name = f"{self.name}_{key}"
+            lines.append(f"# HELP {name} {self.documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{labels} {v}" for labels, v in samples)
+        return lines
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collectors(self):
+        return [metric for metric in self._metrics if isinstance(metric, StatsCollector)]
+
+    def reset(self):
+        """Clear every metric, e.g. between benchmark phases."""
+        for metric in self._metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            if metric.kind is not None:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+METRIC_PREFIX = "talentscout_"
+
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "talentscout_llm_requests_total", "LLM calls by outcome.", ("task", "model", "outcome")))
+LLM_PROMPT_TOKENS = REGISTRY.register(Counter(
+    "talentscout_llm_prompt_tokens_total", "Prompt tokens sent.", ("task", "model")))
+LLM_COMPLETION_TOKENS = REGISTRY.register(Counter(
+    "talentscout_llm_completion_tokens_total", "Completion tokens received.", ("task", "model")))
+LLM_COST = REGISTRY.register(Counter(
+    "talentscout_llm_cost_dollars_total", "Estimated spend in US dollars.", ("task", "model")))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "talentscout_llm_request_duration_seconds", "Wall-clock duration of LLM calls.", ("task", "model")))
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.register(Histogram(
+    "talentscout_llm_time_to_first_token_seconds", "Time to the first streamed chunk.", ("task", "model")))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "talentscout_llm_retries_total", "Retried LLM attempts.", ("task", "model")))
+LLM_FALLBACKS = REGISTRY.register(Counter(
+    "talentscout_llm_fallbacks_total", "Times a slower or local path replaced the preferred one.",
+    ("task", "fallback")))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "talentscout_question_cache_lookups_total", "Question lookups by cache layer and result.",
+    ("cache", "result")))
+
+_prices = None
+_prices_lock = threading.Lock()
+
+
+def get_prices():
+    """Return per-model prices, merged with LLM_PRICES_PATH if set."""
+    global _prices
+    with _prices_lock:
+        if _prices is None:
+            _prices = {model: dict(price) for model, price in DEFAULT_PRICES.items()}
+            if os.getenv("LLM_PRICES_PATH"):
+                with open(os.getenv("LLM_PRICES_PATH")) as f:
+                    for model, price in json.load(f).items():
+                        _prices.setdefault(model, {}).update(price)
+        return _prices
+
+
+def record_llm_call(task, model, outcome, seconds, prompt_tokens=0, completion_tokens=0,
+                    time_to_first_token=None):
+    """Record one finished LLM call."""
+    LLM_REQUESTS.inc(task=task, model=model, outcome=outcome)
+    LLM_LATENCY.observe(seconds, task=task, model=model)
+    if time_to_first_token is not None:
+        LLM_TIME_TO_FIRST_TOKEN.observe(time_to_first_token, task=task, model=model)
+    if prompt_tokens or completion_tokens:
+        LLM_PROMPT_TOKENS.inc(prompt_tokens, task=task, model=model)
+        LLM_COMPLETION_TOKENS.inc(completion_tokens, task=task, model=model)
+        price = get_prices().get(model)
+        if price:
+            cost = (prompt_tokens * price.get("prompt", 0) + completion_tokens * price.get("completion", 0)) / 1000
+            LLM_COST.inc(cost, task=task, model=model)
+
+
+def summary():
+    """Return per task and model rows for display, plus fallback and cache counts and component stats."""
+    rows = {}
+    for (task, model, outcome), count in LLM_REQUESTS.values().items():
+        row = rows.setdefault((task, model), {"task": task, "model": model, "calls": 0, "errors": 0})
+        row["calls"] += count
+        if outcome != "ok":
+            row["errors"] += count
+    for (task, model), row in rows.items():
+        row["prompt_tokens"] = LLM_PROMPT_TOKENS.values().get((task, model), 0)
+        row["completion_tokens"] = LLM_COMPLETION_TOKENS.values().get((task, model), 0)
+        row["cost_usd"] = round(LLM_COST.values().get((task, model), 0.0), 4)
+        row["retries"] = LLM_RETRIES.values().get((task, model), 0)
+        for q in (0.5, 0.95):
+            value = LLM_LATENCY.quantile(q, task=task, model=model)
+            row[f"p{int(q * 100)}_seconds"] = round(value, 3) if value is not None else None
+        ttft = LLM_TIME_TO_FIRST_TOKEN.quantile(0.5, task=task, model=model)
+        row["p50_first_token_seconds"] = round(ttft, 3) if ttft is not None else None
+    return {
+        "calls": sorted(rows.values(), key=lambda r: (r["task"], r["model"])),
+        "fallbacks": {f"{task}:{fallback}": count for (task, fallback), count in LLM_FALLBACKS.values().items()},
+        "cache": {f"{cache}:{result}": count for (cache, result), count in CACHE_LOOKUPS.values().items()},
+        "components": {
+            collector.name[len(METRIC_PREFIX):]: stats
+            for collector in REGISTRY.collectors() for stats in [collector.values()] if stats
+        }
+    }
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug("metrics: " + format, *args)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host="0.0.0.0", port=None):
+    """Serve /metrics in a background thread once per process.
+
+    Returns the server, or None when no port is given or set in METRICS_PORT.
+    """
+    global _server
+    port = port if port is not None else int(os.getenv("METRICS_PORT", 0))
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit worker) already serves it
+                logger.warning("Could not start metrics server on port %s: %s", port, e)
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+        return _server
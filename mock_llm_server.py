@@ -0,0 +1,228 @@
+# mock_llm_server.py
+"""OpenAI-compatible stand-in server for offline runs and benchmarks.
+
+Serves POST /v1/chat/completions (streaming and non-streaming) with canned
+technical questions, and can inject latency and errors:
+
+    python mock_llm_server.py --port 8001 --latency 0.8 --jitter 0.3 --error-rate 0.05
+    python mock_llm_server.py --latency 0.8 --jitter 0.5 --distribution lognormal
+
+Point the app at it with LLM_BASE_URL=http://127.0.0.1:8001/v1.
+"""
+import re
+import sys
+import math
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_QUESTIONS = [
+    "How would you explain the core concepts of {topic} to a junior developer?",
+    "Describe a performance problem you diagnosed in a project using {topic}. How did you find and fix it?",
+    "What are the most common pitfalls when working with {topic}, and how do you avoid them?",
+    "How would you design and test a small service built with {topic} that must handle a sudden spike in traffic?",
+    "Which recent changes in the {topic} ecosystem have affected how you write code?"
+]
+
+
+LATENCY_DISTRIBUTIONS = {
+    "uniform": lambda latency, jitter: latency + random.uniform(0, jitter),
+    "exponential": lambda latency, jitter: latency + (random.expovariate(1 / jitter) if jitter else 0.0),
+    "lognormal": lambda latency, jitter: latency * math.exp(random.gauss(0, jitter))
+}
+
+
+class MockConfig:
+    """Latency and error injection settings for the mock server.
+
+    The distribution decides what jitter means:
+        uniform      latency plus a uniform extra in [0, jitter]
+        exponential  latency plus an exponential extra with mean jitter
+        lognormal    median latency with a log-space standard deviation of
+                     jitter, for the long tail real APIs show
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, token_delay=0.0, error_rate=0.0,
+                 error_status=500, retry_after=None, distribution="uniform"):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}")
+        # Seconds before the first byte of the response
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        # Seconds between streamed chunks
+        self.token_delay = token_delay
+        # Fraction of requests answered with error_status
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Retry-After header sent with error responses
+        self.retry_after = retry_after
+
+    def sample_latency(self):
+        """Seconds to wait before answering a request."""
+        return LATENCY_DISTRIBUTIONS[self.distribution](self.latency, self.jitter)
+
+
+def mock_questions(topic):
+    return [q.format(topic=topic) for q in MOCK_QUESTIONS]
+
+
+def mock_completion_text(messages):
+    """Build a deterministic completion for the last user message."""
+    prompt = messages[-1]["content"] if messages else ""
+
+    # Batched prompts list their candidates as JSON
+    match = re.search(r"Candidates \(JSON\):\s*(\[.*?\])\s*\n\n", prompt, re.DOTALL)
+    if match:
+        candidates = json.loads(match.group(1))
+        return json.dumps({c["id"]: mock_questions(c["tech_stack"]) for c in candidates})
+
+    match = re.search(r"answering this question: (.*)", prompt)
+    if match:
+        return f"Following up on that: which trade-offs did you weigh, and what would you do differently today? ({match.group(1).strip()[:60]})"
+
+    # History summaries keep the turn count so folding can be checked
+    match = re.search(r"New turns:\n(.*)", prompt, re.DOTALL)
+    if match:
+        turns = re.findall(r"^(?:user|assistant): ", match.group(1), re.MULTILINE)
+        return f"The candidate and interviewer exchanged {len(turns)} more messages about their background."
+
+    match = re.search(r"tech stack \(([^)]*)\)", prompt)
+    topic = match.group(1).strip() if match else "your main technologies"
+    if '"questions"' in prompt:
+        difficulties = ["foundational", "intermediate", "intermediate", "advanced", "advanced"]
+        items = [{"question": q, "difficulty": d} for q, d in zip(mock_questions(topic), difficulties)]
+        return json.dumps({"questions": items}, indent=2)
+    return "\n".join(f"{i}. {q}" for i, q in enumerate(mock_questions(topic), 1))
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "invalid JSON"}})
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        config = self.server.config
+        time.sleep(config.sample_latency())
+        if random.random() < config.error_rate:
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = str(config.retry_after)
+            return self._send_json(config.error_status, {"error": {"message": "injected error"}}, headers)
+
+        model = body.get("model", "mock")
+        text = mock_completion_text(body.get("messages", []))
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4,
+                 "total_tokens": prompt_tokens + len(text) // 4}
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._send_stream(model, text, usage if include_usage else None)
+        else:
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+    def _send_json(self, status, data, headers=None):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model, text, usage=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Stream a few words per event, roughly like real token deltas
+        words = re.findall(r"\S+\s*", text)
+        for i in range(0, len(words), 3):
+            event = {"model": model, "choices": [{"index": 0, "delta": {"content": "".join(words[i:i + 3])}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            if self.server.config.token_delay:
+                time.sleep(self.server.config.token_delay)
+        if usage is not None:
+            self._write_chunk(f"data: {json.dumps({'model': model, 'choices': [], 'usage': usage})}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None):
+        super().__init__(address, MockLLMHandler)
+        self.config = config or MockConfig()
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on purpose when they cancel or time out a call
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_mock_server(host="127.0.0.1", port=0, config=None):
+    """Start a mock server on a background thread and return it."""
+    server = MockLLMServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an OpenAI-compatible mock LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--jitter", type=float, default=0.0, help="spread of the latency in seconds")
+    parser.add_argument("--distribution", choices=sorted(LATENCY_DISTRIBUTIONS), default="uniform",
+                        help="latency distribution, see MockConfig")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header on errors")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.token_delay, args.error_rate,
+                        args.error_status, args.retry_after, args.distribution)
+    server = MockLLMServer((args.host, args.port), config)
+    print(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# mock_redis_server.py
+"""In-memory stand-in for a Redis server, for running checkpoints locally.
+
+Speaks enough of the Redis protocol for RedisCheckpointStore: PING, AUTH,
+SELECT, HSET, HGET, HGETALL, RPUSH, LRANGE, DEL, EXPIRE and EXISTS.
+
+    python mock_redis_server.py --port 6379
+
+Point the app at it with CHECKPOINT_STORE=redis://127.0.0.1:6379/0.
+"""
+import sys
+import time
+import argparse
+import threading
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+
+
+class MockRedisHandler(StreamRequestHandler):
+    def handle(self):
+        db = 0
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            name = command[0].upper()
+            if name == b"SELECT":
+                db = int(command[1])
+                reply = "OK"
+            else:
+                reply = self.server.execute(db, name, command[1:])
+            self.wfile.write(_encode_reply(reply))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+class MockRedisServer(ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, MockRedisHandler)
+        self._lock = threading.Lock()
+        # (db, key) -> dict or list, and (db, key) -> expiry on the monotonic clock
+        self._data = {}
+        self._expires = {}
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def execute(self, db, name, args):
+        with self._lock:
+            if name == b"PING":
+                return "PONG"
+            if name == b"AUTH":
+                return "OK"
+            if name == b"DEL":
+                for key in args:
+                    self._expires.pop((db, key), None)
+                return sum(self._data.pop((db, key), None) is not None for key in args)
+            if name == b"EXISTS":
+                return sum(self._get(db, key) is not None for key in args)
+            if name == b"EXPIRE":
+                key = (db, args[0])
+                if self._get(db, args[0]) is None:
+                    return 0
+                self._expires[key] = time.monotonic() + int(args[1])
+                return 1
+            if name == b"HSET":
+                values = self._data.setdefault((db, args[0]), {})
+                added = 0
+                for i in range(1, len(args), 2):
+                    added += args[i] not in values
+                    values[args[i]] = args[i + 1]
+                return added
+            if name == b"HGET":
+                return (self._get(db, args[0]) or {}).get(args[1])
+            if name == b"HGETALL":
+                values = self._get(db, args[0]) or {}
+                return [item for pair in values.items() for item in pair]
+            if name == b"RPUSH":
+                values = self._data.setdefault((db, args[0]), [])
+                values.extend(args[1:])
+                return len(values)
+            if name == b"LRANGE":
+                values = self._get(db, args[0]) or []
+                start, stop = int(args[1]), int(args[2])
+                return values[start:None if stop == -1 else stop + 1]
+            return Exception(f"ERR unknown command '{name.decode('latin-1')}'")
+
+    def _get(self, db, key):
+        key = (db, key)
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+
+def _encode_reply(reply):
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode("utf-8")
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode("utf-8")
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode("ascii")
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, bytes):
+        return f"${len(reply)}\r\n".encode("ascii") + reply + b"\r\n"
+    return f"*{len(reply)}\r\n".encode("ascii") + b"".join(_encode_reply(item) for item in reply)
+
+
+def start_mock_redis(host="127.0.0.1", port=0):
+    """Start a mock Redis server on a background thread and return it."""
+    server = MockRedisServer((host, port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an in-memory Redis stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = MockRedisServer((args.host, args.port))
+    print(f"Mock Redis server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -46,8 +46,70 @@ The questions should:
 - Be relevant to the position they're applying for ({position})
 - Be specific to each technology mentioned, not generic
 - Be clear and concise
+Respond with only JSON in this format, ordered from foundational to advanced:
+{{"questions": [{{"question": "...", "difficulty": "foundational|intermediate|advanced"}}]}}
 """
 
+GROUP_TECH_QUESTION_GENERATION_PROMPT = """
+Based on the {category} part of the candidate's tech stack ({technologies}), generate {count} appropriate technical questions to assess their proficiency.
+The questions should:
+- Go from foundational to advanced, in that order
+- Be relevant to the position they're applying for ({position})
+- Be specific to the technologies listed, not generic
+- Be clear and concise
+Respond with only JSON in this format, ordered from foundational to advanced:
+{{"questions": [{{"question": "...", "difficulty": "foundational|intermediate|advanced"}}]}}
+"""
+
+BATCH_TECH_QUESTION_GENERATION_PROMPT = """
+For each candidate below, generate 3-5 appropriate technical questions to assess their proficiency in their tech stack.
+The questions should:
+- Range from foundational to advanced concepts
+- Include at least one problem-solving scenario
+- Be relevant to the position the candidate is applying for
+- Be specific to each technology mentioned, not generic
+- Be clear and concise
+
+Candidates (JSON):
+{candidates}
+
+Respond with only a JSON object that maps each candidate id to a list of question strings, for example {{"1": ["...", "..."]}}.
+"""
+
+FOLLOW_UP_QUESTION_PROMPT = """
+The candidate is now answering this question: {question}
+Write one follow-up question that probes the same topic one level deeper, to be asked after they answer.
+It must make sense whatever their answer is. Return only the question.
+"""
+
+QUESTION_BANK_GENERATION_PROMPT = """
+Generate {count} {difficulty} technical interview questions about {technology} for a candidate applying for a {family} position.
+Each question should be self-contained, clear and concise.
+Respond with only JSON in this format, ordered from foundational to advanced:
+{{"questions": [{{"question": "...", "difficulty": "foundational|intermediate|advanced"}}]}}
+"""
+
+HISTORY_SUMMARY_PROMPT = """
+Summarize this part of a screening interview for a recruiter in at most {words} words.
+Keep the candidate's answers, the technologies and experience they mentioned, and any open points.
+Start from the summary so far and extend it with the new turns.
+
+Summary so far:
+{summary}
+
+New turns:
+{transcript}
+"""
+
+# Used when no generated questions are available in time
+LOCAL_QUESTION_TEMPLATES = [
+    "What are the core concepts of {technology} that you rely on most in your day-to-day work?",
+    "Describe a challenging project where you used {technology}. What problems did you run into and how did you solve them?",
+    "How do you test and debug code that uses {technology}?",
+    "How would you improve the performance of an application built with {technology}?",
+    "What trade-offs would you consider when choosing {technology} for a new {position} project?"
+]
+
 CONVERSATION_END_PROMPT = """
 Thank you for your time today, {name}! We've collected your information and assessed your technical background.
 
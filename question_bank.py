@@ -0,0 +1,259 @@
+# question_bank.py
+"""Precomputed per-technology question bank.
+
+The bank is built offline (``python question_bank.py build``) and written to a
+compact read-only file. Every worker process memory-maps the same file, so all
+of them share one physical copy through the page cache and lookups are a
+binary search over fixed-size records.
+
+File layout (little endian):
+    header   magic "TSQB", version u16, reserved u16, record count u32
+    records  count x (key hash u64, blob offset u32, blob length u32), sorted by hash
+    blob     UTF-8 question pools, one question per line
+"""
+import os
+import re
+import mmap
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from utils import TECH_CATEGORIES
+from question_parser import parse_questions
+from llm_client import LLMError
+from routing import get_router
+from admission import PRIORITY_BACKGROUND
+from prompts import SYSTEM_PROMPT, QUESTION_BANK_GENERATION_PROMPT, LOCAL_QUESTION_TEMPLATES
+
+DEFAULT_BANK_PATH = os.path.join("data", "question_bank.bin")
+DEFAULT_MIN_COVERAGE = 1.0
+
+BANK_MAGIC = b"TSQB"
+BANK_VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+RECORD = struct.Struct("<QII")
+
+DIFFICULTIES = ("foundational", "intermediate", "advanced")
+
+# Difficulty of each question slot, ramping from foundational to advanced
+QUESTION_PLAN = ("foundational", "intermediate", "intermediate", "advanced", "advanced")
+
+# Position families and the keywords that identify them
+POSITION_FAMILIES = {
+    "fullstack": ["full stack", "fullstack", "full-stack"],
+    "frontend": ["frontend", "front end", "front-end", "ui", "web"],
+    "backend": ["backend", "back end", "back-end", "api", "server"],
+    "mobile": ["mobile", "android", "ios"],
+    "devops": ["devops", "sre", "site reliability", "cloud", "infrastructure", "platform"],
+    "data": ["data", "machine learning", "ml", "ai", "scientist", "analyst"]
+}
+DEFAULT_FAMILY = "general"
+
+
+def position_family(position):
+    """Map a free-text position to a position family."""
+    text = (position or "").lower()
+    for family, keywords in POSITION_FAMILIES.items():
+        if any(re.search(r'\b' + re.escape(keyword) + r'\b', text) for keyword in keywords):
+            return family
+    return DEFAULT_FAMILY
+
+
+def bank_key(technology, family, difficulty):
+    """Hash a pool key to the 64-bit value stored in the record table."""
+    key = f"{technology}|{family}|{difficulty}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def write_question_bank(path, pools):
+    """Write pools ({(technology, family, difficulty): [questions]}) to path."""
+    records = []
+    blob = bytearray()
+    for (technology, family, difficulty), questions in pools.items():
+        # Questions are stored one per line
+        lines = [" ".join(q.split()) for q in questions if q.strip()]
+        if not lines:
+            continue
+        data = "\n".join(lines).encode("utf-8")
+        records.append((bank_key(technology, family, difficulty), len(blob), len(data)))
+        blob += data
+    records.sort()
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    # Write to a temporary file first so running workers never map a partial bank
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, len(records)))
+        blob_start = HEADER.size + RECORD.size * len(records)
+        for key, offset, length in records:
+            f.write(RECORD.pack(key, blob_start + offset, length))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+class QuestionBank:
+    """Read-only, memory-mapped view of a question bank file."""
+
+    def __init__(self, path=DEFAULT_BANK_PATH, min_coverage=DEFAULT_MIN_COVERAGE):
+        self.path = path
+        self.min_coverage = min_coverage
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != BANK_MAGIC or version != BANK_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {BANK_VERSION} question bank")
+
+    def lookup(self, technology, family, difficulty):
+        """Return the question pool for a key, or an empty list."""
+        key = bank_key(technology, family, difficulty)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, offset, length = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return self._map[offset:offset + length].decode("utf-8").split("\n")
+        return []
+
+    def pools_for(self, technology, family):
+        """Return {difficulty: questions} for a technology, falling back to the general family."""
+        for candidate in (family, DEFAULT_FAMILY):
+            pools = {d: self.lookup(technology, candidate, d) for d in DIFFICULTIES}
+            if any(pools.values()):
+                return pools
+        return {}
+
+    def assemble(self, technologies, position, count=len(QUESTION_PLAN), min_coverage=None):
+        """Assemble questions for an extract_technologies result.
+
+        Returns None when the bank covers less than min_coverage of the stack,
+        in which case the caller should generate questions with the LLM.
+        """
+        if min_coverage is None:
+            min_coverage = self.min_coverage
+        keywords = list(dict.fromkeys(kw for kws in technologies.values() for kw in kws))
+        if not keywords:
+            return None
+
+        family = position_family(position)
+        covered = {}
+        for keyword in keywords:
+            pools = self.pools_for(keyword, family)
+            if pools:
+                covered[keyword] = pools
+        if not covered or len(covered) / len(keywords) < min_coverage:
+            return None
+
+        # Rotate through the covered technologies while difficulty ramps up
+        questions = []
+        order = list(covered)
+        random.shuffle(order)
+        for slot in range(count):
+            pools = covered[order[slot % len(order)]]
+            difficulty = QUESTION_PLAN[min(slot, len(QUESTION_PLAN) - 1)]
+            pool = [q for q in pools.get(difficulty) or [] if q not in questions]
+            if not pool:
+                pool = [q for d in DIFFICULTIES for q in pools.get(d) or [] if q not in questions]
+            if pool:
+                questions.append(random.choice(pool))
+        return questions or None
+
+    def close(self):
+        self._map.close()
+
+
+_question_bank = None
+_question_bank_loaded = False
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Return the process-wide question bank, or None if no bank file exists."""
+    global _question_bank, _question_bank_loaded
+    with _question_bank_lock:
+        if not _question_bank_loaded:
+            path = os.getenv("QUESTION_BANK_PATH", DEFAULT_BANK_PATH)
+            if os.path.exists(path):
+                _question_bank = QuestionBank(
+                    path,
+                    min_coverage=float(os.getenv("QUESTION_BANK_MIN_COVERAGE", DEFAULT_MIN_COVERAGE))
+                )
+            _question_bank_loaded = True
+        return _question_bank
+
+
+def local_questions(technologies, position, count=len(QUESTION_PLAN)):
+    """Return questions without calling the LLM.
+
+    Uses whatever the question bank covers and fills the rest from templates.
+    """
+    bank = get_question_bank()
+    questions = []
+    if bank is not None:
+        questions = bank.assemble(technologies, position, count, min_coverage=0.0) or []
+
+    keywords = list(dict.fromkeys(kw for kws in technologies.values() for kw in kws))
+    keywords = keywords or ["your primary technical skills"]
+    for slot, template in enumerate(LOCAL_QUESTION_TEMPLATES[len(questions):count], len(questions)):
+        questions.append(template.format(technology=keywords[slot % len(keywords)], position=position or "technical"))
+    return questions
+
+
+def generate_pool(technology, family, difficulty, count):
+    """Ask the LLM for one question pool."""
+    prompt = QUESTION_BANK_GENERATION_PROMPT.format(
+        count=count, difficulty=difficulty, technology=technology, family=family
+    )
+    completion = get_router().complete(
+        "question_bank",
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        # Pre-generation must not hold up live interviews
+        priority=PRIORITY_BACKGROUND
+    )
+    return parse_questions(completion.text)
+
+
+def build_question_bank(path, families, per_pool):
+    """Generate pools for every known technology and write the bank file."""
+    technologies = list(dict.fromkeys(kw for kws in TECH_CATEGORIES.values() for kw in kws))
+    pools = {}
+    for technology in technologies:
+        for family in families:
+            for difficulty in DIFFICULTIES:
+                try:
+                    pools[(technology, family, difficulty)] = generate_pool(technology, family, difficulty, per_pool)
+                except LLMError as e:
+                    print(f"Error generating {difficulty} {technology} questions for {family}: {e}")
+    return write_question_bank(path, pools)
+
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Build the precomputed technical question bank.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="generate question pools and write the bank file")
+    build.add_argument("--output", default=DEFAULT_BANK_PATH)
+    build.add_argument("--per-pool", type=int, default=5, help="questions per technology, family and difficulty")
+    build.add_argument("--families", nargs="+", default=list(POSITION_FAMILIES) + [DEFAULT_FAMILY])
+    args = parser.parse_args()
+
+    load_dotenv()
+    count = build_question_bank(args.output, args.families, args.per_pool)
+    print(f"Wrote {count} question pools to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# question_cache.py
+import os
+import re
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from skill_taxonomy import get_skill_taxonomy
+from metrics import REGISTRY, StatsCollector
+
+# Defaults, overridable through environment variables
+DEFAULT_CACHE_PATH = os.path.join("data", "question_cache.db")
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_CACHE_VARIANTS = 1
+DEFAULT_CACHE_MAX_SERVES = 20
+# Seconds between writes of the served counts to SQLite
+DEFAULT_CACHE_FLUSH_INTERVAL = 5.0
+
+
+def normalize_position(position):
+    """Normalize a free-text position for use in a cache key."""
+    words = re.findall(r"[a-z0-9+#.]+", (position or "").lower())
+    return " ".join(words)
+
+
+def make_cache_key(tech_stack, position, skill_ids=None):
+    """Build a cache key from the canonical skill set and the position.
+
+    skill_ids is the normalized tech stack, if the caller already has it.
+    """
+    if skill_ids is None:
+        skill_ids = get_skill_taxonomy().normalize(tech_stack or "")
+    keywords = sorted(set(skill_ids))
+    if not keywords:
+        # Nothing recognised, fall back to the normalized words themselves
+        keywords = sorted(set(re.findall(r"[a-z0-9+#.]+", (tech_stack or "").lower())))
+    return ",".join(keywords) + "|" + normalize_position(position)
+
+
+class QuestionCache:
+    """LRU + TTL cache of generated question lists, backed by SQLite.
+
+    Each key holds up to `variants` question lists. A variant is served at
+    most `max_serves` times (0 means no limit) before it is retired, and a
+    lookup misses while fewer than `variants` live variants exist so that
+    callers regenerate and the questions don't go stale. With the default
+    of one variant the first stored list is served right away; with more,
+    the first `variants` lookups of a new key all miss.
+
+    Hits only count serves in memory. The counts are added to SQLite in one
+    transaction at most every `flush_interval` seconds, on put() and at
+    exit, and read back at the same time, so processes sharing the database
+    see each other's serves (and retirements) within one interval; until
+    then a variant may be served a few times past max_serves.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_size=DEFAULT_CACHE_SIZE,
+                 ttl=DEFAULT_CACHE_TTL, variants=DEFAULT_CACHE_VARIANTS,
+                 max_serves=DEFAULT_CACHE_MAX_SERVES, flush_interval=DEFAULT_CACHE_FLUSH_INTERVAL):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.max_serves = max_serves
+        self.flush_interval = flush_interval
+        self._entries = OrderedDict()
+        # Serves not yet written to SQLite: variant ID -> count
+        self._unflushed = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "expired": 0, "retired": 0}
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS question_cache ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "key TEXT NOT NULL, "
+                "questions TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "served INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS question_cache_key ON question_cache (key)")
+            self._db.commit()
+
+    def get(self, key):
+        """Return a cached question list for key, or None on a miss."""
+        with self._lock:
+            variants = self._load(key)
+            if len(variants) < self.variants:
+                self.misses += 1
+                return None
+
+            # Serve the least used variant to spread questions evenly
+            variant = min(variants, key=lambda v: v["served"])
+            variant["served"] += 1
+            self.hits += 1
+            if self.max_serves and variant["served"] >= self.max_serves:
+                variants.remove(variant)
+                self.evictions["retired"] += 1
+                self._unflushed.pop(variant["id"], None)
+                self._execute("DELETE FROM question_cache WHERE id = ?", variant)
+            elif variant["id"] is not None:
+                self._unflushed[variant["id"]] = self._unflushed.get(variant["id"], 0) + 1
+                if time.monotonic() - self._flushed_at >= self.flush_interval:
+                    self._flush()
+            return list(variant["questions"])
+
+    def put(self, key, questions):
+        """Store a freshly generated question list as a new variant of key."""
+        if not questions:
+            return
+        with self._lock:
+            variants = self._load(key)
+            variant = {
+                "id": None,
+                "questions": list(questions),
+                "created_at": time.time(),
+                # The generating request counts as the first serve
+                "served": 1
+            }
+            if self._db is not None:
+                cursor = self._db.execute(
+                    "INSERT INTO question_cache (key, questions, created_at, served) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(variant["questions"]), variant["created_at"], variant["served"])
+                )
+                variant["id"] = cursor.lastrowid
+                # Commits the insert together with the pending serves
+                self._flush()
+            variants.append(variant)
+
+            # Keep only the newest variants
+            while len(variants) > self.variants:
+                oldest = variants.pop(0)
+                self.evictions["retired"] += 1
+                self._execute("DELETE FROM question_cache WHERE id = ?", oldest)
+
+    def flush(self):
+        """Write the pending served counts to SQLite now."""
+        with self._lock:
+            self._flush()
+
+    def stats(self):
+        """Return hit-rate and eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": dict(self.evictions),
+                "keys_in_memory": len(self._entries)
+            }
+
+    def _load(self, key):
+        """Return the live variants of key, reading through to SQLite."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            variants = self._entries[key]
+        else:
+            variants = []
+            if self._db is not None:
+                rows = self._db.execute(
+                    "SELECT id, questions, created_at, served FROM question_cache WHERE key = ? ORDER BY id",
+                    (key,)
+                ).fetchall()
+                variants = [
+                    {"id": row[0], "questions": json.loads(row[1]), "created_at": row[2], "served": row[3]}
+                    for row in rows
+                ]
+            self._entries[key] = variants
+            # Evict least recently used keys from memory; they stay on disk
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions["lru"] += 1
+
+        # Drop expired variants
+        if self.ttl:
+            cutoff = time.time() - self.ttl
+            for variant in [v for v in variants if v["created_at"] < cutoff]:
+                variants.remove(variant)
+                self.evictions["expired"] += 1
+                self._execute("DELETE FROM question_cache WHERE id = ?", variant)
+        return variants
+
+    def _flush(self):
+        """Add the pending serves to SQLite and take the totals other processes have added."""
+        self._flushed_at = time.monotonic()
+        if self._db is None:
+            self._unflushed.clear()
+            return
+        pending = [(count, variant_id) for variant_id, count in self._unflushed.items()]
+        self._unflushed.clear()
+        if pending:
+            self._db.executemany("UPDATE question_cache SET served = served + ? WHERE id = ?", pending)
+        self._db.commit()
+        if not pending:
+            return
+        ids = [variant_id for _, variant_id in pending]
+        served = {}
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            served.update(self._db.execute(
+                f"SELECT id, served FROM question_cache WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        ids = set(ids)
+        for variants in self._entries.values():
+            for variant in [v for v in variants if v["id"] in ids]:
+                if variant["id"] not in served:
+                    # Retired or expired by another process
+                    variants.remove(variant)
+                    continue
+                variant["served"] = served[variant["id"]]
+                if self.max_serves and variant["served"] >= self.max_serves:
+                    # Used up by the serves of every process together
+                    variants.remove(variant)
+                    self.evictions["retired"] += 1
+                    self._db.execute("DELETE FROM question_cache WHERE id = ?", (variant["id"],))
+        self._db.commit()
+
+    def _execute(self, sql, variant, *params):
+        """Run a write statement for a stored variant, if there is a backing store."""
+        if self._db is not None and variant["id"] is not None:
+            self._db.execute(sql, params + (variant["id"],))
+            self._db.commit()
+
+
+_question_cache = None
+_question_cache_lock = threading.Lock()
+
+REGISTRY.register(StatsCollector(
+    "talentscout_question_cache", "Question cache lookups, hit rate and evictions by reason.",
+    lambda: _question_cache.stats() if _question_cache is not None else None, label="reason"))
+
+
+def get_question_cache():
+    """Return the process-wide question cache, configured from the environment."""
+    global _question_cache
+    with _question_cache_lock:
+        if _question_cache is None:
+            _question_cache = QuestionCache(
+                path=os.getenv("QUESTION_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_size=int(os.getenv("QUESTION_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+                ttl=float(os.getenv("QUESTION_CACHE_TTL", DEFAULT_CACHE_TTL)),
+                variants=int(os.getenv("QUESTION_CACHE_VARIANTS", DEFAULT_CACHE_VARIANTS)),
+                max_serves=int(os.getenv("QUESTION_CACHE_MAX_SERVES", DEFAULT_CACHE_MAX_SERVES)),
+                flush_interval=float(os.getenv("QUESTION_CACHE_FLUSH_INTERVAL", DEFAULT_CACHE_FLUSH_INTERVAL))
+            )
+            atexit.register(_question_cache.flush)
+        return _question_cache
@@ -0,0 +1,203 @@
+# question_parser.py
+"""Incremental parser for structured question lists.
+
+Question generation asks for JSON of the form
+    {"questions": [{"question": "...", "difficulty": "foundational"}, ...]}
+The parser is fed the completion as it streams in and emits every question as
+soon as its object is complete, so the first question can be shown before the
+rest has been generated. Broken items are repaired where possible and dropped
+otherwise; a completion without any JSON falls back to line-by-line parsing.
+"""
+import re
+import json
+from utils import clean_question_line
+
+# Keys that may hold the question text of an item
+QUESTION_KEYS = ("question", "text")
+
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+PARTIAL_UNICODE_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+FENCE = re.compile(r"^\s*```(?:json)?|```\s*$")
+
+
+def _item_question(item):
+    """Return the question text of a parsed item, or None."""
+    if isinstance(item, str):
+        question = item
+    elif isinstance(item, dict):
+        question = next((item[k] for k in QUESTION_KEYS if isinstance(item.get(k), str)), None)
+    else:
+        question = None
+    if question is None:
+        return None
+    return question.strip() or None
+
+
+def _load_item(fragment):
+    """Parse one item, repairing common defects such as trailing commas."""
+    for candidate in (fragment, TRAILING_COMMA.sub(r"\1", fragment)):
+        try:
+            # strict=False accepts raw newlines inside multi-line questions
+            return json.loads(candidate, strict=False)
+        except ValueError:
+            continue
+    return None
+
+
+def _unescape_partial(raw):
+    """Decode the content of a JSON string that is still being streamed."""
+    # Leave out an escape sequence that is cut off at the end
+    if (len(raw) - len(raw.rstrip("\\"))) % 2:
+        raw = raw[:-1]
+    else:
+        raw = PARTIAL_UNICODE_ESCAPE.sub("", raw)
+    try:
+        return json.loads('"' + raw + '"', strict=False)
+    except ValueError:
+        return raw
+
+
+class IncrementalQuestionParser:
+    """Feed streamed completion text, get questions back as they complete."""
+
+    def __init__(self):
+        self.text = ""
+        self.questions = []
+        self.dropped = 0
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        # Stack depth of the array holding the items, once seen
+        self._item_depth = None
+        self._item_start = None
+        self._finished = False
+        # Key/value tracking inside the current item, for partial()
+        self._last_string = None
+        self._key = None
+        self._in_value = False
+        self._value_is_question = False
+
+    def feed(self, chunk):
+        """Consume chunk and return the questions it completed."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self._finished:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(i, completed)
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i + 1
+                self._value_is_question = self._in_value and self._key in QUESTION_KEYS
+            elif c in "{[":
+                self._stack.append(c)
+                if self._item_depth is None:
+                    # The first list opened holds the items
+                    if c == "[":
+                        self._item_depth = len(self._stack)
+                elif c == "{" and len(self._stack) == self._item_depth + 1:
+                    self._item_start = i
+                    self._key = None
+                    self._in_value = False
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                depth = len(self._stack)
+                if self._item_depth is not None:
+                    if c == "}" and depth == self._item_depth and self._item_start is not None:
+                        self._add(_load_item(text[self._item_start:i + 1]), completed)
+                        self._item_start = None
+                    elif c == "]" and depth < self._item_depth:
+                        self._finished = True
+                if self._item_depth is not None and depth == self._item_depth + 1:
+                    # A nested value of the current item ended
+                    self._in_value = False
+            elif c == ":":
+                self._key = self._last_string
+                self._in_value = True
+            elif c == ",":
+                self._in_value = False
+        return completed
+
+    def partial(self):
+        """Return the text of the question currently being streamed, if any."""
+        if not self._in_string or self._item_depth is None:
+            return ""
+        depth = len(self._stack)
+        string_item = depth == self._item_depth
+        object_item = depth == self._item_depth + 1 and self._value_is_question
+        if not (string_item or object_item):
+            return ""
+        return _unescape_partial(self.text[self._string_start:]).strip()
+
+    def close(self):
+        """Finish parsing and return the questions not emitted yet.
+
+        A truncated last item is repaired by closing its open strings and
+        brackets. Text without any JSON list is parsed line by line.
+        """
+        completed = []
+        if self._item_depth is None:
+            self._finished = True
+            item = _load_item(FENCE.sub("", self.text).strip())
+            if isinstance(item, dict):
+                # One object and no list, e.g. {"question": "..."}
+                self._add(item, completed)
+                return completed
+            for line in self.text.strip().split("\n"):
+                question = clean_question_line(line)
+                # Skip the structure of a JSON answer that never opened its list
+                if question and question not in ("{", "}", "```", "```json"):
+                    completed.append(question)
+            self.questions.extend(completed)
+            return completed
+
+        if self._item_start is not None and not self._finished:
+            fragment = self.text[self._item_start:]
+            if self._in_string:
+                fragment = fragment.rstrip("\\") + '"'
+            closers = "".join("}" if c == "{" else "]" for c in reversed(self._stack[self._item_depth:]))
+            self._add(_load_item(fragment + closers), completed)
+        elif self._in_string and len(self._stack) == self._item_depth and not self._finished:
+            self._add(_unescape_partial(self.text[self._string_start:]), completed)
+        self._finished = True
+        return completed
+
+    def _end_string(self, end, completed):
+        value = self.text[self._string_start - 1:end + 1]
+        depth = len(self._stack)
+        if self._item_depth is not None and depth == self._item_depth and not self._finished:
+            # A plain string directly in the list is a question too
+            self._add(_load_item(value), completed)
+        elif not self._in_value:
+            self._last_string = _load_item(value)
+
+    def _add(self, item, completed):
+        question = _item_question(item)
+        if question is None:
+            self.dropped += 1
+            return
+        self.questions.append(question)
+        completed.append(question)
+
+
+def parse_questions(text):
+    """Parse a complete question generation response."""
+    parser = IncrementalQuestionParser()
+    parser.feed(text)
+    parser.close()
+    return parser.questions
@@ -0,0 +1,269 @@
+# routing.py
+"""Task-aware model routing.
+
+Every LLM call names its task. The router maps the task to a model tier with
+its own token budget and temperature, and downgrades to a cheaper, faster
+tier when the admission queue is deep or the caller's latency budget is
+nearly spent. Decisions and per-tier latencies are logged.
+
+Tiers and tasks can be overridden with a JSON file named by LLM_ROUTING_CONFIG:
+    {"tiers": {"premium": {"model": "gpt-4o"}}, "tasks": {"grading": {"tier": "premium"}}}
+New tiers are downgraded to after the default ones unless "tier_order" lists
+every tier from the most capable to the cheapest.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from llm_client import LLMError, LLMCancelledError, LLMTimeoutError, get_backend
+from metrics import REGISTRY, StatsCollector, record_llm_call
+import tracing
+from hedging import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Tiers from slowest and most capable to fastest and cheapest
+TIER_ORDER = ["premium", "standard", "fast"]
+
+DEFAULT_TIERS = {
+    "premium": {"model": "gpt-4"},
+    "standard": {"model": "gpt-4o-mini"},
+    "fast": {"model": "gpt-3.5-turbo"}
+}
+
+DEFAULT_TASKS = {
+    "question_generation": {"tier": "premium", "max_tokens": 1000, "temperature": 0.7},
+    "question_group": {"tier": "premium", "max_tokens": 300, "temperature": 0.7},
+    "question_batch": {"tier": "premium", "max_tokens": 400, "temperature": 0.7},
+    "question_bank": {"tier": "premium", "max_tokens": 600, "temperature": 0.7},
+    "clarification": {"tier": "fast", "max_tokens": 200, "temperature": 0.3},
+    "follow_up": {"tier": "standard", "max_tokens": 300, "temperature": 0.7},
+    "grading": {"tier": "standard", "max_tokens": 500, "temperature": 0.0},
+    "summarization": {"tier": "fast", "max_tokens": 400, "temperature": 0.2}
+}
+
+# Downgrade one tier when this many calls are waiting for admission
+DEFAULT_QUEUE_DEPTH_THRESHOLD = 8
+# Percentile of a tier's observed latency compared against a latency budget
+DEFAULT_BUDGET_PERCENTILE = 90
+
+
+class RoutingConfigError(ValueError):
+    """Raised for tiers, tasks or a tier order that don't fit together."""
+
+
+class Route:
+    """The model and parameters chosen for one call."""
+
+    def __init__(self, task, tier, model, max_tokens, temperature, reason):
+        self.task = task
+        self.tier = tier
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.reason = reason
+
+
+class ModelRouter:
+    """Routes tasks to model tiers and runs calls through the backend."""
+
+    def __init__(self, tiers=None, tasks=None, queue_depth_threshold=DEFAULT_QUEUE_DEPTH_THRESHOLD,
+                 budget_percentile=DEFAULT_BUDGET_PERCENTILE, tier_order=None):
+        self.tiers = tiers or DEFAULT_TIERS
+        self.tasks = tasks or DEFAULT_TASKS
+        self.tier_order = tier_order or _default_tier_order(self.tiers)
+        _validate(self.tiers, self.tasks, self.tier_order)
+        self.queue_depth_threshold = queue_depth_threshold
+        self.budget_percentile = budget_percentile
+        self.latencies = {tier: LatencyTracker() for tier in self.tier_order}
+        self._lock = threading.Lock()
+        self.decisions = {}
+
+    def route(self, task, latency_budget=None):
+        """Choose a tier for task.
+
+        latency_budget is the number of seconds the caller can still afford to
+        wait, if it has a deadline.
+        """
+        config = self.tasks[task]
+        order = self.tier_order
+        index = order.index(config["tier"])
+        reason = "default"
+
+        backend = get_backend()
+        admission = getattr(backend, "admission", None)
+        if admission is not None and admission.queue_depth() >= self.queue_depth_threshold:
+            index += 1
+            reason = "queue_depth"
+
+        # Step down while the tier is usually slower than the remaining budget
+        if latency_budget is not None:
+            while index < len(order) - 1:
+                observed = self.latencies[order[index]].percentile(self.budget_percentile)
+                if observed is None or observed <= latency_budget:
+                    break
+                index += 1
+                reason = "latency_budget"
+
+        tier = order[min(index, len(order) - 1)]
+        route = Route(task, tier, self.tiers[tier]["model"], config["max_tokens"], config["temperature"], reason)
+        with self._lock:
+            self.decisions[(task, tier)] = self.decisions.get((task, tier), 0) + 1
+        logger.info("Routing %s to %s (%s): %s", task, tier, route.model, reason)
+        return route
+
+    def complete(self, task, messages, latency_budget=None, max_tokens=None, **kwargs):
+        """Route task and return a Completion."""
+        route = self.route(task, latency_budget)
+        start = time.monotonic()
+        try:
+            with tracing.span("llm_call", task=task, tier=route.tier, model=route.model, reason=route.reason):
+                completion = get_backend().complete(
+                    messages=messages,
+                    model=route.model,
+                    temperature=route.temperature,
+                    max_tokens=max_tokens or route.max_tokens,
+                    task=task,
+                    **kwargs
+                )
+        except LLMError as e:
+            record_llm_call(task, route.model, _outcome(e), time.monotonic() - start)
+            raise
+        elapsed = time.monotonic() - start
+        self._record(route, elapsed)
+        usage = completion.usage or _estimate_usage(messages, completion.text)
+        record_llm_call(task, route.model, "ok", elapsed,
+                        usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+        return completion
+
+    def stream(self, task, messages, latency_budget=None, max_tokens=None, **kwargs):
+        """Route task and yield its completion text chunk by chunk."""
+        route = self.route(task, latency_budget)
+        start = time.monotonic()
+        first_token = None
+        text = []
+        outcome = "cancelled"
+        usage = None
+        response = get_backend().stream(
+            messages=messages,
+            model=route.model,
+            temperature=route.temperature,
+            max_tokens=max_tokens or route.max_tokens,
+            task=task,
+            **kwargs
+        )
+        with tracing.span("llm_call", task=task, tier=route.tier, model=route.model,
+                          reason=route.reason, streamed=True) as call_span:
+            try:
+                while True:
+                    try:
+                        chunk = next(response)
+                    except StopIteration as e:
+                        # The backend returns the usage it was sent, if any
+                        usage = e.value
+                        break
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    text.append(chunk)
+                    yield chunk
+                outcome = "ok"
+            except LLMError as e:
+                outcome = _outcome(e)
+                raise
+            finally:
+                response.close()
+                elapsed = time.monotonic() - start
+                # Only complete streams say anything about the tier's latency
+                if outcome == "ok":
+                    self._record(route, elapsed)
+                usage = usage or _estimate_usage(messages, "".join(text))
+                record_llm_call(task, route.model, outcome, elapsed,
+                                usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), first_token)
+                call_span.set(outcome=outcome, first_token_seconds=first_token)
+
+    def stats(self):
+        """Return routing decision counts and per-tier latency percentiles."""
+        with self._lock:
+            decisions = {f"{task}:{tier}": count for (task, tier), count in self.decisions.items()}
+        return {
+            "decisions": decisions,
+            "latency_p50_seconds": {tier: tracker.percentile(50) for tier, tracker in self.latencies.items()},
+            "latency_p95_seconds": {tier: tracker.percentile(95) for tier, tracker in self.latencies.items()}
+        }
+
+    def _record(self, route, seconds):
+        self.latencies[route.tier].record(seconds)
+        logger.info("%s on %s took %.3fs", route.task, route.tier, seconds)
+
+
+def _outcome(error):
+    if isinstance(error, LLMCancelledError):
+        return "cancelled"
+    return "timeout" if isinstance(error, LLMTimeoutError) else "error"
+
+
+def _estimate_usage(messages, text):
+    """Estimate usage at four characters per token when the server reports none."""
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4}
+
+
+def _default_tier_order(tiers):
+    """TIER_ORDER, then any other tiers in the order they are defined."""
+    return [tier for tier in TIER_ORDER if tier in tiers] + [tier for tier in tiers if tier not in TIER_ORDER]
+
+
+def _validate(tiers, tasks, tier_order):
+    if sorted(tier_order) != sorted(tiers):
+        raise RoutingConfigError(f"Tier order {tier_order} must list each of the tiers {sorted(tiers)} once")
+    for name, tier in tiers.items():
+        if not tier.get("model"):
+            raise RoutingConfigError(f"Tier {name!r} has no model")
+    for name, task in tasks.items():
+        if task.get("tier") not in tiers:
+            raise RoutingConfigError(f"Task {name!r} uses unknown tier {task.get('tier')!r}")
+
+
+def load_routing_config(path):
+    """Merge a JSON routing config over the default tiers and tasks.
+
+    Returns (tiers, tasks, tier_order); raises RoutingConfigError if they don't fit together.
+    """
+    tiers = {name: dict(tier) for name, tier in DEFAULT_TIERS.items()}
+    tasks = {name: dict(task) for name, task in DEFAULT_TASKS.items()}
+    with open(path) as f:
+        config = json.load(f)
+    for name, tier in config.get("tiers", {}).items():
+        tiers.setdefault(name, {}).update(tier)
+    for name, task in config.get("tasks", {}).items():
+        tasks.setdefault(name, {"tier": "premium", "max_tokens": 1000, "temperature": 0.7}).update(task)
+    tier_order = config.get("tier_order") or _default_tier_order(tiers)
+    _validate(tiers, tasks, tier_order)
+    return tiers, tasks, tier_order
+
+
+_router = None
+_router_lock = threading.Lock()
+
+REGISTRY.register(StatsCollector(
+    "talentscout_llm_routing", "Model routing decisions by task and tier, and latency percentiles by tier.",
+    lambda: _router.stats() if _router is not None else None,
+    label={"decisions": "route", "latency_p50_seconds": "tier", "latency_p95_seconds": "tier"}))
+
+
+def get_router():
+    """Return the process-wide model router, configured from the environment."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            tiers, tasks, tier_order = None, None, None
+            if os.getenv("LLM_ROUTING_CONFIG"):
+                tiers, tasks, tier_order = load_routing_config(os.getenv("LLM_ROUTING_CONFIG"))
+            _router = ModelRouter(
+                tiers,
+                tasks,
+                queue_depth_threshold=int(os.getenv("LLM_ROUTING_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH_THRESHOLD)),
+                tier_order=tier_order
+            )
+        return _router
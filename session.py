@@ -0,0 +1,128 @@
+# session.py
+"""Compact per-session state.
+
+Every live candidate keeps one TalentScoutChatbot in Streamlit's session
+state, so its layout decides the memory cost of a session. Candidate fields
+live in a slotted CandidateInfo that still reads like the dict it replaces,
+and the conversation is kept once, in a Transcript of role codes and content
+strings. The LLM history and the chat view in app.py are both derived from
+the transcript. Prompt constants are stored by reference, never copied.
+"""
+from collections.abc import MutableMapping
+
+ROLES = ("system", "user", "assistant")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+# Set on turns that are recorded but not shown, like the automatic opening
+HIDDEN = 0x80
+# app.py labels assistant turns "bot"
+DISPLAY_ROLES = {"user": "user", "assistant": "bot", "system": "system"}
+
+CANDIDATE_FIELDS = (
+    "name", "email", "phone", "experience", "position", "location", "tech_stack",
+    # Canonical skill IDs for tech_stack, from skill_taxonomy
+    "tech_stack_normalized",
+    "technical_questions", "question_index",
+    # Which path produced the technical questions (bank, cache, stream, local, ...)
+    "question_source",
+    # Speculatively prepared follow-ups that were asked
+    "follow_up_questions"
+)
+_CANDIDATE_FIELD_SET = frozenset(CANDIDATE_FIELDS)
+
+
+class CandidateInfo(MutableMapping):
+    """Candidate fields in slots, with dict-style access.
+
+    Fields outside CANDIDATE_FIELDS, e.g. captured by a custom flow, go to a
+    dict that is only created when first needed.
+    """
+
+    __slots__ = CANDIDATE_FIELDS + ("_extra",)
+
+    def __init__(self):
+        for field in CANDIDATE_FIELDS:
+            setattr(self, field, None)
+        self.technical_questions = []
+        self.question_index = 0
+        self.follow_up_questions = []
+        self.tech_stack_normalized = []
+        self._extra = None
+
+    def __getitem__(self, key):
+        if key in _CANDIDATE_FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _CANDIDATE_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _CANDIDATE_FIELD_SET:
+            setattr(self, key, None)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        yield from CANDIDATE_FIELDS
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return len(CANDIDATE_FIELDS) + len(self._extra or ())
+
+    def __repr__(self):
+        return f"CandidateInfo({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Return a plain dict, e.g. for json.dump."""
+        return dict(self.items())
+
+
+class Transcript:
+    """The conversation as parallel role codes and content strings."""
+
+    __slots__ = ("roles", "contents")
+
+    def __init__(self):
+        self.roles = bytearray()
+        self.contents = []
+
+    def append(self, role, content, hidden=False):
+        self.roles.append(ROLE_CODES[role] | (HIDDEN if hidden else 0))
+        self.contents.append(content)
+
+    @classmethod
+    def from_turns(cls, turns):
+        """Rebuild a transcript from (index, role code, content) tuples in order."""
+        transcript = cls()
+        for _, code, content in turns:
+            transcript.roles.append(code)
+            transcript.contents.append(content)
+        return transcript
+
+    def __len__(self):
+        return len(self.contents)
+
+    def role(self, index):
+        return ROLES[self.roles[index] & ~HIDDEN]
+
+    def messages(self, start=0, end=None):
+        """Return turns start to end as chat messages."""
+        end = len(self.contents) if end is None else end
+        return [{"role": ROLES[code & ~HIDDEN], "content": content}
+                for code, content in zip(self.roles[start:end], self.contents[start:end])]
+
+    def display(self):
+        """Return the visible turns as app.py renders them."""
+        return [{"role": DISPLAY_ROLES[ROLES[code]], "content": content}
+                for code, content in zip(self.roles, self.contents)
+                if not code & HIDDEN and code != ROLE_CODES["system"]]
@@ -0,0 +1,95 @@
+# singleflight.py
+"""Coalescing of identical in-flight calls.
+
+Concurrent callers that ask for the same key share a single execution: the
+first caller (the leader) runs the call and every other caller waits for its
+result.
+"""
+import threading
+
+from metrics import REGISTRY, StatsCollector
+
+
+class Flight:
+    """One in-flight call that any number of callers can wait on."""
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Block until the call finishes and return its result.
+
+        Returns None if the timeout expires first.
+        """
+        if not self._done.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def _resolve(self, result, error):
+        self.result = result
+        self.error = error
+        self._done.set()
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by a normalized request key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def begin(self, key):
+        """Join the flight for key, starting it if none is running.
+
+        Returns (flight, is_leader). The leader must call finish() exactly once.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.executions += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        """Publish the leader's result to every waiter and close the flight."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight._resolve(result, error)
+
+    def stats(self):
+        """Return how often calls were executed versus coalesced."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / self.calls if self.calls else 0.0,
+                "in_flight": len(self._flights)
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    """Return the process-wide single-flight registry."""
+    return _single_flight
+
+
+REGISTRY.register(StatsCollector(
+    "talentscout_singleflight", "Coalescing of identical in-flight question generation requests.",
+    _single_flight.stats))
@@ -0,0 +1,354 @@
+# skill_taxonomy.py
+"""Normalization of free-text tech stacks to canonical skills.
+
+The taxonomy (skill_taxonomy.json, versioned) lists skills with a canonical
+ID, display name, category, optional parent skill and aliases; categories
+may have parent categories. "JS, k8s, Postgres, ReactJS, node.js" normalizes
+to ["javascript", "kubernetes", "postgresql", "react", "nodejs"].
+
+Phrases are first looked up as exact aliases. Tokens that are still unknown
+are matched approximately: each is embedded as a hashed vector of character
+n-grams and compared with every alias by cosine similarity, as one NumPy
+matrix product per chunk of tokens. The best alias must also be within a few
+edits of the token. Without NumPy only exact aliases are recognised.
+"""
+import os
+import re
+import json
+import logging
+import threading
+from utils import extract_technologies, categorize_keywords
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the fuzzy fallback needs NumPy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+DEFAULT_FUZZY_THRESHOLD = 0.8
+# Dimensions of the hashed n-gram vectors
+NGRAM_DIMENSIONS = 2048
+NGRAM_SIZES = (2, 3)
+# Odd 64-bit constant (2^64 / golden ratio) that spreads packed n-grams over the columns
+NGRAM_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15) if np is not None else None
+# Shorter unknown tokens are too ambiguous to match approximately
+MIN_FUZZY_LENGTH = 4
+# A fuzzy match is a typo: at most this share of the alias's characters differ,
+# so "reactive" doesn't become "reactnative" however many n-grams they share
+MAX_FUZZY_EDIT_RATIO = 0.25
+# Unknown tokens embedded and scored at a time: about 8 MB of vectors per chunk
+FUZZY_CHUNK_SIZE = 1024
+MAX_FUZZY_CACHE = 50000
+MAX_PHRASE_CACHE = 50000
+
+# Phrases are separated by punctuation and conjunctions
+PHRASE_SPLIT = re.compile(r"[,;|\n()\[\]]+|\s+(?:and|or|&)\s+|\s*&\s*")
+WORD_PATTERN = re.compile(r"[a-z0-9+#./-]+")
+# Joined words (React/Redux, Python+Django); a + inside a symbol run (c++) does not split
+PART_SPLIT = re.compile(r"/|\+(?=[a-z0-9.])")
+VERSION_SUFFIX = re.compile(r"(?<=[a-z+#])[\s-]?v?\d+(?:\.\d+)*(?:\.x)?$")
+VERSION_WORD = re.compile(r"^v?\d+(?:\.\d+)*(?:\.x|\+)?$")
+STOPWORDS = frozenset((
+    "a", "an", "the", "with", "using", "use", "used", "in", "of", "on", "for", "to", "at", "as", "also",
+    "some", "basic", "basics", "good", "strong", "solid", "advanced", "expert", "intermediate", "beginner",
+    "knowledge", "experience", "experienced", "familiar", "familiarity", "proficient", "skills", "skill",
+    "years", "year", "yrs", "yr", "plus", "etc", "mainly", "mostly", "including", "like", "such", "i",
+    "have", "worked", "work", "working", "framework", "frameworks", "language", "languages", "stack",
+    "tools", "tool", "programming", "development", "developer", "based", "web", "app", "apps", "cloud"
+))
+
+
+class TaxonomyError(ValueError):
+    """Raised for a taxonomy file that is not valid."""
+
+
+class Skill:
+    __slots__ = ("id", "name", "category", "parent", "keyword", "aliases")
+
+    def __init__(self, spec):
+        self.id = spec["id"]
+        self.name = spec["name"]
+        self.category = spec["category"]
+        self.parent = spec.get("parent")
+        # The utils.TECH_CATEGORIES keyword for this skill, if there is one
+        self.keyword = spec.get("keyword")
+        self.aliases = tuple(spec.get("aliases", ()))
+
+
+def _clean(text):
+    return " ".join(text.lower().split())
+
+
+def _strip_word(word):
+    """Drop punctuation around a word, keeping the leading dot of .net."""
+    return word.rstrip("./-").lstrip("/-")
+
+
+def _ngram_indices(tokens):
+    """(row, column) of every hashed character n-gram of tokens, with word boundary marks.
+
+    Tokens are ASCII (see WORD_PATTERN). Each n-gram is packed into an integer
+    with its length and spread over the columns by multiplicative hashing,
+    for all tokens at once.
+    """
+    marked = [f"<{token}>" for token in tokens]
+    lengths = np.fromiter((len(m) for m in marked), dtype=np.int64, count=len(marked))
+    chars = np.frombuffer("".join(marked).encode("ascii", "replace"), dtype=np.uint8).astype(np.uint64)
+    ends = np.cumsum(lengths)
+    owner = np.repeat(np.arange(len(marked), dtype=np.int32), lengths)
+    positions = np.arange(len(chars))
+    rows = []
+    cols = []
+    for n in NGRAM_SIZES:
+        starts = positions[positions + n <= ends[owner]]
+        key = np.full(len(starts), n, dtype=np.uint64)
+        for offset in range(n):
+            key = (key << np.uint64(8)) | chars[starts + offset]
+        rows.append(owner[starts])
+        cols.append(((key * NGRAM_HASH_MULTIPLIER) >> np.uint64(40)) % np.uint64(NGRAM_DIMENSIONS))
+    return np.concatenate(rows), np.concatenate(cols).astype(np.int32)
+
+
+def _embed(tokens):
+    """L2-normalized float32 n-gram count vectors for tokens, one row each.
+
+    Memory grows with len(tokens) * NGRAM_DIMENSIONS, so callers embed large
+    token sets in chunks of FUZZY_CHUNK_SIZE.
+    """
+    rows, cols = _ngram_indices(tokens)
+    vectors = np.zeros((len(tokens), NGRAM_DIMENSIONS), dtype=np.float32)
+    np.add.at(vectors, (rows, cols), 1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance of a and b counting a swap of neighbours as one edit.
+
+    Stops early and returns limit + 1 once the distance must exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SkillTaxonomy:
+    """A loaded taxonomy with exact and approximate skill lookup."""
+
+    def __init__(self, data, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+        self.version = data.get("version")
+        self.categories = data.get("categories", {})
+        self.skills = {}
+        for spec in data.get("skills", ()):
+            skill = Skill(spec)
+            if skill.id in self.skills:
+                raise TaxonomyError(f"Duplicate skill ID {skill.id!r}")
+            self.skills[skill.id] = skill
+        for skill in self.skills.values():
+            if skill.category not in self.categories:
+                raise TaxonomyError(f"Skill {skill.id!r} has unknown category {skill.category!r}")
+            if skill.parent is not None and skill.parent not in self.skills:
+                raise TaxonomyError(f"Skill {skill.id!r} has unknown parent {skill.parent!r}")
+
+        # Every spelling of a skill -> its ID; the first skill to claim an alias keeps it
+        self.aliases = {}
+        for skill in self.skills.values():
+            for alias in (skill.id, skill.name, skill.keyword) + skill.aliases:
+                if alias:
+                    self.aliases.setdefault(_clean(alias), skill.id)
+        self.max_alias_words = max((len(alias.split()) for alias in self.aliases), default=1)
+
+        self.fuzzy_threshold = fuzzy_threshold
+        self._fuzzy_cache = {}
+        # Phrase -> (IDs matched exactly, unknown tokens); the fuzzy lock guards both caches
+        self._phrase_cache = {}
+        self._fuzzy_lock = threading.Lock()
+        self._alias_list = None
+        self._alias_vectors = None
+        if np is not None:
+            self._alias_list = list(self.aliases)
+            self._alias_vectors = _embed(self._alias_list)
+
+    def normalize(self, text):
+        """Return the canonical skill IDs in text, in order of first mention."""
+        return self.normalize_batch([text])[0]
+
+    def normalize_batch(self, texts):
+        """normalize() for many texts; unknown tokens are matched together."""
+        parsed = [self._parse(text or "") for text in texts]
+        unknown = {token for _, tokens in parsed for token in tokens}
+        resolved = self._fuzzy_match(unknown) if unknown else {}
+        results = []
+        for matches, tokens in parsed:
+            ids = dict.fromkeys(matches)
+            for token in tokens:
+                skill_id = resolved.get(token)
+                if skill_id is not None:
+                    ids[skill_id] = None
+            results.append(list(ids))
+        return results
+
+    def unmatched(self, text):
+        """Tokens of text that matched no skill, e.g. to grow the taxonomy."""
+        _, tokens = self._parse(text or "")
+        resolved = self._fuzzy_match(set(tokens)) if tokens else {}
+        return [token for token in tokens if resolved.get(token) is None]
+
+    def ancestors(self, skill_id):
+        """Parent skills of skill_id, then its category and parent categories."""
+        chain = []
+        skill = self.skills[skill_id]
+        while skill.parent is not None:
+            skill = self.skills[skill.parent]
+            chain.append(skill.id)
+        category = self.skills[skill_id].category
+        while category is not None:
+            chain.append(category)
+            category = self.categories.get(category, {}).get("parent")
+        return chain
+
+    def technologies(self, tech_stack, skill_ids=None):
+        """extract_technologies for tech_stack, plus keywords only recognised through the taxonomy."""
+        if skill_ids is None:
+            skill_ids = self.normalize(tech_stack)
+        keywords = {kw for kws in extract_technologies(tech_stack or "").values() for kw in kws}
+        for skill_id in skill_ids:
+            skill = self.skills.get(skill_id)
+            if skill is not None and skill.keyword:
+                keywords.add(skill.keyword)
+        return categorize_keywords(keywords)
+
+    def _parse(self, text):
+        """Return (IDs matched exactly, unknown tokens) for text."""
+        matches = []
+        unknown = []
+        cache = self._phrase_cache
+        for phrase in PHRASE_SPLIT.split(text.lower()):
+            parsed = cache.get(phrase)
+            if parsed is None:
+                parsed = self._parse_phrase(phrase)
+                with self._fuzzy_lock:
+                    if len(cache) >= MAX_PHRASE_CACHE:
+                        cache.clear()
+                    cache[phrase] = parsed
+            matches.extend(parsed[0])
+            unknown.extend(parsed[1])
+        return matches, unknown
+
+    def _parse_phrase(self, phrase):
+        matches = []
+        unknown = []
+        words = [_strip_word(word) or word for word in WORD_PATTERN.findall(phrase)]
+        words = [word for word in words if word and not VERSION_WORD.match(word)]
+        i = 0
+        while i < len(words):
+            # Longest run of words that is an alias
+            for size in range(min(self.max_alias_words, len(words) - i), 0, -1):
+                skill_id = self._lookup(" ".join(words[i:i + size]))
+                if skill_id is not None:
+                    matches.append(skill_id)
+                    i += size
+                    break
+            else:
+                self._parse_word(words[i], matches, unknown)
+                i += 1
+        return tuple(matches), tuple(unknown)
+
+    def _parse_word(self, word, matches, unknown):
+        skill_id = self._lookup(word)
+        if skill_id is not None:
+            matches.append(skill_id)
+            return
+        if word in STOPWORDS:
+            return
+        parts = PART_SPLIT.split(word)
+        if len(parts) > 1:
+            # Only after the whole word missed: ci/cd and pl/sql are aliases themselves
+            for part in parts:
+                part = _strip_word(part)
+                if part:
+                    self._parse_word(part, matches, unknown)
+            return
+        if word.startswith("."):
+            # The dot of .net is part of the alias, other leading dots are not
+            if word.lstrip("."):
+                self._parse_word(word.lstrip("."), matches, unknown)
+            return
+        if len(word) >= MIN_FUZZY_LENGTH and not word.isdigit():
+            unknown.append(word)
+
+    def _lookup(self, phrase):
+        skill_id = self.aliases.get(phrase)
+        if skill_id is None:
+            # python3.11, vue 3, java-17
+            stripped = VERSION_SUFFIX.sub("", phrase)
+            if stripped != phrase:
+                skill_id = self.aliases.get(stripped)
+        return skill_id
+
+    def _fuzzy_match(self, tokens):
+        """Map unknown tokens to skill IDs by n-gram cosine similarity, or None."""
+        if self._alias_vectors is None:
+            return {}
+        with self._fuzzy_lock:
+            resolved = {token: self._fuzzy_cache[token] for token in tokens if token in self._fuzzy_cache}
+        pending = [token for token in tokens if token not in resolved]
+        if pending:
+            found = {}
+            for start in range(0, len(pending), FUZZY_CHUNK_SIZE):
+                chunk = pending[start:start + FUZZY_CHUNK_SIZE]
+                scores = _embed(chunk) @ self._alias_vectors.T
+                best = scores.argmax(axis=1)
+                best_scores = scores[np.arange(len(chunk)), best]
+                for token, index, score in zip(chunk, best.tolist(), best_scores.tolist()):
+                    found[token] = self._confirm(token, index) if score >= self.fuzzy_threshold else None
+            with self._fuzzy_lock:
+                if len(self._fuzzy_cache) + len(found) > MAX_FUZZY_CACHE:
+                    self._fuzzy_cache.clear()
+                self._fuzzy_cache.update(found)
+            resolved.update(found)
+        return resolved
+
+    def _confirm(self, token, index):
+        """The skill ID of alias index if token is a typo of it, else None."""
+        alias = self._alias_list[index]
+        limit = max(1, int(len(alias) * MAX_FUZZY_EDIT_RATIO))
+        if _edit_distance(token, alias, limit) > limit:
+            return None
+        return self.aliases[alias]
+
+
+def load_taxonomy(path, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+    with open(path, "r") as f:
+        return SkillTaxonomy(json.load(f), fuzzy_threshold)
+
+
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy():
+    """Return the process-wide taxonomy, loaded from SKILL_TAXONOMY_PATH."""
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = load_taxonomy(
+                os.getenv("SKILL_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH),
+                fuzzy_threshold=float(os.getenv("SKILL_FUZZY_THRESHOLD", DEFAULT_FUZZY_THRESHOLD))
+            )
+            logger.info("Loaded skill taxonomy %s with %d skills", _taxonomy.version, len(_taxonomy.skills))
+        return _taxonomy
@@ -0,0 +1,144 @@
+# speculation.py
+"""Speculative follow-up questions.
+
+While the candidate types an answer, a background worker prepares a follow-up
+question that probes the current topic one level deeper. When the answer
+arrives the follow-up is used only if it is already finished, so it never adds
+latency between questions. Speculation is cancelled when the candidate moves
+on or leaves.
+"""
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from prompts import FOLLOW_UP_QUESTION_PROMPT
+from llm_client import LLMError
+from routing import get_router
+from admission import PRIORITY_SPECULATIVE
+from utils import clean_question_line
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FOLLOW_UP_MAX = 0
+DEFAULT_FOLLOW_UP_MIN_ANSWER_WORDS = 8
+DEFAULT_FOLLOW_UP_WORKERS = 4
+
+# Answers that say the candidate doesn't know are not worth probing deeper
+NON_ANSWERS = ("i don't know", "i dont know", "not sure", "no idea", "skip", "pass")
+
+
+class Speculation:
+    """A follow-up question being prepared in the background."""
+
+    def __init__(self, question):
+        self.question = question
+        self.cancelled = threading.Event()
+        self.future = None
+
+    def ready_result(self):
+        """Return the follow-up if it finished, without waiting for it."""
+        if self.cancelled.is_set() or self.future is None or not self.future.done():
+            return None
+        if self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class FollowUpSpeculator:
+    """Prepares follow-up questions on a shared worker pool."""
+
+    def __init__(self, max_follow_ups=DEFAULT_FOLLOW_UP_MAX,
+                 min_answer_words=DEFAULT_FOLLOW_UP_MIN_ANSWER_WORDS, workers=DEFAULT_FOLLOW_UP_WORKERS):
+        # Follow-ups asked per interview at most; 0 disables speculation
+        self.max_follow_ups = max_follow_ups
+        self.min_answer_words = min_answer_words
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="follow-up")
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.unready = 0
+        self.cancelled = 0
+
+    def speculate(self, question, messages):
+        """Start preparing a follow-up to question and return its Speculation.
+
+        messages is the conversation as the LLM sees it, from
+        TalentScoutChatbot.get_llm_messages().
+        """
+        speculation = Speculation(question)
+        messages = messages + [{"role": "user", "content": FOLLOW_UP_QUESTION_PROMPT.format(question=question)}]
+        speculation.future = self._executor.submit(self._generate, messages, speculation.cancelled)
+        with self._lock:
+            self.started += 1
+        return speculation
+
+    def take(self, speculation, answer):
+        """Return the prepared follow-up if it is ready and the answer warrants it."""
+        follow_up = speculation.ready_result()
+        with self._lock:
+            if follow_up is None:
+                self.unready += 1
+            elif self.worth_probing(answer):
+                self.used += 1
+                return follow_up
+        speculation.cancel()
+        return None
+
+    def cancel(self, speculation):
+        if speculation is not None and not speculation.cancelled.is_set():
+            speculation.cancel()
+            with self._lock:
+                self.cancelled += 1
+
+    def worth_probing(self, answer):
+        text = answer.lower().strip()
+        return len(text.split()) >= self.min_answer_words and not any(n in text for n in NON_ANSWERS)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "used": self.used,
+                "not_ready": self.unready,
+                "cancelled": self.cancelled
+            }
+
+    def _generate(self, messages, cancelled):
+        response = get_router().stream("follow_up", messages, priority=PRIORITY_SPECULATIVE)
+        text = ""
+        try:
+            for chunk in response:
+                if cancelled.is_set():
+                    return None
+                text += chunk
+        except LLMError as e:
+            logger.warning("Error generating follow-up question: %s", e)
+            return None
+        finally:
+            response.close()
+        lines = [clean_question_line(line) for line in text.strip().split("\n")]
+        return next((line for line in lines if line), None)
+
+
+_speculator = None
+_speculator_lock = threading.Lock()
+
+
+def get_follow_up_speculator():
+    """Return the process-wide speculator, or None unless FOLLOW_UP_MAX is set."""
+    global _speculator
+    max_follow_ups = int(os.getenv("FOLLOW_UP_MAX", DEFAULT_FOLLOW_UP_MAX))
+    if max_follow_ups <= 0:
+        return None
+    with _speculator_lock:
+        if _speculator is None:
+            _speculator = FollowUpSpeculator(
+                max_follow_ups,
+                min_answer_words=int(os.getenv("FOLLOW_UP_MIN_ANSWER_WORDS", DEFAULT_FOLLOW_UP_MIN_ANSWER_WORDS))
+            )
+        return _speculator
@@ -0,0 +1,101 @@
+# tests/test_admission.py
+import time
+import pytest
+import metrics
+import admission
+import mock_llm_server
+from admission import AdmissionController, AdmissionTimeout
+from llm_client import HTTPBackend, LLMError, _estimate_tokens
+
+MESSAGES = [{"role": "user", "content": "x" * 400}]
+
+
+def tokens(controller):
+    with controller._locked_state() as state:
+        return state["tokens"]
+
+
+@pytest.fixture
+def mock_server():
+    def start(**config):
+        server = mock_llm_server.start_mock_server(config=mock_llm_server.MockConfig(**config))
+        servers.append(server)
+        return server
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_calls_wait_for_the_bucket():
+    controller = AdmissionController(tokens_per_minute=6000)
+    assert controller.acquire(6000) == pytest.approx(0, abs=0.05)
+    with pytest.raises(AdmissionTimeout):
+        controller.acquire(3000, timeout=0.1)
+    assert controller.stats()["timeouts"] == 1
+
+
+def test_bucket_refills_with_time():
+    controller = AdmissionController(requests_per_minute=60, tokens_per_minute=6000)
+    controller.acquire(6000)
+    # Pretend half a minute has passed since the bucket was last updated
+    controller._state["updated"] -= 30
+    assert tokens(controller) == pytest.approx(3000, rel=0.01)
+    controller._state["updated"] -= 600
+    assert tokens(controller) == pytest.approx(6000)
+
+
+def test_adjust_refunds_unused_tokens():
+    controller = AdmissionController(tokens_per_minute=10000)
+    controller.acquire(4000)
+    controller.adjust(4000, 1000)
+    assert tokens(controller) == pytest.approx(9000, abs=5)
+    # Never above the bucket size
+    controller.adjust(4000, 0)
+    assert tokens(controller) == pytest.approx(10000)
+
+
+def test_shared_state_file(tmp_path):
+    path = str(tmp_path / "admission.json")
+    first = AdmissionController(tokens_per_minute=6000, state_path=path)
+    second = AdmissionController(tokens_per_minute=6000, state_path=path)
+    first.acquire(5000)
+    assert tokens(second) == pytest.approx(1000, abs=5)
+
+
+def test_failed_attempts_give_their_tokens_back(mock_server):
+    server = mock_server(error_rate=1.0, error_status=429)
+    controller = AdmissionController(tokens_per_minute=100000)
+    backend = HTTPBackend(server.base_url, timeout=5, max_retries=3, backoff_base=0.001, backoff_max=0.001,
+                          admission=controller)
+    with pytest.raises(LLMError):
+        backend.complete(MESSAGES, "gpt-4o-mini", max_tokens=5000)
+    assert controller.admitted == 4
+    assert tokens(controller) == pytest.approx(100000, abs=10)
+
+
+def test_completions_are_charged_what_they_used(mock_server):
+    server = mock_server()
+    controller = AdmissionController(tokens_per_minute=100000)
+    backend = HTTPBackend(server.base_url, timeout=5, admission=controller)
+    started = time.monotonic()
+    completion = backend.complete(MESSAGES, "gpt-4o-mini", max_tokens=5000)
+    used = completion.usage["total_tokens"] if completion.usage else None
+    assert used is not None and used < _estimate_tokens({"messages": MESSAGES, "max_tokens": 5000})
+    # The bucket keeps refilling while the request runs
+    refilled = 100000 / 60 * (time.monotonic() - started)
+    assert 100000 - used - 1 <= tokens(controller) <= 100000 - used + refilled + 1
+    chunks = list(backend.stream(MESSAGES, "gpt-4o-mini", max_tokens=5000))
+    assert chunks
+    assert tokens(controller) < 100000 - used
+
+
+def test_admission_stats_are_exported(monkeypatch):
+    controller = AdmissionController(tokens_per_minute=6000)
+    controller.acquire(100, priority=admission.PRIORITY_BACKGROUND)
+    monkeypatch.setattr(admission, "_admission", controller)
+    rendered = metrics.REGISTRY.render()
+    assert "talentscout_llm_admission_admitted 1" in rendered
+    assert "# TYPE talentscout_llm_admission_wait_seconds_max gauge" in rendered
+    assert metrics.summary()["components"]["llm_admission"]["admitted"] == 1
@@ -0,0 +1,110 @@
+# tests/test_batcher.py
+import json
+import time
+import threading
+import pytest
+import metrics
+import batcher
+from batcher import QuestionBatcher, parse_batch_response
+from llm_client import Completion, LLMError
+
+
+class FakeRouter:
+    """Answers batch prompts with questions for every candidate, optionally blocking first."""
+
+    tasks = {"question_batch": {"max_tokens": 100}}
+
+    def __init__(self, error=None, block=None):
+        self.error = error
+        self.block = block
+        self.batches = []
+
+    def complete(self, task, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        candidates = json.loads(prompt[prompt.index("["):prompt.index("\n]") + 2])
+        self.batches.append(candidates)
+        if self.block is not None:
+            self.block.wait(5)
+        if self.error is not None:
+            raise self.error
+        return Completion(json.dumps({c["id"]: [f"Question about {c['tech_stack']}?"] for c in candidates}))
+
+
+@pytest.fixture
+def router(monkeypatch):
+    def install(**kwargs):
+        fake = FakeRouter(**kwargs)
+        monkeypatch.setattr(batcher, "get_router", lambda: fake)
+        return fake
+    return install
+
+
+def submit_all(question_batcher, stacks):
+    results = {}
+
+    def submit(stack):
+        results[stack] = question_batcher.submit(stack, "Backend developer")
+
+    threads = [threading.Thread(target=submit, args=(stack,)) for stack in stacks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_requests_share_one_call(router):
+    fake = router()
+    question_batcher = QuestionBatcher(window=0.2, max_batch=8, timeout=5)
+    results = submit_all(question_batcher, ["python", "go", "rust"])
+    assert len(fake.batches) == 1
+    assert results == {stack: [f"Question about {stack}?"] for stack in ("python", "go", "rust")}
+    assert question_batcher.stats()["average_batch_size"] == 3
+
+
+def test_full_batches_go_out_before_the_window(router):
+    fake = router()
+    question_batcher = QuestionBatcher(window=5, max_batch=2, timeout=5)
+    started = time.monotonic()
+    submit_all(question_batcher, ["python", "go"])
+    assert time.monotonic() - started < 2
+    assert [len(batch) for batch in fake.batches] == [2]
+
+
+def test_failed_batches_answer_none(router):
+    router(error=LLMError("rate limited"))
+    question_batcher = QuestionBatcher(window=0.05, timeout=5)
+    assert question_batcher.submit("python", "Backend developer") is None
+    assert question_batcher.stats()["failures"] == 1
+
+
+def test_batches_whose_callers_gave_up_are_not_sent(router):
+    release = threading.Event()
+    fake = router(block=release)
+    question_batcher = QuestionBatcher(window=0.01, timeout=0.2, workers=1)
+    # The first batch holds the only worker until both callers have given up
+    results = submit_all(question_batcher, ["python"])
+    results.update(submit_all(question_batcher, ["go"]))
+    assert results == {"python": None, "go": None}
+    release.set()
+    deadline = time.monotonic() + 5
+    while question_batcher.stats()["skipped_batches"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [[c["tech_stack"] for c in batch] for batch in fake.batches] == [["python"]]
+    stats = question_batcher.stats()
+    assert stats["abandoned"] == 1
+    assert stats["skipped_batches"] == 1
+
+
+def test_parse_batch_response():
+    text = '```json\n{"1": ["1. What is the GIL?", 3], "2": "not a list"}\n```'
+    assert parse_batch_response(text) == {"1": ["What is the GIL?"]}
+    assert parse_batch_response("no json here") == {}
+    assert parse_batch_response("{broken") == {}
+
+
+def test_stats_are_exported(monkeypatch):
+    monkeypatch.setattr(batcher, "_batcher", QuestionBatcher(window=0.05))
+    rendered = metrics.REGISTRY.render()
+    assert "talentscout_question_batcher_skipped_batches 0" in rendered
+    assert metrics.summary()["components"]["question_batcher"]["batches"] == 0
@@ -0,0 +1,50 @@
+# tests/test_candidate_store.py
+import json
+import pytest
+from candidate_store import CandidateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CandidateStore(str(tmp_path / "candidates.db"))
+    yield store
+    store.close()
+
+
+def test_find_matches_position_and_location_by_prefix(store):
+    berlin = store.save({"name": "Ada", "email": "Ada@Example.com", "position": "Backend Engineer",
+                         "location": "Berlin, Germany", "tech_stack_normalized": ["python"]})
+    store.save({"name": "Ben", "email": "ben@example.com", "position": "Frontend Engineer",
+                "location": "Bern, Switzerland", "tech_stack_normalized": ["react"]})
+    assert [c["id"] for c in store.find(location="Berlin")] == [berlin]
+    assert [c["id"] for c in store.find(location="  berlin, GERMANY ")] == [berlin]
+    assert [c["id"] for c in store.find(position="backend")] == [berlin]
+    assert len(store.find(location="Ber")) == 2
+    assert store.find(location="Germany") == []
+    assert [c["id"] for c in store.find(email="ada@example.com", tags=["python"])] == [berlin]
+    assert store.find(email="ada@example") == []
+
+
+def test_migrate_skips_non_object_files(store, tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "candidate_ada_20240101120000.json").write_text(json.dumps({"name": "Ada", "tech_stack": "go"}))
+    (data_dir / "candidate_list_20240101120001.json").write_text(json.dumps(["not", "a", "record"]))
+    (data_dir / "candidate_null_20240101120002.json").write_text("null")
+    assert store.migrate_json_directory(str(data_dir)) == 1
+    assert store.count() == 1
+    # Already imported files are not imported again
+    assert store.migrate_json_directory(str(data_dir)) == 0
+
+
+def test_migrate_recognises_a_directory_by_any_path(store, tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "candidate_ada_20240101120000.json").write_text(json.dumps({"name": "Ada", "tech_stack": "go"}))
+    (tmp_path / "link").symlink_to(data_dir)
+    monkeypatch.chdir(tmp_path)
+    assert store.migrate_json_directory("data") == 1
+    assert store.migrate_json_directory("./data") == 0
+    assert store.migrate_json_directory(str(data_dir)) == 0
+    assert store.migrate_json_directory("link/") == 0
+    assert store.count() == 1
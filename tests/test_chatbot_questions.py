@@ -0,0 +1,71 @@
+# tests/test_chatbot_questions.py
+import pytest
+import llm_client
+import question_bank
+from llm_client import LLMBackend, LLMError
+from question_cache import QuestionCache
+from question_bank import QUESTION_PLAN
+from chatbot import TalentScoutChatbot
+
+INTRO = "Thank you for sharing your tech stack"
+ANSWERS = ["hello", "hi", "Ann Lee", "ann@example.com", "5551234567", "5 years", "Backend", "Berlin"]
+
+
+class FailingBackend(LLMBackend):
+    """Streams the given chunks, then fails like a dropped connection."""
+
+    timeout = 5
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def complete(self, messages, model, **kwargs):
+        raise LLMError("connection reset")
+
+    def stream(self, messages, model, **kwargs):
+        yield from self.chunks
+        raise LLMError("connection reset")
+
+
+@pytest.fixture
+def interview(monkeypatch):
+    monkeypatch.setattr("chatbot.get_question_bank", lambda: None)
+    monkeypatch.setattr(question_bank, "get_question_bank", lambda: None)
+    monkeypatch.setattr("chatbot.get_question_cache", lambda: QuestionCache(path=""))
+    previous = llm_client.get_backend()
+
+    def run(chunks):
+        llm_client.set_backend(FailingBackend(chunks))
+        bot = TalentScoutChatbot()
+        for answer in ANSWERS:
+            bot.generate_response(answer)
+        return bot, bot.generate_response("python, django")
+
+    yield run
+    llm_client.set_backend(previous)
+
+
+def test_cut_off_first_question_is_replaced(interview):
+    bot, response = interview(['{"questions": [{"question": "What is the GIL in'])
+    questions = bot.candidate_info["technical_questions"]
+    assert "What is the GIL in" not in questions
+    assert len(questions) == len(QUESTION_PLAN)
+    assert bot.candidate_info["question_source"] == "local"
+    assert response.count(INTRO) == 1
+    assert response.endswith(questions[0])
+
+
+def test_closed_items_are_kept_and_topped_up(interview):
+    bot, response = interview(['{"questions": [{"question": "What is the GIL?"}, {"question": "Expl'])
+    questions = bot.candidate_info["technical_questions"]
+    assert questions[0] == "What is the GIL?"
+    assert len(questions) == len(QUESTION_PLAN)
+    assert not any(question.startswith("Expl") for question in questions)
+    assert response.count(INTRO) == 1
+
+
+def test_failure_before_any_text_falls_back_to_local(interview):
+    bot, response = interview([])
+    assert bot.candidate_info["question_source"] == "local"
+    assert len(bot.candidate_info["technical_questions"]) == len(QUESTION_PLAN)
+    assert response.count(INTRO) == 1
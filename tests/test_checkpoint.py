@@ -0,0 +1,108 @@
+# tests/test_checkpoint.py
+import pytest
+import llm_client
+import question_bank
+from llm_client import LLMBackend, LLMError
+from question_cache import QuestionCache
+from checkpoint import Checkpointer, SQLiteCheckpointStore, CheckpointError, make_checkpoint_store
+from chatbot import TalentScoutChatbot
+
+ANSWERS = ["hello", "hi", "Ann Lee", "ann@example.com", "5551234567", "5 years", "Software Engineer",
+           "Berlin", "python, django"]
+
+
+class OfflineBackend(LLMBackend):
+    """Fails every call, so questions come from the local fallback."""
+
+    timeout = 5
+
+    def complete(self, messages, model, **kwargs):
+        raise LLMError("offline")
+
+    def stream(self, messages, model, **kwargs):
+        raise LLMError("offline")
+        yield
+
+
+@pytest.fixture
+def chatbot_factory(monkeypatch):
+    monkeypatch.setattr("chatbot.get_question_bank", lambda: None)
+    monkeypatch.setattr(question_bank, "get_question_bank", lambda: None)
+    monkeypatch.setattr("chatbot.get_question_cache", lambda: QuestionCache(path=""))
+    previous = llm_client.get_backend()
+    llm_client.set_backend(OfflineBackend())
+    yield TalentScoutChatbot
+    llm_client.set_backend(previous)
+
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    return Checkpointer(SQLiteCheckpointStore(str(tmp_path / "sessions.db")))
+
+
+def test_store_round_trip(tmp_path):
+    store = SQLiteCheckpointStore(str(tmp_path / "sessions.db"))
+    assert store.load("s1") is None
+    store.save("s1", {"turn_count": "1", "state": '"greeting"'}, [(0, 0, "hello"), (1, 1, "Hi!")])
+    store.save("s1", {"turn_count": "2"}, [(2, 0, "Ann Lee")])
+    fields, turns = store.load("s1")
+    assert fields == {"turn_count": "2", "state": '"greeting"'}
+    assert turns == [(0, 0, "hello"), (1, 1, "Hi!"), (2, 0, "Ann Lee")]
+    assert store.version("s1") == 2
+    store.delete("s1")
+    assert store.load("s1") is None
+    assert store.version("s1") is None
+
+
+def test_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteCheckpointStore(path).save("s1", {"turn_count": "3"}, [(0, 0, "hello")])
+    assert SQLiteCheckpointStore(path).load("s1") == ({"turn_count": "3"}, [(0, 0, "hello")])
+
+
+def test_chatbot_round_trip(chatbot_factory, checkpointer):
+    bot = chatbot_factory()
+    for answer in ANSWERS:
+        bot.generate_response(answer)
+        checkpointer.save(bot)
+
+    assert bot.candidate_info["technical_questions"]
+
+    restored = checkpointer.restore(bot.session_id, chatbot_factory)
+    assert restored.session_id == bot.session_id
+    assert restored.current_state == bot.current_state
+    assert restored.turn_count == bot.turn_count
+    assert restored.candidate_info == bot.candidate_info
+    assert restored.checkpoint_fields() == bot.checkpoint_fields()
+    assert restored.conversation_history.messages() == bot.conversation_history.messages()
+
+    # Both carry on the interview the same way
+    assert restored.generate_response("The GIL serializes bytecode.") == \
+        bot.generate_response("The GIL serializes bytecode.")
+
+
+def test_only_changes_are_written(chatbot_factory, checkpointer):
+    bot = chatbot_factory()
+    bot.generate_response("hello")
+    checkpointer.save(bot)
+    written = checkpointer.bytes_written
+    checkpointer.save(bot)
+    assert checkpointer.saves == 1
+    assert checkpointer.bytes_written == written
+
+    bot.generate_response("hi")
+    checkpointer.save(bot)
+    fields, turns = checkpointer.store.load(bot.session_id)
+    assert [idx for idx, _, _ in turns] == list(range(len(bot.conversation_history.transcript)))
+    assert checkpointer.version(bot.session_id) == 2
+
+
+def test_unknown_sessions_are_not_restored(chatbot_factory, checkpointer):
+    assert checkpointer.restore("missing", chatbot_factory) is None
+
+
+def test_store_urls(tmp_path):
+    store = make_checkpoint_store(f"sqlite:///{tmp_path}/sessions.db")
+    assert isinstance(store, SQLiteCheckpointStore)
+    with pytest.raises(CheckpointError):
+        make_checkpoint_store("memcached://localhost")
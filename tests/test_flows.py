@@ -0,0 +1,88 @@
+# tests/test_flows.py
+import json
+import pytest
+from flows import DEFAULT_FLOW, VALIDATORS, Flow, FlowError, load_flow
+from chatbot import TalentScoutChatbot
+
+SHORT_SCREEN = {
+    "name": "short_screen",
+    "initial": "greeting",
+    "states": [
+        {"name": "greeting", "prompt": "@initial_greeting", "next": "get_name"},
+        {"name": "get_name", "capture": "name", "validator": "nonempty", "prompt": "@email", "next": "get_email"},
+        {"name": "get_email", "capture": "email", "validator": "email",
+         "prompt": "Thanks {name}! Which technologies do you use?", "next": "get_tech_stack"},
+        {"name": "get_tech_stack", "capture": "tech_stack", "prompt": "Noted.", "next": "conclude"},
+        {"name": "conclude", "action": "exit_message", "next": "conclude"}
+    ]
+}
+
+
+@pytest.mark.parametrize("validator, text, valid", [
+    ("nonempty", "Ann", True),
+    ("nonempty", "   ", False),
+    ("email", " ann@example.com ", True),
+    ("email", "ann@example", False),
+    ("phone", "(555) 123-4567", True),
+    ("phone", "12345", False),
+    ("years", "about 5", True),
+    ("years", "many", False),
+])
+def test_validators(validator, text, valid):
+    check, message = VALIDATORS[validator]
+    assert check(text) is valid
+    assert message
+
+
+def test_load_flow_from_json(tmp_path):
+    path = tmp_path / "short_screen.json"
+    path.write_text(json.dumps(SHORT_SCREEN))
+    flow = load_flow(str(path))
+    assert flow.name == "short_screen"
+    assert [state.name for state in flow.states] == ["greeting", "get_name", "get_email", "get_tech_stack",
+                                                     "conclude"]
+    get_email = flow.states[flow.state_id("get_email")]
+    assert get_email.validate("not an email")
+    assert get_email.validate("ann@example.com") is None
+    assert get_email.render({"name": "Ann"}) == "Thanks Ann! Which technologies do you use?"
+    assert get_email.next_state({}) == flow.state_id("get_tech_stack")
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"validator": "zip_code"}, "Unknown validator"),
+    ({"prompt": "@nope"}, "Unknown prompt"),
+    ({"action": "dance"}, "Unknown action"),
+    ({"next": "nowhere"}, "no state"),
+    ({"next": {"when": "sometimes", "then": "conclude", "else": "conclude"}}, "Unknown condition"),
+])
+def test_invalid_flows(change, message):
+    config = json.loads(json.dumps(SHORT_SCREEN))
+    config["states"][1].update(change)
+    with pytest.raises(FlowError, match=message):
+        Flow(config)
+
+
+def test_duplicate_and_missing_states():
+    with pytest.raises(FlowError):
+        Flow({"name": "empty", "states": []})
+    with pytest.raises(FlowError):
+        Flow({"states": [{"name": "a", "prompt": "x"}, {"name": "a", "prompt": "y"}]})
+
+
+def test_chatbot_asks_again_on_invalid_input():
+    bot = TalentScoutChatbot(flow=Flow(SHORT_SCREEN))
+    bot.generate_response("hello")
+    bot.generate_response("Ann")
+    assert bot.generate_response("ann at example") == VALIDATORS["email"][1]
+    assert bot.get_state() == "get_email"
+    assert bot.generate_response("ann@example.com") == "Thanks Ann! Which technologies do you use?"
+    assert bot.get_state() == "get_tech_stack"
+
+
+def test_default_flow_accepts_every_answer():
+    assert not any("validator" in state for state in DEFAULT_FLOW["states"])
+    bot = TalentScoutChatbot(flow=Flow(DEFAULT_FLOW))
+    for answer in ["hello", "Ann", "not an email", "call me"]:
+        bot.generate_response(answer)
+    assert bot.candidate_info["email"] == "not an email"
+    assert bot.get_state() == "get_experience"
@@ -0,0 +1,117 @@
+# tests/test_hedging.py
+import time
+import threading
+import pytest
+import metrics
+import hedging
+from hedging import SLOController, Cancellation
+from llm_client import LLMError
+
+QUESTIONS = ["What is the GIL?"]
+
+
+class FakeCalls:
+    """Plays one behaviour per call: a result, an exception, or hanging until cancelled."""
+
+    HANG = object()
+
+    def __init__(self, *behaviours, delay=0.0):
+        self.behaviours = list(behaviours)
+        self.delay = delay
+        self.cancels = []
+        self._lock = threading.Lock()
+
+    def __call__(self, cancel):
+        with self._lock:
+            behaviour = self.behaviours[len(self.cancels)]
+            self.cancels.append(cancel)
+        if behaviour is self.HANG:
+            cancel.wait(5)
+            return None
+        time.sleep(self.delay)
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        return behaviour
+
+
+@pytest.fixture
+def controller():
+    slo = SLOController(hard_deadline=0.5, hedge_min=0.05, min_samples=0, workers=4)
+    yield slo
+    slo._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def test_fast_primary_serves(controller):
+    calls = FakeCalls(QUESTIONS)
+    assert controller.run(calls) == (QUESTIONS, "primary")
+    assert len(calls.cancels) == 1
+    assert controller.served_by == {"primary": 1, "hedge": 0, "local": 0}
+    assert len(controller.latencies) == 1
+
+
+def test_slow_primary_is_hedged(controller):
+    calls = FakeCalls(FakeCalls.HANG, QUESTIONS)
+    started = time.monotonic()
+    assert controller.run(calls) == (QUESTIONS, "hedge")
+    assert time.monotonic() - started < controller.hard_deadline
+    assert controller.hedges == 1
+    # The losing primary is cancelled
+    assert calls.cancels[0].is_set()
+
+
+def test_both_calls_past_the_hard_deadline_fall_back_to_local(controller):
+    calls = FakeCalls(FakeCalls.HANG, FakeCalls.HANG)
+    started = time.monotonic()
+    assert controller.run(calls) == (None, "local")
+    assert time.monotonic() - started == pytest.approx(controller.hard_deadline, abs=0.2)
+    assert all(cancel.is_set() for cancel in calls.cancels)
+    assert controller.served_by["local"] == 1
+    assert len(controller.latencies) == 0
+
+
+@pytest.mark.parametrize("error", [LLMError("rate limited"), KeyError("choices")])
+def test_failed_primary_is_hedged_at_once(error):
+    controller = SLOController(hard_deadline=5, min_samples=100)
+    calls = FakeCalls(error, QUESTIONS)
+    started = time.monotonic()
+    assert controller.run(calls) == (QUESTIONS, "hedge")
+    # Without enough samples the primary alone would get until the hard deadline
+    assert time.monotonic() - started < 1
+
+
+def test_failed_hedge_falls_back_to_local(controller):
+    calls = FakeCalls(RuntimeError("bug"), LLMError("down"))
+    assert controller.run(calls) == (None, "local")
+    assert len(calls.cancels) == 2
+
+
+def test_hedge_delay_follows_observed_latencies():
+    controller = SLOController(hard_deadline=10, percentile=50, hedge_min=0.5, min_samples=3)
+    assert controller.hedge_delay() == 10
+    for seconds in (1.0, 2.0, 3.0):
+        controller.latencies.record(seconds)
+    assert controller.hedge_delay() == 2.0
+    for _ in range(10):
+        controller.latencies.record(0.1)
+    assert controller.hedge_delay() == 0.5
+
+
+def test_cancellation_runs_callbacks_once():
+    cancel = Cancellation()
+    calls = []
+    cancel.on_cancel("a", lambda: calls.append("a"))
+    cancel.on_cancel("b", lambda: calls.append("b"))
+    cancel.discard("b")
+    cancel.set()
+    cancel.set()
+    cancel.on_cancel("c", lambda: calls.append("c"))
+    assert calls == ["a", "c"]
+
+
+def test_stats_are_exported(controller, monkeypatch):
+    controller.run(FakeCalls(QUESTIONS))
+    monkeypatch.setattr(hedging, "_slo", controller)
+    rendered = metrics.REGISTRY.render()
+    assert 'talentscout_question_slo_served_by{path="primary"} 1' in rendered
+    assert "talentscout_question_slo_hedges 0" in rendered
+    assert metrics.summary()["components"]["question_slo"]["served_by"]["primary"] == 1
@@ -0,0 +1,127 @@
+# tests/test_history.py
+import time
+import threading
+import pytest
+import history
+from history import ConversationHistory, count_tokens, message_tokens
+from llm_client import Completion, LLMError
+
+SYSTEM = "You are a hiring assistant."
+
+
+class FakeRouter:
+    """Answers summarization requests with a fixed text, or fails."""
+
+    def __init__(self, text="SUMMARY", error=None):
+        self.text = text
+        self.error = error
+        self.prompts = []
+        self.done = threading.Event()
+
+    def complete(self, task, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        try:
+            if self.error is not None:
+                raise self.error
+            return Completion(self.text)
+        finally:
+            self.done.set()
+
+
+@pytest.fixture
+def router(monkeypatch):
+    def install(**kwargs):
+        fake = FakeRouter(**kwargs)
+        monkeypatch.setattr(history, "get_router", lambda: fake)
+        return fake
+    return install
+
+
+def turn(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * 20}
+
+
+def fill(conversation, count):
+    for i in range(count):
+        conversation.append(turn(i))
+
+
+def wait_for_summary(conversation, fake):
+    assert fake.done.wait(5)
+    deadline = time.monotonic() + 5
+    while conversation.stats()["pending_fold"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_turns_under_budget_are_kept():
+    conversation = ConversationHistory(SYSTEM, token_budget=10000, keep_turns=2)
+    fill(conversation, 6)
+    assert len(conversation) == 7
+    assert conversation.tokens == count_tokens(SYSTEM) + 4 + sum(message_tokens(turn(i)) for i in range(6))
+    assert conversation.stats()["pending_fold"] == 0
+
+
+def test_over_budget_keeps_the_last_turns():
+    budget = count_tokens(SYSTEM) + 4 + 3 * message_tokens(turn(0))
+    conversation = ConversationHistory(SYSTEM, token_budget=budget, keep_turns=2)
+    fill(conversation, 6)
+    assert len(conversation) == 3
+    assert [m["content"] for m in conversation][1:] == [turn(4)["content"], turn(5)["content"]]
+    assert conversation.tokens <= budget
+    # Nothing is summarized until the messages are read
+    assert conversation.stats()["pending_fold"] == 4
+    assert conversation.stats()["folded_turns"] == 0
+    # The transcript keeps every turn for the chat view
+    assert len(conversation.transcript) == 6
+
+
+def test_evicted_turns_are_summarized_extractively_until_the_llm_answers(router):
+    fake = router(text="Candidate Ann, Python backend.")
+    conversation = ConversationHistory(SYSTEM, token_budget=1, keep_turns=2)
+    fill(conversation, 4)
+    messages = conversation.messages()
+    summary = [m["content"] for m in messages if m["content"].startswith("Conversation so far: ")]
+    assert len(summary) == 1
+    assert "user: turn 0" in summary[0] and "assistant: turn 1" in summary[0]
+    assert messages[-2:] == [turn(2), turn(3)]
+
+    wait_for_summary(conversation, fake)
+    assert len(fake.prompts) == 1
+    assert "turn 0" in fake.prompts[0] and "turn 2" not in fake.prompts[0]
+    messages = conversation.messages()
+    assert {"role": "system", "content": "Conversation so far: Candidate Ann, Python backend."} in messages
+    assert conversation.stats()["folded_turns"] == 2
+    assert conversation.stats()["pending_fold"] == 0
+
+
+def test_summary_falls_back_to_extractive_on_llm_errors(router):
+    fake = router(error=LLMError("rate limited"))
+    conversation = ConversationHistory(SYSTEM, token_budget=1, keep_turns=2)
+    fill(conversation, 3)
+    conversation.messages()
+    wait_for_summary(conversation, fake)
+    assert conversation.summary.startswith("user: turn 0")
+    assert conversation.stats()["folded_turns"] == 1
+
+
+def test_candidate_info_is_sent_without_empty_fields():
+    conversation = ConversationHistory(SYSTEM)
+    messages = conversation.messages({"full_name": "Ann Lee", "email": None, "tech_stack": []})
+    assert messages[1] == {"role": "system", "content": 'Candidate information: {"full_name": "Ann Lee"}'}
+
+
+def test_system_prompt_is_replaced_not_repeated():
+    conversation = ConversationHistory(SYSTEM)
+    conversation.append({"role": "system", "content": "New prompt."})
+    assert len(conversation) == 1
+    assert conversation[0]["content"] == "New prompt."
+    assert conversation.tokens == count_tokens("New prompt.") + 4
+
+
+def test_fold_state_round_trip():
+    conversation = ConversationHistory(SYSTEM, token_budget=1, keep_turns=2)
+    fill(conversation, 5)
+    restored = ConversationHistory(SYSTEM, token_budget=1, keep_turns=2, transcript=conversation.transcript)
+    restored.restore_fold_state(*conversation.fold_state())
+    assert list(restored) == list(conversation)
+    assert restored.tokens == conversation.tokens
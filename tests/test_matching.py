@@ -0,0 +1,85 @@
+# tests/test_matching.py
+import time
+import threading
+import pytest
+
+pytest.importorskip("numpy")
+
+from matching import MatchingIndex, Opening
+
+
+CANDIDATES = [
+    {"name": "Ada", "tech_stack": "python, django, postgres", "experience": "5 years", "location": "Berlin, Germany"},
+    {"name": "Ben", "tech_stack": "react, node.js", "experience": "2 years", "location": "Paris, France"},
+    {"name": "Cy", "tech_stack": "next.js", "experience": "3 years", "location": "Berlin"},
+]
+
+
+@pytest.fixture
+def index():
+    index = MatchingIndex()
+    index.add_many([dict(record) for record in CANDIDATES])
+    return index
+
+
+def names(results):
+    return [record["name"] for _, record in results]
+
+
+def test_top_k_ranks_by_skills(index):
+    results = index.top_k(Opening("Backend", "python, django", min_experience=3), k=3)
+    assert names(results) == ["Ada"]
+    assert 0 < results[0][0] <= 1
+
+
+def test_parent_skills_match_with_lower_weight(index):
+    results = index.top_k(Opening("Frontend", "react"), k=3)
+    assert names(results) == ["Ben", "Cy"]
+    assert results[0][0] > results[1][0]
+
+
+@pytest.mark.parametrize("skills", ["", "underwater basket weaving", []])
+def test_opening_without_known_skills_matches_nothing(index, skills):
+    assert index.top_k(Opening("Anything", skills, locations=["Berlin"]), k=3) == []
+
+
+def test_location_alone_is_not_a_match(index):
+    assert names(index.top_k(Opening("Backend", "python", locations=["Paris"]), k=3)) == ["Ada"]
+
+
+def test_replaced_and_removed_records(index):
+    index.add({"name": "Dee", "tech_stack": "python", "location": "Rome"}, key=1)
+    index.add({"name": "Dee", "tech_stack": "go", "location": "Rome"}, key=1)
+    assert "Dee" not in names(index.top_k(Opening("Backend", "python"), k=5))
+    assert names(index.top_k(Opening("Backend", "go"), k=5)) == ["Dee"]
+    index.remove(1)
+    assert index.top_k(Opening("Backend", "go"), k=5) == []
+
+
+class SlowStore:
+    """Yields its records slowly, so concurrent loads overlap."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def iter_records(self, after_id=0):
+        for candidate_id, record in enumerate(self.records, 1):
+            if candidate_id > after_id:
+                time.sleep(0.001)
+                yield candidate_id, dict(record)
+
+
+def test_concurrent_loads_index_each_candidate_once():
+    index = MatchingIndex()
+    store = SlowStore(CANDIDATES * 10)
+    added = []
+    threads = [threading.Thread(target=lambda: added.append(index.load_store(store))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert sum(added) == len(store.records)
+    assert len(index.records) == len(store.records)
+    store.records = store.records + CANDIDATES[:1]
+    assert index.load_store(store) == 1
+    assert len(index) == len(store.records)
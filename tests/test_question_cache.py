@@ -0,0 +1,129 @@
+# tests/test_question_cache.py
+import time
+import sqlite3
+import pytest
+import metrics
+import question_cache
+from question_cache import QuestionCache, make_cache_key
+
+KEY = "django,python|backend developer"
+QUESTIONS = ["What is the GIL?", "How do Django signals work?"]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "question_cache.db")
+
+
+def served(path, key=KEY):
+    with sqlite3.connect(path) as db:
+        return [row[0] for row in db.execute("SELECT served FROM question_cache WHERE key = ? ORDER BY id", (key,))]
+
+
+def test_stored_questions_are_served_right_away(path):
+    cache = QuestionCache(path=path)
+    assert cache.get(KEY) is None
+    cache.put(KEY, QUESTIONS)
+    assert cache.get(KEY) == QUESTIONS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_lookups_miss_until_every_variant_exists(path):
+    cache = QuestionCache(path=path, variants=2)
+    cache.put(KEY, QUESTIONS)
+    assert cache.get(KEY) is None
+    cache.put(KEY, ["Another question?"])
+    assert cache.get(KEY) in (QUESTIONS, ["Another question?"])
+    # A third variant pushes out the oldest
+    cache.put(KEY, ["Third question?"])
+    assert cache.evictions["retired"] == 1
+    assert len(served(path)) == 2
+
+
+def test_variants_retire_after_max_serves(path):
+    cache = QuestionCache(path=path, max_serves=3)
+    cache.put(KEY, QUESTIONS)
+    assert cache.get(KEY) == QUESTIONS
+    # The third serve is the last one
+    assert cache.get(KEY) == QUESTIONS
+    assert cache.get(KEY) is None
+    assert cache.evictions["retired"] == 1
+    assert served(path) == []
+
+
+def test_expired_variants_are_dropped(path, monkeypatch):
+    cache = QuestionCache(path=path, ttl=60)
+    cache.put(KEY, QUESTIONS)
+    now = time.time()
+    monkeypatch.setattr(question_cache.time, "time", lambda: now + 61)
+    assert cache.get(KEY) is None
+    assert cache.evictions["expired"] == 1
+    assert served(path) == []
+
+
+def test_expiry_applies_to_variants_read_from_disk(path):
+    QuestionCache(path=path).put(KEY, QUESTIONS)
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE question_cache SET created_at = created_at - 120")
+    cache = QuestionCache(path=path, ttl=60)
+    assert cache.get(KEY) is None
+    assert cache.evictions["expired"] == 1
+
+
+def test_least_recently_used_keys_leave_memory_but_not_disk(path):
+    cache = QuestionCache(path=path, max_size=2)
+    for key in ("a|x", "b|x", "c|x"):
+        cache.put(key, [key])
+    assert list(cache._entries) == ["b|x", "c|x"]
+    assert cache.evictions["lru"] == 1
+    assert cache.get("a|x") == ["a|x"]
+    assert list(cache._entries) == ["c|x", "a|x"]
+
+
+def test_serves_are_flushed_in_batches(path):
+    cache = QuestionCache(path=path, flush_interval=3600)
+    cache.put(KEY, QUESTIONS)
+    cache.get(KEY)
+    cache.get(KEY)
+    assert served(path) == [1]
+    cache.flush()
+    assert served(path) == [3]
+
+
+def test_processes_see_each_others_serves(path):
+    first = QuestionCache(path=path, max_serves=4, flush_interval=0)
+    second = QuestionCache(path=path, max_serves=4, flush_interval=0)
+    first.put(KEY, QUESTIONS)
+    assert second.get(KEY) == QUESTIONS
+    assert first.get(KEY) == QUESTIONS
+    assert served(path) == [3]
+    # The fourth serve anywhere retires the variant everywhere
+    assert second.get(KEY) == QUESTIONS
+    assert served(path) == []
+    # first has not flushed since, so it serves its own copy one last time
+    assert first.get(KEY) == QUESTIONS
+    assert first._entries[KEY] == []
+    assert first.get(KEY) is None
+
+
+def test_memory_only_cache():
+    cache = QuestionCache(path="")
+    cache.put(KEY, QUESTIONS)
+    assert cache.get(KEY) == QUESTIONS
+    cache.flush()
+
+
+def test_cache_keys_ignore_order_and_case():
+    assert make_cache_key("Python, Django", "Backend Developer", ["python", "django"]) == \
+        make_cache_key("django, python", "backend  developer", ["django", "python"])
+
+
+def test_stats_are_exported(monkeypatch):
+    cache = QuestionCache(path="")
+    cache.get(KEY)
+    monkeypatch.setattr(question_cache, "_question_cache", cache)
+    rendered = metrics.REGISTRY.render()
+    assert "talentscout_question_cache_misses 1" in rendered
+    assert 'talentscout_question_cache_evictions{reason="lru"} 0' in rendered
+    assert metrics.summary()["components"]["question_cache"]["misses"] == 1
@@ -0,0 +1,66 @@
+# tests/test_question_parser.py
+import pytest
+from question_parser import IncrementalQuestionParser, parse_questions
+
+
+def feed_all(chunks):
+    parser = IncrementalQuestionParser()
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    return parser, emitted
+
+
+def test_questions_are_emitted_as_their_items_close():
+    parser, emitted = feed_all(['{"questions": [{"question": "What is a GIL?", "difficulty": "founda',
+                                'tional"}, {"question": "How do asyncio tasks ', 'differ from threads?"}]}'])
+    assert emitted == ["What is a GIL?", "How do asyncio tasks differ from threads?"]
+    assert parser.close() == []
+
+
+def test_cut_off_item_is_not_emitted_until_close():
+    parser, emitted = feed_all(['{"questions": [{"question": "What is the GIL?"}, ',
+                                '{"question": "What is the GIL in'])
+    assert emitted == ["What is the GIL?"]
+    assert parser.questions == ["What is the GIL?"]
+    assert parser.partial() == "What is the GIL in"
+    # close() repairs the cut-off item, for answers that ended without an error
+    assert parser.close() == ["What is the GIL in"]
+
+
+def test_cut_off_before_any_item():
+    parser, emitted = feed_all(['{"questions": [{"quest'])
+    assert emitted == []
+    assert parser.partial() == ""
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    (['{"questions": ["Say \\', '"hi\\" twice"]}'], 'Say "hi" twice'),
+    (['{"questions": [{"question": "Caf\\u00', 'e9 or tea?"}]}'], "Café or tea?"),
+    (['{"questions": [{"question": "a\\\\', 'b?"}]}'], "a\\b?"),
+])
+def test_escapes_split_across_chunks(chunks, expected):
+    parser, emitted = feed_all(chunks)
+    assert emitted == [expected]
+
+
+def test_partial_leaves_out_a_cut_off_escape():
+    parser, _ = feed_all(['{"questions": [{"question": "Caf\\u00'])
+    assert parser.partial() == "Caf"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"items": [{"text": "A?"}, "B?"]}', ["A?", "B?"]),
+    ('{"question": "What is x?"}', ["What is x?"]),
+    ('```json\n{"question": "What is x?"}\n```', ["What is x?"]),
+    ('{"answer": "no questions"}', []),
+    ("1. What is x?\n2. What is y?", ["What is x?", "What is y?"]),
+])
+def test_answers_without_a_questions_key(text, expected):
+    assert parse_questions(text) == expected
+
+
+def test_broken_items_are_dropped():
+    parser, emitted = feed_all(['{"questions": [{"question": "A?",}, {"difficulty": "advanced"}]}'])
+    assert emitted == ["A?"]
+    assert parser.dropped == 1
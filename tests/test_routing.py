@@ -0,0 +1,112 @@
+# tests/test_routing.py
+import json
+import pytest
+import metrics
+import routing
+from routing import ModelRouter, RoutingConfigError, load_routing_config
+
+
+class FakeAdmission:
+    def __init__(self, depth):
+        self.depth = depth
+
+    def queue_depth(self):
+        return self.depth
+
+
+class FakeBackend:
+    def __init__(self, depth=0):
+        self.admission = FakeAdmission(depth)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    def install(depth=0):
+        fake = FakeBackend(depth)
+        monkeypatch.setattr(routing, "get_backend", lambda: fake)
+        return fake
+    return install
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    def write(config):
+        path = tmp_path / "routing.json"
+        path.write_text(json.dumps(config))
+        return str(path)
+    return write
+
+
+def test_tasks_route_to_their_tier(backend):
+    backend()
+    route = ModelRouter().route("grading")
+    assert (route.tier, route.model, route.reason) == ("standard", "gpt-4o-mini", "default")
+
+
+def test_deep_admission_queue_downgrades_one_tier(backend):
+    backend(depth=100)
+    route = ModelRouter(queue_depth_threshold=8).route("question_generation")
+    assert (route.tier, route.reason) == ("standard", "queue_depth")
+
+
+def test_slow_tiers_are_skipped_under_a_latency_budget(backend):
+    backend()
+    router = ModelRouter()
+    for _ in range(10):
+        router.latencies["premium"].record(5.0)
+        router.latencies["standard"].record(3.0)
+    route = router.route("question_generation", latency_budget=4.0)
+    assert (route.tier, route.reason) == ("standard", "latency_budget")
+    assert router.route("question_generation", latency_budget=1.0).tier == "fast"
+
+
+def test_new_tiers_from_the_config_are_routed(backend, config_file):
+    backend(depth=100)
+    tiers, tasks, tier_order = load_routing_config(config_file({
+        "tiers": {"local": {"model": "llama3"}},
+        "tasks": {"summarization": {"tier": "local"}}
+    }))
+    assert tier_order == ["premium", "standard", "fast", "local"]
+    router = ModelRouter(tiers, tasks, tier_order=tier_order)
+    assert set(router.latencies) == {"premium", "standard", "fast", "local"}
+    # Already the cheapest tier, nothing to downgrade to
+    assert router.route("summarization").model == "llama3"
+    assert router.route("clarification").tier == "local"
+
+
+def test_tier_order_from_the_config(backend, config_file):
+    backend(depth=100)
+    tiers, tasks, tier_order = load_routing_config(config_file({
+        "tiers": {"frontier": {"model": "gpt-4o"}},
+        "tier_order": ["frontier", "premium", "standard", "fast"],
+        "tasks": {"grading": {"tier": "frontier"}}
+    }))
+    router = ModelRouter(tiers, tasks, tier_order=tier_order)
+    assert router.route("grading").tier == "premium"
+
+
+@pytest.mark.parametrize("config, message", [
+    ({"tasks": {"grading": {"tier": "platinum"}}}, "unknown tier"),
+    ({"tiers": {"local": {"max_tokens": 100}}}, "has no model"),
+    ({"tier_order": ["premium", "fast"]}, "must list each"),
+])
+def test_invalid_configs_are_rejected(config_file, config, message):
+    with pytest.raises(RoutingConfigError, match=message):
+        load_routing_config(config_file(config))
+
+
+def test_router_validates_its_arguments():
+    with pytest.raises(RoutingConfigError):
+        ModelRouter(tasks={"grading": {"tier": "platinum", "max_tokens": 10, "temperature": 0}})
+
+
+def test_stats_are_exported(backend, monkeypatch):
+    backend()
+    router = ModelRouter()
+    router.route("grading")
+    router.latencies["standard"].record(0.5)
+    monkeypatch.setattr(routing, "_router", router)
+    rendered = metrics.REGISTRY.render()
+    assert 'talentscout_llm_routing_decisions{route="grading:standard"} 1' in rendered
+    assert 'talentscout_llm_routing_latency_p95_seconds{tier="standard"} 0.5' in rendered
+    assert metrics.summary()["components"]["llm_routing"]["decisions"] == {"grading:standard": 1}
@@ -0,0 +1,94 @@
+# tests/test_singleflight.py
+import threading
+import metrics
+from singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def run_callers(flights, key, work):
+    """Start CALLERS threads that generate key through flights, return their results."""
+    results = [None] * CALLERS
+    errors = [None] * CALLERS
+    joined = threading.Barrier(CALLERS + 1)
+
+    def caller(i):
+        flight, leader = flights.begin(key)
+        joined.wait()
+        if not leader:
+            try:
+                results[i] = flight.wait(timeout=5)
+            except Exception as e:
+                errors[i] = e
+            return
+        try:
+            results[i] = work()
+        except Exception as e:
+            errors[i] = e
+            flights.finish(key, flight, error=e)
+        else:
+            flights.finish(key, flight, results[i])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    joined.wait()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    executions = []
+    results, errors = run_callers(flights, "python|backend", lambda: executions.append(1) or ["Q1", "Q2"])
+
+    assert len(executions) == 1
+    assert results == [["Q1", "Q2"]] * CALLERS
+    assert errors == [None] * CALLERS
+    stats = flights.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == CALLERS - 1
+    assert stats["in_flight"] == 0
+
+
+def test_leader_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    def work():
+        raise RuntimeError("upstream down")
+
+    results, errors = run_callers(flights, "key", work)
+    assert results == [None] * CALLERS
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    first, first_leader = flights.begin("a")
+    second, second_leader = flights.begin("b")
+    assert first_leader and second_leader
+    assert first is not second
+
+
+def test_finished_flights_start_over():
+    flights = SingleFlight()
+    flight, _ = flights.begin("key")
+    flights.finish("key", flight, ["Q1"])
+    again, leader = flights.begin("key")
+    assert leader
+    assert again is not flight
+
+
+def test_wait_returns_none_on_timeout():
+    flights = SingleFlight()
+    flights.begin("key")
+    flight, leader = flights.begin("key")
+    assert not leader
+    assert flight.wait(timeout=0.01) is None
+
+
+def test_stats_are_exported():
+    rendered = metrics.REGISTRY.render()
+    assert "talentscout_singleflight_calls" in rendered
+    assert "singleflight" in metrics.summary()["components"]
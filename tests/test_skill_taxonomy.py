@@ -0,0 +1,52 @@
+# tests/test_skill_taxonomy.py
+import pytest
+from skill_taxonomy import get_skill_taxonomy
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Python+Django, Postgres, k8s", ["python", "django", "postgresql", "kubernetes"]),
+    ("React+Node+Express", ["react", "nodejs", "express"]),
+    ("node.js+react", ["nodejs", "react"]),
+    ("python+c++", ["python", "cpp"]),
+    ("c#+sql", ["csharp", "sql"]),
+    ("C++/C#, .NET+Azure", ["cpp", "csharp", "aspnet", "azure"]),
+    ("c++17", ["cpp"]),
+    ("go/rust", ["go", "rust"]),
+    ("ci/cd, pl/sql", ["cicd", "sql"]),
+])
+def test_normalize_joined_words(text, expected):
+    assert get_skill_taxonomy().normalize(text) == expected
+
+
+def test_normalize_aliases_and_versions():
+    taxonomy = get_skill_taxonomy()
+    assert taxonomy.normalize("JS, k8s, Postgres, ReactJS, node.js") == [
+        "javascript", "kubernetes", "postgresql", "react", "nodejs"]
+    assert taxonomy.normalize("Python 3.11, vue3, java-17") == ["python", "vue", "java"]
+
+
+def test_normalize_batch_matches_single():
+    taxonomy = get_skill_taxonomy()
+    texts = ["Python+Django", "kubernets, postgress", "", "React/Redux"]
+    assert taxonomy.normalize_batch(texts) == [taxonomy.normalize(text) for text in texts]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("kubernets, postgress", ["kubernetes", "postgresql"]),
+    ("typscript, tensorflw", ["typescript", "tensorflow"]),
+])
+def test_normalize_typos(text, expected):
+    assert get_skill_taxonomy().normalize(text) == expected
+
+
+@pytest.mark.parametrize("text", ["reactive programming", "pythonic", "sqlish", "gooey nodes"])
+def test_similar_words_are_not_skills(text):
+    assert get_skill_taxonomy().normalize(text) == []
+
+
+def test_large_batches_are_matched_in_chunks():
+    taxonomy = get_skill_taxonomy()
+    texts = [f"kubernets, tool{i}" for i in range(3000)]
+    results = taxonomy.normalize_batch(texts)
+    assert results == [["kubernetes"]] * 3000
+    assert taxonomy.unmatched("tool2999") == ["tool2999"]
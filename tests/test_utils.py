@@ -0,0 +1,59 @@
+# tests/test_utils.py
+import re
+import random
+import pytest
+from utils import TECH_CATEGORIES, extract_technologies, extract_technologies_batch
+
+
+def reference_extract(tech_stack_text):
+    """The per-keyword loop extract_technologies replaced.
+
+    Keywords ending in a symbol (c++, c#) used \\b after the symbol, which
+    only matched when a word character followed; they now match anywhere
+    but inside a longer symbol run.
+    """
+    result = {category: [] for category in TECH_CATEGORIES}
+    text_lower = tech_stack_text.lower()
+    for category, keywords in TECH_CATEGORIES.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                end = r"\b" if re.match(r"\w", keyword[-1]) else r"(?![+#])"
+                if re.search(r"\b" + re.escape(keyword) + end, text_lower):
+                    result[category].append(keyword)
+    return {k: v for k, v in result.items() if v}
+
+
+KEYWORDS = [kw for kws in TECH_CATEGORIES.values() for kw in kws]
+FILLERS = ["pythonic", "reactive", "nodes", "gooey", "sqlish", "and", "with", "5", "17", "x"]
+SEPARATORS = [", ", " ", "+", "#", "/", "-", ".", "; ", "++", "+#", "", " & "]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Python+Django", {"programming_languages": ["python"], "backend": ["django"]}),
+    ("React+Redux, Node+Express", {"frontend": ["react"], "backend": ["node", "express"]}),
+    ("c++17", {"programming_languages": ["c++"]}),
+    ("C++, C#", {"programming_languages": ["c++", "c#"]}),
+    ("c+++", {}),
+    ("javascripts, pythonic", {}),
+    ("React Native", {"frontend": ["react"], "mobile": ["react native"]}),
+])
+def test_extract_technologies_examples(text, expected):
+    assert extract_technologies(text) == expected
+
+
+def test_extract_technologies_matches_reference():
+    rng = random.Random(22)
+    words = KEYWORDS + FILLERS
+    for _ in range(5000):
+        parts = [rng.choice(words) for _ in range(rng.randint(1, 6))]
+        text = parts[0]
+        for part in parts[1:]:
+            text += rng.choice(SEPARATORS) + part
+        if rng.random() < 0.3:
+            text = text.upper()
+        assert extract_technologies(text) == reference_extract(text), text
+
+
+def test_extract_technologies_batch_matches_single():
+    texts = ["Python+Django", "python+django", "C++17", "", "React, node"]
+    assert extract_technologies_batch(texts) == [extract_technologies(text) for text in texts]
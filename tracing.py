@@ -0,0 +1,223 @@
+# tracing.py
+"""Per-turn tracing spans and an opt-in sampling profiler.
+
+Set TRACE_PATH to append one JSON object per finished span to that file. A
+span records its name, trace, parent, session and turn IDs, start time,
+duration and attributes; spans opened while another is active become its
+children, including in worker threads started with propagate(). Without
+TRACE_PATH, span() returns a shared no-op and costs next to nothing.
+
+Set PROFILE_PATH to sample the stacks of all threads every
+PROFILE_INTERVAL_MS milliseconds and write them in the collapsed format used
+by flamegraph.pl and speedscope ("frame;frame;frame count" per line).
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import logging
+import threading
+import contextvars
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_INTERVAL_MS = 10
+DEFAULT_PROFILE_FLUSH_SECONDS = 30
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A timed operation; use as a context manager."""
+
+    def __init__(self, exporter, name, session_id=None, turn_id=None, attributes=None):
+        self.exporter = exporter
+        self.name = name
+        self.attributes = attributes or {}
+        self.span_id = uuid.uuid4().hex[:16]
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        # Session and turn are inherited from the enclosing span
+        self.session_id = session_id or (parent.session_id if parent else None)
+        self.turn_id = turn_id if turn_id is not None else (parent.turn_id if parent else None)
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # A generator span closed from another context, e.g. by garbage collection
+            pass
+        self.exporter.export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "session_id": self.session_id,
+            "turn_id": self.turn_id,
+            "start": self.start,
+            "duration_ms": round(duration * 1000, 3),
+            "status": "error" if exc_type else "ok",
+            "error": repr(exc) if exc is not None else None,
+            "attributes": self.attributes
+        })
+        return False
+
+
+class JSONLExporter:
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+_exporter = None
+_exporter_path = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the exporter for TRACE_PATH, or None when tracing is off."""
+    global _exporter, _exporter_path
+    path = os.getenv("TRACE_PATH")
+    if not path:
+        return None
+    with _exporter_lock:
+        if _exporter is None or _exporter_path != path:
+            _exporter = JSONLExporter(path)
+            _exporter_path = path
+        return _exporter
+
+
+def span(name, session_id=None, turn_id=None, **attributes):
+    """Open a span named name; a no-op unless TRACE_PATH is set."""
+    exporter = get_exporter()
+    if exporter is None:
+        return NOOP_SPAN
+    return Span(exporter, name, session_id, turn_id, attributes)
+
+
+def propagate(fn):
+    """Wrap fn to run in a copy of the current context, keeping the active span.
+
+    Use it when handing work to another thread: executor.submit(propagate(fn), ...).
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+class SamplingProfiler:
+    """Samples every thread's stack and counts collapsed stacks."""
+
+    def __init__(self, path, interval=DEFAULT_PROFILE_INTERVAL_MS / 1000,
+                 flush_interval=DEFAULT_PROFILE_FLUSH_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def sample(self):
+        """Record the current stack of every thread except the profiler's own."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        with self._lock:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def flush(self):
+        """Rewrite the output file with all stacks collected so far."""
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n" if lines else "")
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def start_profiler():
+    """Start the process-wide profiler if PROFILE_PATH is set; returns it or None."""
+    global _profiler
+    path = os.getenv("PROFILE_PATH")
+    if not path:
+        return None
+    with _profiler_lock:
+        if _profiler is None:
+            interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", DEFAULT_PROFILE_INTERVAL_MS))
+            _profiler = SamplingProfiler(path, interval=interval_ms / 1000)
+            _profiler.start()
+            logger.info("Sampling stacks every %.1fms into %s", interval_ms, path)
+        return _profiler
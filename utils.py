@@ -1,8 +1,40 @@
 # utils.py
 import re
-import json
-import os
-from datetime import datetime
+import functools
+import tracing
+from candidate_store import get_candidate_store
+
+# Common technology categories and their keywords
+TECH_CATEGORIES = {
+    "programming_languages": [
+        "python", "java", "javascript", "typescript", "c++", "c#", "ruby", 
+        "php", "swift", "kotlin", "go", "rust", "scala", "perl"
+    ],
+    "frontend": [
+        "react", "angular", "vue", "svelte", "html", "css", "bootstrap", 
+        "tailwind", "sass", "less", "jquery"
+    ],
+    "backend": [
+        "node", "express", "django", "flask", "spring", "laravel", "rails", 
+        "fastapi", "asp.net", "symfony"
+    ],
+    "databases": [
+        "sql", "mysql", "postgresql", "mongodb", "sqlite", "oracle", 
+        "cassandra", "redis", "elasticsearch", "dynamodb", "mariadb"
+    ],
+    "devops": [
+        "docker", "kubernetes", "aws", "azure", "gcp", "jenkins", "gitlab", 
+        "github", "terraform", "ansible", "ci/cd", "linux"
+    ],
+    "mobile": [
+        "android", "ios", "react native", "flutter", "xamarin", "swift", 
+        "kotlin", "objective-c"
+    ],
+    "ai_ml": [
+        "tensorflow", "pytorch", "scikit-learn", "pandas", "numpy", 
+        "opencv", "nlp", "computer vision", "machine learning"
+    ]
+}
 
 def validate_email(email):
     """Validate email format."""
@@ -16,72 +48,142 @@ def validate_phone(phone):
     # Check if result is numeric and reasonable length
     return cleaned.isdigit() and 7 <= len(cleaned) <= 15
 
-def save_candidate_data(candidate_info):
-    """Save candidate information to a JSON file."""
-    # Create data directory if it doesn't exist
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    
-    # Generate a unique filename using timestamp and name
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    name = candidate_info.get("name", "unknown").lower().replace(" ", "_")
-    filename = f"data/candidate_{name}_{timestamp}.json"
-    
-    # Save to file
-    with open(filename, 'w') as f:
-        json.dump(candidate_info, f, indent=4)
-    
-    return filename
+def save_candidate_data(candidate_info, session_id=None):
+    """Save candidate information to the candidate store and return its ID."""
+    store = get_candidate_store()
+    with tracing.span("persistence", session_id=session_id, target=store.path):
+        return store.save(dict(candidate_info))
+
+def clean_question_line(line):
+    """Strip whitespace and numbering (e.g. "1. ", "- ") from a question line."""
+    question = line.strip()
+    if '. ' in question[:4]:
+        question = question.split('. ', 1)[-1]
+    if question.startswith('- '):
+        question = question[2:]
+    return question
+
+def _end_boundary(keyword):
+    """What must follow a keyword match.
+
+    Keywords ending in a word character use \\b. Keywords ending in a symbol
+    (c++, c#) may be followed by anything but a longer symbol run, so c++17
+    counts as c++ but c+++ does not.
+    """
+    if re.match(r"\w", keyword[-1]):
+        return r"\b"
+    return r"(?![+#])"
+
+def _keyword_pattern(keyword):
+    """Regex for one keyword on its own, as the compiled matcher finds it."""
+    return r"\b" + re.escape(keyword) + _end_boundary(keyword)
+
+def _trie_pattern(words):
+    """Build a regex alternation for words that branches on shared prefixes.
+
+    re tries alternatives one by one; a prefix tree turns the ~80 keyword
+    alternatives into a few character tests per position. Each word ends in
+    its _end_boundary.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = word
+
+    def build(node):
+        # "" marks the end of a word; longer continuations are tried first
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            branches.append(_end_boundary(node[""]))
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+def _compile_taxonomy(categories):
+    """Compile the keyword table into a single-pass matcher.
+
+    Returns the pattern, each keyword's (category, keyword) pairs in table
+    order, and the keywords that a longer keyword implies (a match of
+    "react native" also counts as "react", as separate searches would find).
+    """
+    keywords = list(dict.fromkeys(kw for kws in categories.values() for kw in kws))
+    pattern = re.compile(r"\b" + _trie_pattern(keywords))
+    order = {}
+    for category, kws in categories.items():
+        for kw in kws:
+            order.setdefault(kw, []).append((category, kw))
+    implied = {}
+    for kw in keywords:
+        found = {other for other in keywords if other != kw and re.search(_keyword_pattern(other), kw)}
+        if found:
+            implied[kw] = found
+    # A match consumes its text, so a keyword starting inside it and ending
+    # past it (c# in objective-c#) needs another look from where it starts
+    overlaps = {}
+    for kw in keywords:
+        offsets = [m.start() for m in re.finditer(r"\b", kw)
+                   if 0 < m.start() < len(kw) and any(
+                       other.startswith(kw[m.start():]) and len(other) > len(kw) - m.start() for other in keywords)]
+        if offsets:
+            overlaps[kw] = offsets
+    return pattern, order, implied, overlaps
+
+_TECH_PATTERN, _TECH_ORDER, _TECH_IMPLIED, _TECH_OVERLAPS = _compile_taxonomy(TECH_CATEGORIES)
+# Position of every (category, keyword) pair, to report results in table order
+_TECH_RANK = {pair: rank for rank, pair in enumerate(
+    (category, kw) for category, kws in TECH_CATEGORIES.items() for kw in kws)}
+
+@functools.lru_cache(maxsize=4096)
+def _categorize(found):
+    """Group a frozenset of matched keywords by category, in TECH_CATEGORIES order.
+
+    Returns (category, keywords) tuples; cached, since most candidates list
+    one of a few common stacks.
+    """
+    found = set(found)
+    for kw in list(found):
+        found.update(_TECH_IMPLIED.get(kw, ()))
+    pairs = sorted((pair for kw in found for pair in _TECH_ORDER[kw]), key=_TECH_RANK.__getitem__)
+    groups = {}
+    for category, kw in pairs:
+        groups.setdefault(category, []).append(kw)
+    return tuple((category, tuple(kws)) for category, kws in groups.items())
+
+def categorize_keywords(keywords):
+    """Group TECH_CATEGORIES keywords by category, as extract_technologies reports them."""
+    return {category: list(kws) for category, kws in _categorize(frozenset(keywords))}
+
+def _find_keywords(text):
+    """TECH_CATEGORIES keywords in lowercased text."""
+    found = _TECH_PATTERN.findall(text)
+    if _TECH_OVERLAPS.keys().isdisjoint(found):
+        return found
+    found = []
+    for match in _TECH_PATTERN.finditer(text):
+        found.append(match.group())
+        for offset in _TECH_OVERLAPS.get(match.group(), ()):
+            overlap = _TECH_PATTERN.match(text, match.start() + offset)
+            if overlap is not None and overlap.end() > match.end():
+                found.append(overlap.group())
+    return found
 
 def extract_technologies(tech_stack_text):
     """Extract and categorize technologies from the candidate's tech stack."""
-    # Common categories and their keywords
-    categories = {
-        "programming_languages": [
-            "python", "java", "javascript", "typescript", "c++", "c#", "ruby", 
-            "php", "swift", "kotlin", "go", "rust", "scala", "perl"
-        ],
-        "frontend": [
-            "react", "angular", "vue", "svelte", "html", "css", "bootstrap", 
-            "tailwind", "sass", "less", "jquery"
-        ],
-        "backend": [
-            "node", "express", "django", "flask", "spring", "laravel", "rails", 
-            "fastapi", "asp.net", "symfony"
-        ],
-        "databases": [
-            "sql", "mysql", "postgresql", "mongodb", "sqlite", "oracle", 
-            "cassandra", "redis", "elasticsearch", "dynamodb", "mariadb"
-        ],
-        "devops": [
-            "docker", "kubernetes", "aws", "azure", "gcp", "jenkins", "gitlab", 
-            "github", "terraform", "ansible", "ci/cd", "linux"
-        ],
-        "mobile": [
-            "android", "ios", "react native", "flutter", "xamarin", "swift", 
-            "kotlin", "objective-c"
-        ],
-        "ai_ml": [
-            "tensorflow", "pytorch", "scikit-learn", "pandas", "numpy", 
-            "opencv", "nlp", "computer vision", "machine learning"
-        ]
-    }
-    
-    result = {category: [] for category in categories}
-    
-    # Convert to lowercase for case-insensitive matching
-    text_lower = tech_stack_text.lower()
-    
-    # Extract technologies for each category
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                # Check if it's a whole word match
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                if re.search(pattern, text_lower):
-                    result[category].append(keyword)
-    
-    # Remove empty categories
-    result = {k: v for k, v in result.items() if v}
-    
-    return result
+    return categorize_keywords(_find_keywords(tech_stack_text.lower()))
+
+def extract_technologies_batch(texts):
+    """extract_technologies for many texts, e.g. for backfills over stored candidates.
+
+    Texts that are the same apart from case are only scanned once.
+    """
+    seen = {}
+    results = []
+    for text in texts:
+        key = (text or "").lower()
+        groups = seen.get(key)
+        if groups is None:
+            groups = seen[key] = _categorize(frozenset(_find_keywords(key)))
+        results.append({category: list(kws) for category, kws in groups})
+    return results